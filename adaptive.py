@@ -0,0 +1,177 @@
+# ============================================================================
+# 맞춤 난이도 (학생 최근 점수 → 다음 난이도) + 미리 생성된 퀴즈 풀
+# ============================================================================
+# 학생의 최근 결과로 다음 난이도를 한 단계씩 올리거나 내리고(계단식),
+# 해당 (교과서, 단원, 난이도) 퀴즈를 메모리 풀에서 바로 꺼내 준다.
+# 풀이 min_size보다 작으면 백그라운드 스레드가 Firestore에서 더 불러오거나 새로 생성해
+# target_size까지만 채우므로, 학생 요청 경로에서는 OpenAI를 기다리지 않는다.
+# 학생 요청으로 OpenAI 비용이 늘지 않도록 키마다 채우기는 한 번에 하나만, 실패하면
+# REFILL_COOLDOWN 동안 다시 시도하지 않고, 학생이 모든 퀴즈를 풀었어도 새로 만들지 않고
+# 가장 오래된 퀴즈를 다시 준다.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from textbooks import DIFFICULTY_OPTIONS
+
+DEFAULT_DIFFICULTY = "보통 (Original)"
+WINDOW = 3             # 같은 난이도의 최근 결과 몇 개로 판단할지
+MIN_ATTEMPTS = 2       # 난이도를 바꾸기 전 최소 결과 수
+PROMOTE_AT = 0.8       # 정답률이 이 이상이면 한 단계 어렵게
+DEMOTE_AT = 0.5        # 정답률이 이 이하이면 한 단계 쉽게
+REFILL_COOLDOWN = 600  # 생성 실패 후 같은 키를 다시 채우기까지 기다리는 시간 (초)
+
+
+@dataclass(frozen=True)
+class AdaptiveDecision:
+    difficulty: str
+    current: str
+    accuracy: float      # 현재 난이도 최근 정답률 (기록이 없으면 None)
+    attempts: int
+    reason: str
+
+
+def next_difficulty(history: list, window: int = WINDOW, min_attempts: int = MIN_ATTEMPTS,
+                    promote_at: float = PROMOTE_AT, demote_at: float = DEMOTE_AT) -> AdaptiveDecision:
+    """최근 결과(최신순, difficulty/score/total_questions 포함)로 다음 난이도 결정"""
+    known = [row for row in history if row.get("difficulty") in DIFFICULTY_OPTIONS]
+    if not known:
+        return AdaptiveDecision(DEFAULT_DIFFICULTY, DEFAULT_DIFFICULTY, None, 0, "첫 퀴즈는 보통 난이도로 시작합니다")
+    current = known[0]["difficulty"]
+    recent = [row for row in known if row["difficulty"] == current][:window]
+    total = sum(row.get("total_questions", 0) for row in recent)
+    accuracy = sum(row.get("score", 0) for row in recent) / total if total else None
+    level = DIFFICULTY_OPTIONS.index(current)
+    if accuracy is None or len(recent) < min_attempts:
+        return AdaptiveDecision(current, current, accuracy, len(recent), "기록이 더 쌓일 때까지 같은 난이도를 유지합니다")
+    if accuracy >= promote_at and level < len(DIFFICULTY_OPTIONS) - 1:
+        return AdaptiveDecision(DIFFICULTY_OPTIONS[level + 1], current, accuracy, len(recent),
+                                f"최근 정답률 {accuracy:.0%} → 한 단계 어렵게")
+    if accuracy <= demote_at and level > 0:
+        return AdaptiveDecision(DIFFICULTY_OPTIONS[level - 1], current, accuracy, len(recent),
+                                f"최근 정답률 {accuracy:.0%} → 한 단계 쉽게")
+    return AdaptiveDecision(current, current, accuracy, len(recent), f"최근 정답률 {accuracy:.0%} → 난이도 유지")
+
+
+class QuizPool:
+    """(교과서, 단원, 난이도)별 미리 생성된 퀴즈 풀 (프로세스 공용, 스레드 안전)
+
+    loader(textbook, chapter, difficulty, limit) → Firestore에 이미 있는 퀴즈 목록
+    generator(textbook, chapter, difficulty, question_types) → 새로 생성해 저장한 퀴즈 (실패 시 예외)
+    """
+
+    def __init__(self, loader, generator=None, min_size: int = 2, target_size: int = 4, workers: int = 2,
+                 refill_cooldown: float = REFILL_COOLDOWN):
+        self._loader = loader
+        self._generator = generator
+        self._min_size = min_size
+        self._target_size = max(target_size, min_size)
+        self._refill_cooldown = refill_cooldown
+        self._lock = threading.Lock()
+        self._pools = {}          # key → {quiz_id: quiz}
+        self._loaded = set()      # Firestore에서 한 번 불러온 키
+        self._in_flight = set()   # 채우는 중인 키
+        self._warming = set()     # warm()으로 불러오는 중인 키
+        self._retry_at = {}       # key → 생성 실패 후 다시 시도할 수 있는 시각 (monotonic)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-pool")
+        self.generated = 0
+        self.failures = []
+
+    def take(self, textbook: str, chapter: str, difficulty: str, exclude_ids=(), question_types=None):
+        """학생이 아직 풀지 않은 퀴즈 1개 (없으면 가장 오래된 퀴즈, 풀이 비었으면 None)
+
+        처음 보는 키는 Firestore에서 바로 불러오고(읽기만), min_size보다 작을 때만 백그라운드에서 채운다.
+        """
+        key = (textbook, chapter, difficulty)
+        if key not in self._loaded:
+            self._load(key)
+        exclude_ids = set(exclude_ids)
+        with self._lock:
+            quizzes = list(self._pools.get(key, {}).values())
+        if len(quizzes) < self._min_size:
+            self._schedule_refill(key, question_types)
+        unseen = [quiz for quiz in quizzes if quiz.get("id") not in exclude_ids]
+        if unseen:
+            return unseen[0]
+        return min(quizzes, key=lambda quiz: str(quiz.get("created_at") or "")) if quizzes else None
+
+    def warm(self, textbook: str, chapter: str, difficulties=DIFFICULTY_OPTIONS, question_types=None):
+        """학급이 사용할 단원의 모든 난이도를 미리 채움 (바로 반환)"""
+        for difficulty in difficulties:
+            key = (textbook, chapter, difficulty)
+            with self._lock:
+                ready = key in self._loaded and len(self._pools.get(key, {})) >= self._min_size
+                if ready or key in self._warming:
+                    continue
+                self._warming.add(key)
+            self._executor.submit(self._warm_one, key, question_types)
+
+    def add(self, quiz: dict):
+        """교사가 저장한 퀴즈 등을 풀에 추가 (target_size를 넘으면 넣지 않음)"""
+        key = (quiz.get("textbook_name"), quiz.get("chapter"), quiz.get("difficulty"))
+        with self._lock:
+            pool = self._pools.setdefault(key, {})
+            if len(pool) < self._target_size:
+                pool[quiz["id"]] = quiz
+
+    def sizes(self) -> dict:
+        with self._lock:
+            return {key: len(quizzes) for key, quizzes in self._pools.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+    def _load(self, key):
+        quizzes = self._loader(*key, self._target_size)
+        with self._lock:
+            pool = self._pools.setdefault(key, {})
+            for quiz in quizzes:
+                if len(pool) >= self._target_size:
+                    break
+                pool.setdefault(quiz["id"], quiz)
+            self._loaded.add(key)
+
+    def _warm_one(self, key, question_types):
+        try:
+            if key not in self._loaded:
+                self._load(key)
+            with self._lock:
+                short = len(self._pools.get(key, {})) < self._min_size
+            if short:
+                self._schedule_refill(key, question_types)
+        finally:
+            with self._lock:
+                self._warming.discard(key)
+
+    def _schedule_refill(self, key, question_types):
+        if self._generator is None:
+            return
+        with self._lock:
+            if (key in self._in_flight or len(self._pools.get(key, {})) >= self._target_size
+                    or time.monotonic() < self._retry_at.get(key, 0.0)):
+                return
+            self._in_flight.add(key)
+        self._executor.submit(self._refill, key, question_types)
+
+    def _refill(self, key, question_types):
+        """target_size까지 새 퀴즈 생성 (실패하면 REFILL_COOLDOWN 동안 이 키는 채우지 않음)"""
+        try:
+            with self._lock:
+                missing = self._target_size - len(self._pools.get(key, {}))
+            for _ in range(missing):
+                quiz = self._generator(*key, question_types)
+                with self._lock:
+                    self._pools.setdefault(key, {})[quiz["id"]] = quiz
+                    self.generated += 1
+        except Exception as e:
+            with self._lock:
+                self.failures.append((key, str(e)))
+                del self.failures[:-20]
+                self._retry_at[key] = time.monotonic() + self._refill_cooldown
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
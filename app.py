@@ -1,45 +1,20 @@
-import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import os
-
-# =====================
-# Firebase Singleton Init (최상단)
-# =====================
-if not firebase_admin._apps:
-    # 로컬 환경에서는 파일에서, Streamlit Cloud에서는 secrets에서 읽기
-    if os.path.exists("firebase-credentials_2.json"):
-        # 로컬 개발 환경
-        cred = credentials.Certificate("firebase-credentials_2.json")
-    else:
-        # Streamlit Cloud 환경
-        try:
-            firebase_config = {
-                "type": st.secrets["firebase"]["type"],
-                "project_id": st.secrets["firebase"]["project_id"],
-                "private_key_id": st.secrets["firebase"]["private_key_id"],
-                "private_key": st.secrets["firebase"]["private_key"],
-                "client_email": st.secrets["firebase"]["client_email"],
-                "client_id": st.secrets["firebase"]["client_id"],
-                "auth_uri": st.secrets["firebase"]["auth_uri"],
-                "token_uri": st.secrets["firebase"]["token_uri"],
-                "auth_provider_x509_cert_url": st.secrets["firebase"]["auth_provider_x509_cert_url"],
-                "client_x509_cert_url": st.secrets["firebase"]["client_x509_cert_url"]
-            }
-            cred = credentials.Certificate(firebase_config)
-        except Exception as e:
-            st.error(f"❌ Firebase 인증 오류: {str(e)}")
-            st.stop()
-    firebase_admin.initialize_app(cred)
-# Firestore Client 전역 선언
-db = firestore.client()
+import startup_timing
+startup_timer = startup_timing.StartupTimer()
 
-import json
+import streamlit as st
 import os
-from datetime import datetime
-from uuid import uuid4
+import time
+from datetime import datetime, timedelta
 import requests
-from textbooks import TEXTBOOKS, QUESTION_TYPES_INFO
+from textbooks import QUESTION_TYPES_INFO, DIFFICULTY_OPTIONS, LEXILE_TARGETS
+import datastore
+import readability
+from rewrite_cache import RewriteCache
+from http_client import HttpClient
+import quiz_ai
+import batch_generate
+import perf
+startup_timer.mark("모듈 import")
 
 # ============================================================================
 # 페이지 설정
@@ -51,13 +26,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 위젯을 조작하면 그 위젯이 있는 구역(fragment)만 다시 실행한다.
+# Streamlit 1.37부터 st.fragment, 그 전에는 st.experimental_fragment (둘 다 없으면 일반 함수)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# 구간별 소요 시간 기록 (PERF_ENABLED=1 일 때만, ?perf=1 로 교사 화면에 p50/p95 표시)
+perf.recorder.configure(
+    str(st.secrets.get("PERF_ENABLED") or os.getenv("PERF_ENABLED") or "").lower() in ("1", "true", "yes")
+)
+perf.recorder.begin_run()
+
+# =====================
+# Firestore 클라이언트 (처음 사용할 때 한 번만 초기화)
+# =====================
+@st.cache_resource
+def get_db():
+    """Firestore 클라이언트 (진입 화면처럼 Firestore가 필요 없는 화면에서는 만들지 않음)"""
+    started = time.perf_counter()
+    # 로컬 환경에서는 파일에서, Streamlit Cloud에서는 secrets에서 읽기
+    db = datastore.init_firebase_app(st.secrets)
+    startup_timing.record_process_mark("Firestore 초기화", time.perf_counter() - started)
+    return db
+
 # =====================
 # Firebase Auth REST API (이메일/비밀번호 로그인)
 # =====================
-import requests
 FIREBASE_WEB_API_KEY = st.secrets.get("FIREBASE_WEB_API_KEY") or os.getenv("FIREBASE_WEB_API_KEY") or ""
 FIREBASE_AUTH_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_WEB_API_KEY}"
 
+@st.cache_resource
+def get_http_client():
+    """OpenAI / Firebase Auth 공용 HTTP 클라이언트 (연결 풀 공유)"""
+    return HttpClient()
+
+@perf.timed("auth.email_login")
 def firebase_email_login(email, password):
     try:
         payload = {
@@ -65,235 +67,12 @@ def firebase_email_login(email, password):
             "password": password,
             "returnSecureToken": True
         }
-        resp = requests.post(FIREBASE_AUTH_URL, json=payload)
+        resp = get_http_client().post("firebase_auth", FIREBASE_AUTH_URL, json=payload)
         resp.raise_for_status()
         return resp.json()  # idToken 등 포함
     except Exception as e:
         return {"error": str(e)}
 
-# =====================
-# 메인 진입 화면: 학생/교사 선택
-# =====================
-if "main_mode" not in st.session_state:
-    st.session_state.main_mode = None  # None, "student", "teacher"
-if "teacher_logged_in" not in st.session_state:
-    st.session_state.teacher_logged_in = False
-if "teacher_email" not in st.session_state:
-    st.session_state.teacher_email = ""
-if "teacher_login_error" not in st.session_state:
-    st.session_state.teacher_login_error = ""
-
-def get_all_results():
-    """Firestore에서 모든 학생 결과 조회"""
-    try:
-        db = firestore.client()
-        docs = db.collection("results").order_by("timestamp", direction=firestore.Query.DESCENDING).stream()
-        return [doc.to_dict() for doc in docs]
-    except Exception as e:
-        st.error(f"❌ 결과 조회 오류: {str(e)}")
-        return []
-
-def show_entry_buttons():
-    st.title("교과서 기반 영어 퀴즈 생성기")
-    st.write("역할을 선택하세요:")
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("학생 입장", use_container_width=True):
-            st.session_state.main_mode = "student"
-    with col2:
-        if st.button("교사 입장", use_container_width=True):
-            st.session_state.main_mode = "teacher"
-
-def show_teacher_login():
-    st.title("교사 로그인")
-    email = st.text_input("이메일", value=st.session_state.teacher_email, key="teacher_email_input")
-    password = st.text_input("비밀번호", type="password", key="teacher_pw_input")
-    login_btn = st.button("로그인", use_container_width=True)
-    if login_btn:
-        result = firebase_email_login(email, password)
-        if "idToken" in result:
-            st.session_state.teacher_logged_in = True
-            st.session_state.teacher_email = email
-            st.session_state.teacher_login_error = ""
-        else:
-            st.session_state.teacher_login_error = "로그인 실패: 이메일 또는 비밀번호를 확인하세요."
-    if st.session_state.teacher_login_error:
-        st.error(st.session_state.teacher_login_error)
-    st.button("← 뒤로", on_click=lambda: st.session_state.update({"main_mode": None, "teacher_login_error": ""}), use_container_width=True)
-
-def show_teacher_dashboard():
-    st.header(f"👨‍🏫 교사 대시보드 ({st.session_state.teacher_email})")
-    st.button("로그아웃", on_click=lambda: st.session_state.update({"main_mode": None, "teacher_logged_in": False, "teacher_email": ""}), use_container_width=True)
-    tab1, tab2 = st.tabs(["📝 지문/퀴즈 생성", "📊 학생 결과 대시보드"])
-    with tab1:
-        st.subheader("1. 지문 난이도 결정 및 퀴즈 생성")
-        # 기존 퀴즈 생성 UI (지문 선택, 난이도, 변환, 문제 생성 등) 복사
-        col1, col2 = st.columns(2)
-        with col1:
-            textbook_list = list(TEXTBOOKS.keys())
-            selected_textbook = st.selectbox(
-                "📖 교과서 선택",
-                textbook_list,
-                key="teacher_textbook_select"
-            )
-            st.session_state.selected_textbook = selected_textbook
-        with col2:
-            if st.session_state.selected_textbook:
-                chapter_list = list(TEXTBOOKS[st.session_state.selected_textbook].keys())
-                selected_chapter = st.selectbox(
-                    "📄 단원 선택",
-                    chapter_list,
-                    key="teacher_chapter_select"
-                )
-                st.session_state.selected_chapter = selected_chapter
-        if st.session_state.selected_textbook and st.session_state.selected_chapter:
-            original_passage = TEXTBOOKS[st.session_state.selected_textbook][st.session_state.selected_chapter]["original_passage"]
-            st.info("📖 **원본 지문** (읽기 전용)")
-            st.text_area(
-                "원본 지문",
-                value=original_passage,
-                height=150,
-                disabled=True,
-                label_visibility="collapsed",
-                key="teacher_original_passage_view"
-            )
-            difficulty_options = ["쉬움 (Easy)", "보통 (Original)", "어려움 (Hard)"]
-            selected_passage_difficulty = st.selectbox(
-                "📚 지문 난이도 선택 (Lexile 기준으로 조정됨)",
-                difficulty_options,
-                key="teacher_passage_difficulty_select",
-                help="쉬움: Lexile 1000-1200\n보통: 원본 유지\n어려움: Lexile 1300-1500"
-            )
-            st.session_state.selected_passage_difficulty = selected_passage_difficulty
-            st.write("")
-            col_convert, col_space = st.columns([1, 3])
-            with col_convert:
-                if st.button("🔄 지문 변환하기", use_container_width=True, type="primary", key="teacher_convert_passage_btn"):
-                    with st.spinner("🤖 AI가 지문을 변환 중입니다..."):
-                        try:
-                            api_key = st.session_state.openai_api_key
-                            rewritten_passage = rewrite_passage_with_openai(
-                                api_key=api_key,
-                                original_passage=original_passage,
-                                difficulty=st.session_state.selected_passage_difficulty
-                            )
-                            st.session_state.current_passage = rewritten_passage
-                            st.session_state.step1_completed = True
-                            st.success("✅ 지문 변환 완료!")
-                        except Exception as e:
-                            st.error(f"❌ 오류 발생: {str(e)}")
-            if st.session_state.step1_completed and st.session_state.current_passage:
-                st.divider()
-                st.info("✏️ **변환된 지문** (필요시 편집 가능)")
-                edited_passage = st.text_area(
-                    "변환된 지문",
-                    value=st.session_state.current_passage,
-                    height=200,
-                    label_visibility="collapsed",
-                    key="teacher_edited_passage"
-                )
-                if edited_passage != st.session_state.current_passage:
-                    st.session_state.current_passage = edited_passage
-            if st.session_state.step1_completed and st.session_state.current_passage:
-                st.divider()
-                st.subheader("📋 Step 2: 문제 생성")
-                st.write("**문제에 포함할 문제 유형을 선택하세요:**")
-                st.caption("📌 질문 유형 설명")
-                cols = st.columns(len(QUESTION_TYPES_INFO))
-                for i, (qtype, description) in enumerate(QUESTION_TYPES_INFO.items()):
-                    with cols[i % len(cols)]:
-                        st.caption(f"**{qtype}**\n{description}")
-                selected_types = st.multiselect(
-                    "문제 유형 선택",
-                    list(QUESTION_TYPES_INFO.keys()),
-                    default=list(QUESTION_TYPES_INFO.keys())[:3],
-                    key="teacher_question_types_select",
-                    label_visibility="collapsed"
-                )
-                st.session_state.selected_question_types = selected_types if selected_types else list(QUESTION_TYPES_INFO.keys())[:3]
-                st.write("")
-                col_generate, col_space2 = st.columns([1, 3])
-                with col_generate:
-                    if st.button("🤖 문제 생성하기", use_container_width=True, type="primary", key="teacher_generate_quiz_btn"):
-                        if not st.session_state.selected_question_types:
-                            st.error("❌ 최소 1개 이상의 문제 유형을 선택해주세요")
-                        else:
-                            with st.spinner("🤖 AI가 문제를 생성 중입니다..."):
-                                try:
-                                    api_key = st.session_state.openai_api_key
-                                    quiz_data = generate_quiz_with_openai(
-                                        api_key=api_key,
-                                        passage=st.session_state.current_passage,
-                                        question_types=st.session_state.selected_question_types
-                                    )
-                                    st.session_state.generated_quiz = quiz_data
-                                    st.success("✅ 문제 생성 완료!")
-                                except Exception as e:
-                                    st.error(f"❌ 오류 발생: {str(e)}")
-                if "generated_quiz" in st.session_state and st.session_state.generated_quiz:
-                    st.divider()
-                    st.info("✅ **생성된 문제 미리보기**")
-                    quiz_data = st.session_state.generated_quiz
-                    for i, question in enumerate(quiz_data.get("questions", []), 1):
-                        st.write(f"**문제 {i}:** {question.get('question_text', '')}")
-                        if "options" in question:
-                            for j, option in enumerate(question['options'], 1):
-                                st.write(f"  {chr(64+j)}. {option}")
-                        if "explanation" in question:
-                            st.caption(f"💡 해설: {question['explanation']}")
-                        st.write("")
-                    col_save, col_discard = st.columns(2)
-                    with col_save:
-                        if st.button("💾 저장하기", use_container_width=True, type="primary", key="teacher_save_quiz_btn"):
-                            try:
-                                save_quiz_to_firestore(
-                                    textbook_name=st.session_state.selected_textbook,
-                                    chapter=st.session_state.selected_chapter,
-                                    difficulty=st.session_state.selected_passage_difficulty,
-                                    question_types=st.session_state.selected_question_types,
-                                    original_passage=TEXTBOOKS[st.session_state.selected_textbook][st.session_state.selected_chapter]["original_passage"],
-                                    rewritten_passage=st.session_state.current_passage,
-                                    questions=quiz_data.get("questions", [])
-                                )
-                                st.success("✅ 퀴즈가 성공적으로 저장되었습니다!")
-                                st.session_state.step1_completed = False
-                                st.session_state.current_passage = ""
-                                st.session_state.generated_quiz = None
-                            except Exception as e:
-                                st.error(f"❌ 저장 오류: {str(e)}")
-                    with col_discard:
-                        if st.button("🗑️ 초기화", use_container_width=True, key="teacher_reset_quiz_btn"):
-                            st.session_state.step1_completed = False
-                            st.session_state.current_passage = ""
-                            st.session_state.generated_quiz = None
-                            st.rerun()
-    with tab2:
-        st.subheader("2. 학생 결과 대시보드")
-        results = get_all_results()
-        import pandas as pd
-        if results:
-            df = pd.DataFrame(results)
-            st.dataframe(df)
-            st.bar_chart(df['score'])
-        else:
-            st.info("아직 제출된 결과가 없습니다.")
-
-# 진입 분기
-if st.session_state.main_mode is None:
-    show_entry_buttons()
-    st.stop()
-elif st.session_state.main_mode == "teacher":
-    if not st.session_state.teacher_logged_in:
-        show_teacher_login()
-        st.stop()
-    else:
-        show_teacher_dashboard()
-        st.stop()
-elif st.session_state.main_mode == "student":
-    pass  # 아래 기존 학생/선생님 분기 코드로 진행
-
-
-
 # ============================================================================
 # OPENAI 초기화 (캐시됨 - 한 번만 실행)
 # ============================================================================
@@ -317,129 +96,392 @@ def get_openai_api_key():
         st.error(f"❌ {error_msg}")
         st.stop()
 
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.results_page")
+def fetch_results_page(filters, cursor, page_size: int):
+    """결과 한 페이지 조회 (커서 기반, 필터는 Firestore에서 적용)"""
+    import results_query
+    return results_query.fetch_page(get_db(), filters, cursor, page_size)
+
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.results_count")
+def count_results(filters):
+    """필터에 맞는 결과 수 (count 집계 쿼리)"""
+    import results_query
+    return results_query.count_results(get_db(), filters)
+
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.mastery_students")
+def fetch_mastery_students(class_code):
+    """숙련도 문서가 있는 학생 목록 (학급 코드가 있으면 해당 학급만)"""
+    import mastery
+    return mastery.list_students(get_db(), class_code or None)
+
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.mastery")
+def fetch_mastery(student_name, class_code):
+    """학생 숙련도 문서 1개 (student_name이 None이면 학급 문서)"""
+    import mastery
+    if student_name is None:
+        return mastery.get_class_mastery(get_db(), class_code)
+    return mastery.get_student_mastery(get_db(), student_name, class_code or None)
+
+def clear_results_cache():
+    """새 결과가 저장되면 결과 페이지 / 숙련도 캐시 비우기"""
+    fetch_results_page.clear()
+    count_results.clear()
+    fetch_mastery_students.clear()
+    fetch_mastery.clear()
+    fetch_all_quiz_stats.clear()
+
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.quiz_stats")
+def fetch_all_quiz_stats():
+    """퀴즈별 사전 집계 문서 (퀴즈 수만큼 읽음)"""
+    import quiz_stats
+    return quiz_stats.get_all_quiz_stats(get_db())
+
+def get_all_quiz_stats():
+    """퀴즈별 사전 집계 문서 조회"""
+    try:
+        return fetch_all_quiz_stats()
+    except Exception as e:
+        st.error(f"❌ 통계 조회 오류: {str(e)}")
+        return []
+
 # ============================================================================
 # FIRESTORE 데이터베이스 함수
 # ============================================================================
+@perf.timed("firestore.save_quiz")
 def save_quiz_to_firestore(textbook_name: str, chapter: str, difficulty: str, question_types: list, 
                            original_passage: str, rewritten_passage: str, questions: list):
     """생성된 퀴즈를 Firestore에 저장"""
     try:
-        db = firestore.client()
-        quiz_id = str(uuid4())
-        quiz_data = {
-            "id": quiz_id,
-            "textbook_name": textbook_name,
-            "chapter": chapter,
-            "difficulty": difficulty,
-            "question_types": question_types,
-            "original_passage": original_passage,
-            "rewritten_passage": rewritten_passage,
-            "questions": questions,
-            "created_at": datetime.now()
-        }
-        db.collection("quizzes").document(quiz_id).set(quiz_data)
+        quiz_data = datastore.quiz_document(
+            textbook_name, chapter, difficulty, question_types,
+            original_passage, rewritten_passage, questions
+        )
+        quiz_id = datastore.save_quiz(get_db(), quiz_data)
+        fetch_recent_quizzes.clear()
+        get_quiz_pool().add(datastore.student_projection(quiz_data))
         return quiz_id
     except Exception as e:
         st.error(f"❌ 퀴즈 저장 오류: {str(e)}")
         return None
 
-def get_latest_quiz():
-    """Firestore에서 최신 퀴즈 조회"""
+@st.cache_resource
+def get_assignment_cache():
+    """학급별 배정 퀴즈 공용 캐시 (학급 문서 리스너로 갱신)"""
+    from quiz_cache import AssignmentCache
+    return AssignmentCache(get_db())
+
+@perf.timed("firestore.class_quizzes")
+def get_class_quizzes(class_code: str):
+    """학급에 지금 열려 있는 배정 퀴즈 목록 (학급 문서 1개를 캐시에서 조회)"""
     try:
-        db = firestore.client()
-        docs = db.collection("quizzes").order_by("created_at", direction=firestore.Query.DESCENDING).limit(1).stream()
-        
-        quiz_list = [doc.to_dict() for doc in docs]
-        return quiz_list[0] if quiz_list else None
+        return get_assignment_cache().active_quizzes(class_code)
     except Exception as e:
         st.error(f"❌ 퀴즈 조회 오류: {str(e)}")
         return None
 
-def save_result_to_firestore(quiz_id: str, student_name: str, score: int, total_questions: int):
-    """학생 결과를 Firestore results 컬렉션에 저장"""
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.recent_quizzes")
+def fetch_recent_quizzes():
+    """배정할 퀴즈 선택용 최근 퀴즈 목록"""
+    import assignments
+    return assignments.recent_quizzes(get_db())
+
+@perf.timed("firestore.assign_quiz")
+def assign_quiz_to_class(class_code: str, quiz_id: str, opens_at, closes_at):
+    """퀴즈를 학급에 배정하고 배정 캐시 갱신 (성공 시 정규화된 학급 코드 반환)"""
+    import assignments
     try:
-        db = firestore.client()
-        result_id = str(uuid4())
-        result_data = {
-            "id": result_id,
-            "quiz_id": quiz_id,
-            "student_name": student_name,
-            "score": score,
-            "total_questions": total_questions,
-            "timestamp": datetime.now()
-        }
-        db.collection("results").document(result_id).set(result_data)
-        return result_id
+        quiz = datastore.get_quiz(get_db(), quiz_id)
+        if quiz is None:
+            st.error("❌ 퀴즈를 찾을 수 없습니다")
+            return None
+        code = assignments.assign_quiz(get_db(), class_code, quiz, opens_at, closes_at,
+                                       assigned_by=st.session_state.teacher_email)
+        get_assignment_cache().invalidate(code)
+        return code
+    except Exception as e:
+        st.error(f"❌ 배정 오류: {str(e)}")
+        return None
+
+@perf.timed("firestore.unassign_quiz")
+def unassign_quiz_from_class(class_code: str, quiz_id: str):
+    import assignments
+    try:
+        assignments.unassign_quiz(get_db(), class_code, quiz_id)
+        get_assignment_cache().invalidate(class_code)
+    except Exception as e:
+        st.error(f"❌ 배정 해제 오류: {str(e)}")
+
+@st.cache_data(ttl=600, show_spinner=False)
+@perf.timed("firestore.answer_key")
+def fetch_answer_key(quiz_id: str):
+    """채점용 정답 문서 (퀴즈가 저장된 뒤에는 바뀌지 않으므로 오래 캐시)"""
+    return datastore.get_answer_key(get_db(), quiz_id)
+
+def grade_quiz(quiz_id: str, answers: list):
+    """서버에서 정답 문서로 채점 → (문항별 정답 여부, 정답 문서). 실패하면 (None, None)"""
+    try:
+        answer_key = fetch_answer_key(quiz_id)
+        if answer_key is None:
+            st.error("❌ 이 퀴즈의 정답 정보를 찾을 수 없습니다")
+            return None, None
+        return datastore.grade(answer_key, answers), answer_key
+    except Exception as e:
+        st.error(f"❌ 채점 오류: {str(e)}")
+        return None, None
+
+@st.cache_data(ttl=15, show_spinner=False)
+@perf.timed("firestore.teacher_quiz")
+def fetch_teacher_quiz(quiz_id: str):
+    """교사용 전체 퀴즈 문서 (정답 / 해설 포함)"""
+    return datastore.get_quiz(get_db(), quiz_id)
+
+@perf.timed("firestore.regrade")
+def regrade_with_answer_key(quiz_id: str, answers: list):
+    """정답을 고치고 그 퀴즈의 모든 제출을 재채점 (실패 시 None)
+
+    정답 캐시를 비워 이후 제출은 새 정답으로 채점하고, 저장 큐에 남아 있는 제출은 먼저 커밋해서
+    재채점 대상에 포함한다. 재채점은 원자적이지 않으므로 실패하면 다시 실행하도록 안내한다.
+    """
+    import regrade
+    try:
+        regrade.update_answer_key(get_db(), quiz_id, answers)
+        fetch_answer_key.clear()
+        fetch_teacher_quiz.clear()
+        get_result_writer().flush()
+        return regrade.regrade_quiz(get_db(), quiz_id, key=answers)
+    except regrade.RegradeError as e:
+        st.error(f"❌ {str(e)}")
+        return None
+    except Exception as e:
+        st.error(f"❌ 재채점 오류: {str(e)}")
+        return None
+    finally:
+        # 정답 수정 중에 다른 세션이 옛 정답을 다시 캐시했을 수 있으므로 한 번 더 비움
+        fetch_answer_key.clear()
+        clear_results_cache()
+
+@st.cache_resource
+def get_result_writer():
+    """학생 결과 write-behind 큐 (프로세스 공용, 모아서 batch 커밋)"""
+    from result_writer import ResultWriter
+
+    return ResultWriter(get_db(), on_flush=clear_results_cache)
+
+@perf.timed("firestore.save_result")
+def save_result_to_firestore(quiz_id: str, student_name: str, score: int, total_questions: int,
+                             correct_flags: list = None, class_code: str = None,
+                             answers: list = None, question_types: list = None, difficulty: str = None):
+    """학생 결과를 저장 큐에 넣고 바로 id 반환 (results 문서, 퀴즈 집계, 숙련도는 백그라운드에서 batch 커밋)"""
+    try:
+        result_data = datastore.result_document(
+            quiz_id, student_name, score, total_questions,
+            correct_flags=correct_flags, class_code=class_code,
+            answers=answers, question_types=question_types, difficulty=difficulty
+        )
+        return get_result_writer().submit(result_data)
     except Exception as e:
         st.error(f"❌ 결과 저장 오류: {str(e)}")
         return None
 
+# ============================================================================
+# 지문 난이도 측정
+# ============================================================================
+@st.cache_resource
+def get_textbook_store():
+    """교과서 색인 (본문은 단원을 고를 때 읽음, 원본 난이도는 색인에 저장됨)"""
+    import textbook_store
+    return textbook_store.default_store()
+
+@st.cache_resource
+def get_passage_search():
+    """지문 검색 색인 (처음 검색할 때 로드)"""
+    import passage_search
+    return passage_search.PassageSearch(get_textbook_store())
+
+def select_passage(textbook, chapter):
+    """검색 결과에서 고른 지문으로 교과서/단원 선택 상자 이동"""
+    st.session_state.teacher_publisher_select = "전체"
+    st.session_state.teacher_textbook_select = textbook
+    st.session_state.teacher_chapter_select = chapter
+
+def show_passage_search():
+    """키워드 / 주제 검색 결과를 보여 주고 선택하면 아래 선택 상자에 반영"""
+    with st.expander("🔎 지문 검색", expanded=False):
+        col_query, col_mode = st.columns([3, 1])
+        with col_query:
+            query = st.text_input("검색어 (예: social media, climate change)", key="passage_search_query")
+        with col_mode:
+            mode = st.radio("검색 방식", ["키워드", "주제"], key="passage_search_mode", horizontal=True)
+        if not query.strip():
+            return
+        try:
+            search = get_passage_search()
+            hits = search.search(query, limit=10) if mode == "키워드" else search.semantic(query, limit=10)
+        except Exception as e:
+            st.error(f"❌ 검색 오류: {str(e)}")
+            return
+        if not hits:
+            st.info("검색 결과가 없습니다.")
+            return
+        for i, hit in enumerate(hits):
+            col_text, col_btn = st.columns([5, 1])
+            with col_text:
+                st.markdown(f"**{hit.textbook} / {hit.chapter}** · {hit.publisher}")
+                st.caption(search.snippet(hit, query))
+            with col_btn:
+                st.button("선택", key=f"passage_search_pick_{i}", on_click=select_passage,
+                          args=(hit.textbook, hit.chapter), use_container_width=True)
+
+def show_similar_passages(textbook, chapter):
+    """현재 지문과 주제가 비슷한 다른 지문"""
+    with st.expander("🧭 비슷한 지문", expanded=False):
+        try:
+            hits = get_passage_search().similar(textbook, chapter, limit=5)
+        except Exception as e:
+            st.error(f"❌ 검색 오류: {str(e)}")
+            return
+        if not hits:
+            st.info("비슷한 지문이 없습니다.")
+        for i, hit in enumerate(hits):
+            st.button(f"{hit.textbook} / {hit.chapter} (유사도 {hit.score:.2f})", key=f"similar_pick_{i}",
+                      on_click=select_passage, args=(hit.textbook, hit.chapter))
+
+def difficulty_help_text():
+    """난이도 선택 도움말 (목표 Lexile 구간은 textbooks.LEXILE_TARGETS 기준)"""
+    lines = []
+    for option in DIFFICULTY_OPTIONS:
+        low, high = LEXILE_TARGETS.get(option, (None, None))
+        label = option.split(" ")[0]
+        if low is None and high is None:
+            lines.append(f"{label}: 원본 유지")
+        elif high is None:
+            lines.append(f"{label}: Lexile {low} 이상")
+        else:
+            lines.append(f"{label}: Lexile {low}-{high}")
+    return "\n".join(lines)
+
+def show_passage_level(passage: str, difficulty: str):
+    """변환된 지문의 측정 난이도와 목표 구간 일치 여부 표시"""
+    report = readability.analyze(passage)
+    gap = readability.level_gap(report.lexile, difficulty)
+    if gap == 0:
+        st.caption(f"📏 측정 난이도: {readability.format_level(report)}")
+    else:
+        st.warning(f"📏 측정 난이도: {readability.format_level(report)} — 목표 구간보다 {'쉬움' if gap < 0 else '어려움'}")
 
 # ============================================================================
-# 지문 재작성 함수 (Step 1)
+# OpenAI 사용량 / 예산
+# ============================================================================
+@st.cache_resource
+def get_usage_tracker():
+    """OpenAI 호출 기록 (프로세스 공용). 예산은 secrets 또는 환경 변수로 조정"""
+    from usage_tracker import UsageTracker, DEFAULT_DAILY_BUDGET_USD, DEFAULT_USER_DAILY_BUDGET_USD
+    daily_budget = st.secrets.get("OPENAI_DAILY_BUDGET_USD") or os.getenv("OPENAI_DAILY_BUDGET_USD") or DEFAULT_DAILY_BUDGET_USD
+    user_budget = (st.secrets.get("OPENAI_TEACHER_DAILY_BUDGET_USD") or os.getenv("OPENAI_TEACHER_DAILY_BUDGET_USD")
+                   or DEFAULT_USER_DAILY_BUDGET_USD)
+    return UsageTracker(daily_budget=float(daily_budget), user_daily_budget=float(user_budget))
+
+def get_usage_scope():
+    """로그인한 교사 기준 사용량 기록"""
+    return get_usage_tracker().scope(st.session_state.get("teacher_email") or "anonymous")
+
+# ============================================================================
+# 맞춤 난이도 (미리 생성된 퀴즈 풀)
 # ============================================================================
-def rewrite_passage_with_openai(api_key: str, original_passage: str, difficulty: str):
-    """지문을 선택된 난이도 수준으로 재작성"""
+@st.cache_resource
+def get_quiz_pool():
+    """(교과서, 단원, 난이도)별 퀴즈 풀. 부족하면 백그라운드에서 생성해 저장"""
+    from adaptive import QuizPool
+    db = get_db()
+    api_key = st.secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+    # 백그라운드 스레드에서는 st.* 를 부르지 않도록 필요한 자원을 미리 만들어 둠
+    client, cache = get_http_client(), get_rewrite_cache()
+    limiter = batch_generate.RateLimiter(30)
+    usage = get_usage_tracker().scope("adaptive-pool")
+
+    def generate(textbook, chapter, difficulty, question_types):
+        job = batch_generate.BatchJob(textbook, chapter, difficulty,
+                                      tuple(question_types or batch_generate.DEFAULT_QUESTION_MIXES[0]))
+        quiz_data = batch_generate.run_job(job, client, cache, api_key, limiter, usage)
+        quiz_data["source"] = datastore.POOL_QUIZ_SOURCE
+        datastore.save_quiz(db, quiz_data)
+        return datastore.student_projection(quiz_data)
+
+    return QuizPool(
+        loader=lambda textbook, chapter, difficulty, limit: datastore.find_quizzes(db, textbook, chapter, difficulty, limit),
+        generator=generate if api_key else None,
+    )
+
+def get_student_history(student_name: str, class_code: str) -> list:
+    """학생 최근 결과 (최신순). 아직 저장 큐에 있는 이번 세션 제출도 포함
+
+    이름이 같은 다른 반 학생과 섞이지 않도록 학급 코드까지 같은 결과만 본다.
+    """
+    import results_query
+    filters = results_query.ResultFilters(class_code=class_code, student_name=student_name)
+    rows, _ = fetch_results_page(filters, None, 10)
+    local = [row for row in reversed(st.session_state.get("adaptive_history", []))
+             if row.get("student_name") == student_name and row.get("class_code") == class_code]
+    seen = {row["id"] for row in local}
+    return (local + [row for row in rows if row.get("id") not in seen])[:10]
+
+@perf.timed("adaptive.pick_quiz")
+def pick_adaptive_quiz(student_name: str, class_code: str, base_quiz: dict):
+    """최근 점수로 난이도를 정하고 풀에서 퀴즈 선택 (풀이 비어 있으면 배정 퀴즈 그대로)"""
+    import adaptive
     try:
-        # "보통 (Original)"이면 원본 반환 (API 호출 없음)
-        if difficulty == "보통 (Original)":
-            return original_passage
-        
-        difficulty_map = {
-            "쉬움 (Easy)": "easy (초등학교 수준의 단어와 간단한 문장 사용, Lexile 600-800)",
-            "어려움 (Hard)": "hard (대학 수준의 어휘와 복잡한 문장 구조, Lexile 1200+)"
-        }
-        
-        difficulty_level = difficulty_map.get(difficulty, "original")
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        prompt = f"""당신은 영어 교육 전문가입니다. 다음 작업을 수행하세요:
+        history = get_student_history(student_name, class_code)
+        decision = adaptive.next_difficulty(history)
+        quiz = get_quiz_pool().take(
+            base_quiz.get("textbook_name"), base_quiz.get("chapter"), decision.difficulty,
+            exclude_ids={row.get("quiz_id") for row in history}, question_types=base_quiz.get("question_types")
+        )
+        return quiz or base_quiz, decision
+    except Exception as e:
+        st.error(f"❌ 맞춤 퀴즈 선택 오류: {str(e)}")
+        return base_quiz, None
 
-원본 지문:
-{original_passage}
+# ============================================================================
+# 지문 재작성 함수 (Step 1)
+# ============================================================================
+@st.cache_resource
+def get_rewrite_cache():
+    """지문 변환 결과 캐시 (세션 간 공유)"""
+    return RewriteCache()
 
-작업:
-주어진 지문을 {difficulty_level} 수준으로 재작성하세요.
-- 주요 내용과 의미는 유지하세요
-- 단어와 문장 구조만 변경하세요
-- 재작성된 지문의 길이는 200-350단어 정도여야 합니다
+def openai_error_detail(e: requests.exceptions.HTTPError) -> str:
+    """HTTP 오류 응답에서 OpenAI 오류 메시지 추출 (JSON이 아니면 본문 또는 예외 문자열)"""
+    if e.response is None:
+        return str(e)
+    try:
+        body = e.response.json()
+    except ValueError:
+        return e.response.text or str(e)
+    error = body.get("error") if isinstance(body, dict) else None
+    if isinstance(error, dict) and error.get("message"):
+        return error["message"]
+    return str(body)
 
-재작성된 지문만 반환하세요 (다른 설명 없음)."""
-        
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "당신은 영어 교육 전문가로서 텍스트 난이도를 조정하는 데 능숙합니다."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 800
-        }
-        
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=60
+@perf.timed("openai.rewrite_passage")
+def rewrite_passage_with_openai(api_key: str, original_passage: str, difficulty: str, regenerate: bool = False,
+                                on_text=None):
+    """지문을 선택된 난이도 수준으로 재작성 (regenerate=True면 캐시를 무시하고 새로 생성)
+
+    on_text가 주어지면 토큰이 도착할 때마다 지금까지 받은 텍스트로 호출한다.
+    """
+    try:
+        return quiz_ai.rewrite_passage(
+            get_http_client(), get_rewrite_cache(), api_key, original_passage, difficulty,
+            regenerate=regenerate, on_text=on_text, usage=get_usage_scope()
         )
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        if "choices" not in result:
-            st.error(f"❌ OpenAI API 오류: {result.get('error', {}).get('message', '알 수 없는 오류')}")
-            return None
-        
-        rewritten_text = result["choices"][0]["message"]["content"].strip()
-        return rewritten_text
-            
     except requests.exceptions.HTTPError as e:
-        error_detail = e.response.json() if hasattr(e.response, 'json') else str(e)
-        st.error(f"❌ OpenAI API 오류: {error_detail}")
+        st.error(f"❌ OpenAI API 오류: {openai_error_detail(e)}")
         return None
     except Exception as e:
         st.error(f"❌ 지문 변환 오류: {str(e)}")
@@ -448,94 +490,29 @@ def rewrite_passage_with_openai(api_key: str, original_passage: str, difficulty:
 # ============================================================================
 # AI 퀴즈 생성 함수 (Step 2)
 # ============================================================================
-def generate_quiz_with_openai(api_key: str, passage: str, question_types: list):
-    """Step 2: 주어진 지문을 기반으로 퀴즈 생성"""
+@perf.timed("openai.generate_quiz")
+def generate_quiz_with_openai(api_key: str, passage: str, question_types: list, on_question=None,
+                              parallel: bool = False):
+    """Step 2: 주어진 지문을 기반으로 퀴즈 생성
+
+    on_question이 주어지면 문제 객체가 하나 완성될 때마다 (번호, 문제)로 호출한다.
+    parallel=True면 문제 유형별로 요청을 나누어 동시에 생성한다.
+    """
     try:
-        question_types_str = ", ".join(question_types)
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        prompt = f"""당신은 한국 고등학교 영어 교사입니다. 다음 작업을 수행하세요:
-
-지문:
-{passage}
-
-작업:
-위 지문을 기반으로 다음 질문 유형으로 정확히 {len(question_types)}개의 객관식 문제를 생성하세요:
-- 요청된 질문 유형: {question_types_str}
-
-질문 유형 설명:
-- 주제 추론: 지문의 주제나 주요 내용을 파악하는 문제
-- 제목 추론: 지문에 가장 적합한 제목을 선택하는 문제
-- 빈칸 추론: 지문의 빈칸에 들어갈 가장 적절한 단어/구를 선택하는 문제
-- 요지 추론: 지문의 요점이나 결론을 파악하는 문제
-- 문단 요약: 특정 문단의 내용을 가장 잘 요약한 것을 선택하는 문제
-
-다음의 정확한 JSON 형식으로 응답하세요 (다른 텍스트는 없음):
-{{
-    "questions": [
-        {{
-            "question_text": "문제 텍스트",
-            "type": "질문 유형",
-            "options": ["선택지 1", "선택지 2", "선택지 3", "선택지 4"],
-            "correct_answer": 0
-        }}
-    ]
-}}
-
-주의:
-- 각 문제는 정확히 4개의 선택지를 가져야 합니다
-- correct_answer는 정답의 인덱스 (0-3)입니다
-- 빈칸 추론 문제의 경우, 지문의 원문을 참고하여 지문 내에서 빈칸을 명시하지 마세요
-- JSON만 반환하세요"""
-        
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "당신은 한국 고등학교 영어 교사로서 지문 기반 퀴즈를 만드는 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 2000
-        }
-        
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        if "choices" not in result:
-            st.error(f"❌ OpenAI API 오류: {result.get('error', {}).get('message', '알 수 없는 오류')}")
-            return None
-        
-        response_text = result["choices"][0]["message"]["content"].strip()
-        
-        # JSON 추출
-        try:
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
-            
-            quiz_data = json.loads(response_text)
-            return quiz_data
-        except json.JSONDecodeError:
-            st.error("❌ OpenAI 응답을 JSON으로 파싱하는 데 실패했습니다")
-            st.write("수신된 응답:", response_text[:300])
-            return None
-            
+        if parallel:
+            quiz_data = quiz_ai.generate_quiz_parallel(get_http_client(), api_key, passage, question_types,
+                                                       on_question=on_question, usage=get_usage_scope())
+        else:
+            quiz_data = quiz_ai.generate_quiz(get_http_client(), api_key, passage, question_types,
+                                              on_question=on_question, usage=get_usage_scope())
+        for qtype, reason in quiz_data.pop("failed_types", {}).items():
+            st.warning(f"⚠️ '{qtype}' 문제를 생성하지 못했습니다: {reason}")
+        return quiz_data
     except requests.exceptions.HTTPError as e:
-        error_detail = e.response.json() if hasattr(e.response, 'json') else str(e)
-        st.error(f"❌ OpenAI API 오류: {error_detail}")
+        st.error(f"❌ OpenAI API 오류: {openai_error_detail(e)}")
+        return None
+    except quiz_ai.QuizAIError as e:
+        st.error(f"❌ {str(e)}")
         return None
     except Exception as e:
         st.error(f"❌ 퀴즈 생성 오류: {str(e)}")
@@ -544,51 +521,634 @@ def generate_quiz_with_openai(api_key: str, passage: str, question_types: list):
 # ============================================================================
 # STREAMLIT 세션 상태 초기화
 # ============================================================================
-if "firebase_initialized" not in st.session_state:
-    st.session_state.firebase_initialized = False
+SESSION_DEFAULTS = {
+    "main_mode": None,                  # None, "student", "teacher"
+    "teacher_logged_in": False,
+    "teacher_email": "",
+    "teacher_login_error": "",
+    "openai_api_key": None,
+    "selected_textbook": None,
+    "selected_chapter": None,
+    "selected_passage_difficulty": None,
+    "current_passage": None,
+    "step1_completed": False,
+    "selected_question_types": [],
+    "student_name": "",
+    "student_class_code": "",
+    "quiz_result": None,                # 제출 후 채점 결과 (학생 답, 정답 여부, 정답 번호)
+}
+for key, value in SESSION_DEFAULTS.items():
+    if key not in st.session_state:
+        st.session_state[key] = value
 
-if "openai_api_key" not in st.session_state:
-    st.session_state.openai_api_key = None
+@perf.timed("ui.entry")
+def show_entry_buttons():
+    st.title("교과서 기반 영어 퀴즈 생성기")
+    st.write("역할을 선택하세요:")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("학생 입장", on_click=lambda: st.session_state.update({"main_mode": "student"}), use_container_width=True)
+    with col2:
+        st.button("교사 입장", on_click=lambda: st.session_state.update({"main_mode": "teacher"}), use_container_width=True)
 
-if "mode" not in st.session_state:
-    st.session_state.mode = "선생님 모드"
+@perf.timed("ui.teacher_login")
+def show_teacher_login():
+    st.title("교사 로그인")
+    email = st.text_input("이메일", value=st.session_state.teacher_email, key="teacher_email_input")
+    password = st.text_input("비밀번호", type="password", key="teacher_pw_input")
+    login_btn = st.button("로그인", use_container_width=True)
+    if login_btn:
+        result = firebase_email_login(email, password)
+        if "idToken" in result:
+            st.session_state.teacher_logged_in = True
+            st.session_state.teacher_email = email
+            st.session_state.teacher_login_error = ""
+        else:
+            st.session_state.teacher_login_error = "로그인 실패: 이메일 또는 비밀번호를 확인하세요."
+    if st.session_state.teacher_login_error:
+        st.error(st.session_state.teacher_login_error)
+    st.button("← 뒤로", on_click=lambda: st.session_state.update({"main_mode": None, "teacher_login_error": ""}), use_container_width=True)
 
-if "selected_textbook" not in st.session_state:
-    st.session_state.selected_textbook = None
+def show_results_browser(key_prefix: str, quiz_ids: list):
+    """학생 결과 목록 (필터 + 이전/다음 페이지, 보이는 페이지만 조회)"""
+    import pandas as pd
+    import results_query
 
-if "selected_chapter" not in st.session_state:
-    st.session_state.selected_chapter = None
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        quiz_id = st.selectbox("퀴즈", ["전체"] + quiz_ids, key=f"{key_prefix}_quiz")
+        student_name = st.text_input("학생 이름 (정확히 일치)", key=f"{key_prefix}_student").strip()
+    with col2:
+        band = st.selectbox("정답률 구간 (%)", ["전체"] + list(results_query.SCORE_BANDS), key=f"{key_prefix}_band")
+        date_range = st.date_input("제출 기간", value=(), key=f"{key_prefix}_dates")
+    with col3:
+        page_size = st.selectbox("페이지 크기", [20, 50, 100], index=1, key=f"{key_prefix}_page_size")
 
-if "selected_passage_difficulty" not in st.session_state:
-    st.session_state.selected_passage_difficulty = None
+    start = end = None
+    if len(date_range) >= 1:
+        start = datetime.combine(date_range[0], datetime.min.time())
+        end = datetime.combine(date_range[-1], datetime.min.time()) + timedelta(days=1)
+    filters = results_query.ResultFilters(
+        quiz_id=None if quiz_id == "전체" else quiz_id,
+        student_name=student_name or None,
+        score_band=None if band == "전체" else band,
+        start=start,
+        end=end,
+    )
 
-if "current_passage" not in st.session_state:
-    st.session_state.current_passage = None
+    # 필터가 바뀌면 첫 페이지로 (커서 스택: 지금까지 지나온 페이지들의 시작 커서)
+    cursors_key = f"{key_prefix}_cursors"
+    if st.session_state.get(f"{key_prefix}_filters") != (filters, page_size):
+        st.session_state[f"{key_prefix}_filters"] = (filters, page_size)
+        st.session_state[cursors_key] = []
+    cursors = st.session_state[cursors_key]
 
-if "step1_completed" not in st.session_state:
-    st.session_state.step1_completed = False
+    try:
+        rows, next_cursor = fetch_results_page(filters, cursors[-1] if cursors else None, page_size)
+        total = count_results(filters)
+    except Exception as e:
+        st.error(f"❌ 결과 조회 오류: {str(e)}")
+        return
 
-if "selected_question_types" not in st.session_state:
-    st.session_state.selected_question_types = []
+    if not rows:
+        st.info("ℹ️ 조건에 맞는 결과가 없습니다")
+        return
 
-if "quiz_generated" not in st.session_state:
-    st.session_state.quiz_generated = None
+    page_number = len(cursors) + 1
+    st.caption(f"총 {total}건 · {page_number} / {max(-(-total // page_size), 1)} 페이지")
+    with perf.span("pandas.results_table"):
+        table = pd.DataFrame([{
+            "학생 이름": row.get("student_name", "알 수 없음"),
+            "퀴즈 ID": row.get("quiz_id", ""),
+            "점수": row.get("score", 0),
+            "전체 문제": row.get("total_questions", 0),
+            "정답률": f"{(row.get('score', 0) / max(row.get('total_questions', 1), 1) * 100):.1f}%",
+            "제출 시간": row.get("timestamp", ""),
+        } for row in rows])
+    st.dataframe(table, use_container_width=True, hide_index=True)
 
-if "student_name" not in st.session_state:
-    st.session_state.student_name = ""
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        st.button("◀ 이전", key=f"{key_prefix}_prev", disabled=not cursors, use_container_width=True,
+                  on_click=lambda: cursors.pop())
+    with col_next:
+        st.button("다음 ▶", key=f"{key_prefix}_next", disabled=next_cursor is None, use_container_width=True,
+                  on_click=lambda: cursors.append(next_cursor))
 
-if "quiz_answers" not in st.session_state:
-    st.session_state.quiz_answers = {}
+def show_mastery_profile(document, key):
+    """숙련도 문서 1개를 유형별 표 + 최근 정답률 차트로 표시"""
+    import mastery
+    import pandas as pd
+    rows = mastery.profile(document)
+    if not rows:
+        st.info("아직 유형별 기록이 없습니다.")
+        return
+    percent = lambda v: None if v is None else round(v * 100, 1)
+    table = pd.DataFrame([{
+        "문제 유형": row["type"],
+        "누적 문항": row["questions"],
+        "누적 정답률(%)": percent(row["accuracy"]),
+        f"최근 {mastery.ROLLING_WEEKS}주 문항": row["recent_questions"],
+        f"최근 {mastery.ROLLING_WEEKS}주 정답률(%)": percent(row["recent_accuracy"]),
+        "마지막 풀이": row["last_seen"].strftime("%Y-%m-%d") if row["last_seen"] else "",
+    } for row in rows])
+    st.dataframe(table, use_container_width=True, hide_index=True, key=key)
+    weakest = rows[0]
+    if weakest["recent_accuracy"] is not None or weakest["accuracy"] is not None:
+        accuracy = weakest["recent_accuracy"] if weakest["recent_accuracy"] is not None else weakest["accuracy"]
+        st.caption(f"가장 약한 유형: **{weakest['type']}** ({accuracy * 100:.0f}%)")
 
-# ============================================================================
-# OPENAI 초기화
-# ============================================================================
-if not st.session_state.openai_api_key:
-    st.session_state.openai_api_key = get_openai_api_key()
+def quiz_labels(quizzes: list) -> dict:
+    """퀴즈 선택 상자용 {quiz_id: "교과서 / 단원 / 난이도 (생성 시각)"}"""
+    return {
+        quiz["id"]: f"{quiz.get('textbook_name', '')} / {quiz.get('chapter', '')} / {quiz.get('difficulty', '')}"
+                    f" ({quiz['created_at'].strftime('%m-%d %H:%M') if quiz.get('created_at') else ''})"
+        for quiz in quizzes
+    }
 
-# =====================
+@fragment
+@perf.timed("ui.assignment_manager")
+def show_assignment_manager():
+    """학급 코드별 퀴즈 배정 / 기간 설정 / 해제"""
+    import assignments
+    with st.expander("📌 학급별 퀴즈 배정", expanded=False):
+        class_code = st.text_input("학급 코드 (예: 2-3)", key="teacher_assign_class")
+        try:
+            quizzes = fetch_recent_quizzes()
+        except Exception as e:
+            st.error(f"❌ 퀴즈 목록 조회 오류: {str(e)}")
+            return
+        if not quizzes:
+            st.info("저장된 퀴즈가 없습니다. 먼저 퀴즈를 생성해 저장하세요.")
+            return
+        labels = quiz_labels(quizzes)
+        quiz_id = st.selectbox("배정할 퀴즈", list(labels), format_func=labels.get, key="teacher_assign_quiz")
+        col_open, col_close = st.columns(2)
+        with col_open:
+            open_date = st.date_input("시작일", value=datetime.now().date(), key="teacher_assign_open_date")
+            open_time = st.time_input("시작 시각", value=datetime.now().time().replace(second=0, microsecond=0),
+                                      key="teacher_assign_open_time")
+        with col_close:
+            no_deadline = st.checkbox("마감 없음", value=False, key="teacher_assign_no_deadline")
+            close_date = st.date_input("마감일", value=datetime.now().date() + timedelta(days=7),
+                                       key="teacher_assign_close_date", disabled=no_deadline)
+            close_time = st.time_input("마감 시각", value=datetime.strptime("23:59", "%H:%M").time(),
+                                       key="teacher_assign_close_time", disabled=no_deadline)
+        if st.button("📌 배정하기", key="teacher_assign_btn", disabled=not class_code.strip()):
+            opens_at = datetime.combine(open_date, open_time)
+            closes_at = None if no_deadline else datetime.combine(close_date, close_time)
+            code = assign_quiz_to_class(class_code, quiz_id, opens_at, closes_at)
+            if code:
+                st.success(f"✅ {code} 학급에 배정했습니다")
+        if not class_code.strip():
+            return
+        try:
+            current = assignments.assigned_quizzes(get_assignment_cache().get(class_code), include_closed=True)
+        except Exception as e:
+            st.error(f"❌ 배정 조회 오류: {str(e)}")
+            return
+        st.caption(f"현재 배정 ({len(current)}개)")
+        for entry in current:
+            quiz = entry.get("quiz", {})
+            closes = entry["closes_at"].strftime("%m-%d %H:%M") if entry["closes_at"] else "마감 없음"
+            opens = entry["opens_at"].strftime("%m-%d %H:%M") if entry["opens_at"] else ""
+            col_text, col_btn = st.columns([5, 1])
+            with col_text:
+                st.write(f"{'🟢' if entry['open'] else '⚪'} {quiz.get('textbook_name', '')} / {quiz.get('chapter', '')}"
+                         f" / {quiz.get('difficulty', '')} · {opens} ~ {closes}")
+            with col_btn:
+                st.button("해제", key=f"teacher_unassign_{entry['quiz_id']}", on_click=unassign_quiz_from_class,
+                          args=(class_code, entry["quiz_id"]), use_container_width=True)
+
+@fragment
+@perf.timed("ui.quiz_builder")
+def show_quiz_builder():
+    """지문 선택 → 변환 → 문제 생성 → 저장 (이 구역의 위젯은 이 구역만 다시 실행)"""
+    st.subheader("1. 지문 난이도 결정 및 퀴즈 생성")
+    store = get_textbook_store()
+    show_passage_search()
+    col0, col1, col2 = st.columns(3)
+    with col0:
+        selected_publisher = st.selectbox(
+            "🏢 출판사",
+            ["전체"] + store.publishers(),
+            key="teacher_publisher_select"
+        )
+    with col1:
+        textbook_list = store.textbooks(None if selected_publisher == "전체" else selected_publisher)
+        selected_textbook = st.selectbox(
+            "📖 교과서 선택",
+            textbook_list,
+            key="teacher_textbook_select"
+        )
+        st.session_state.selected_textbook = selected_textbook
+    with col2:
+        if st.session_state.selected_textbook:
+            chapter_list = store.chapters(st.session_state.selected_textbook)
+            selected_chapter = st.selectbox(
+                "📄 단원 선택",
+                chapter_list,
+                key="teacher_chapter_select"
+            )
+            st.session_state.selected_chapter = selected_chapter
+    if st.session_state.selected_textbook and st.session_state.selected_chapter:
+        original_passage = store.passage(st.session_state.selected_textbook, st.session_state.selected_chapter)
+        st.info("📖 **원본 지문** (읽기 전용)")
+        st.text_area(
+            "원본 지문",
+            value=original_passage,
+            height=150,
+            disabled=True,
+            label_visibility="collapsed",
+            key="teacher_original_passage_view"
+        )
+        original_level = store.level(st.session_state.selected_textbook, st.session_state.selected_chapter)
+        st.caption(f"📏 원본 난이도: {readability.format_level(original_level)}")
+        show_similar_passages(st.session_state.selected_textbook, st.session_state.selected_chapter)
+        selected_passage_difficulty = st.selectbox(
+            "📚 지문 난이도 선택 (Lexile 기준으로 조정됨)",
+            DIFFICULTY_OPTIONS,
+            key="teacher_passage_difficulty_select",
+            help=difficulty_help_text()
+        )
+        st.session_state.selected_passage_difficulty = selected_passage_difficulty
+        st.write("")
+        col_convert, col_regenerate = st.columns([1, 3])
+        with col_regenerate:
+            regenerate = st.checkbox(
+                "🔁 저장된 변환 결과 무시하고 새로 생성",
+                key="teacher_regenerate_passage",
+                help="같은 지문/난이도의 이전 변환 결과가 캐시에 있어도 AI를 다시 호출합니다"
+            )
+        with col_convert:
+            convert_clicked = st.button("🔄 지문 변환하기", use_container_width=True, type="primary", key="teacher_convert_passage_btn")
+        if convert_clicked:
+            # 토큰이 도착하는 대로 변환 중인 지문을 미리 보여줌
+            passage_stream_area = st.empty()
+            with st.spinner("🤖 AI가 지문을 변환 중입니다..."):
+                try:
+                    api_key = st.session_state.openai_api_key
+                    rewritten_passage = rewrite_passage_with_openai(
+                        api_key=api_key,
+                        original_passage=original_passage,
+                        difficulty=st.session_state.selected_passage_difficulty,
+                        regenerate=regenerate,
+                        on_text=passage_stream_area.markdown
+                    )
+                    passage_stream_area.empty()
+                    if rewritten_passage:
+                        st.session_state.current_passage = rewritten_passage
+                        st.session_state.teacher_edited_passage = rewritten_passage
+                        st.session_state.step1_completed = True
+                        st.success("✅ 지문 변환 완료!")
+                except Exception as e:
+                    st.error(f"❌ 오류 발생: {str(e)}")
+        if st.session_state.step1_completed and st.session_state.current_passage:
+            st.divider()
+            st.info("✏️ **변환된 지문** (필요시 편집 가능)")
+            edited_passage = st.text_area(
+                "변환된 지문",
+                value=st.session_state.current_passage,
+                height=200,
+                label_visibility="collapsed",
+                key="teacher_edited_passage"
+            )
+            show_passage_level(edited_passage, st.session_state.selected_passage_difficulty)
+            if edited_passage != st.session_state.current_passage:
+                st.session_state.current_passage = edited_passage
+        if st.session_state.step1_completed and st.session_state.current_passage:
+            st.divider()
+            st.subheader("📋 Step 2: 문제 생성")
+            st.write("**문제에 포함할 문제 유형을 선택하세요:**")
+            st.caption("📌 질문 유형 설명")
+            cols = st.columns(len(QUESTION_TYPES_INFO))
+            for i, (qtype, description) in enumerate(QUESTION_TYPES_INFO.items()):
+                with cols[i % len(cols)]:
+                    st.caption(f"**{qtype}**\n{description}")
+            selected_types = st.multiselect(
+                "문제 유형 선택",
+                list(QUESTION_TYPES_INFO.keys()),
+                default=list(QUESTION_TYPES_INFO.keys())[:3],
+                key="teacher_question_types_select",
+                label_visibility="collapsed"
+            )
+            st.session_state.selected_question_types = selected_types if selected_types else list(QUESTION_TYPES_INFO.keys())[:3]
+            st.write("")
+            col_generate, col_parallel = st.columns([1, 3])
+            with col_parallel:
+                parallel_generation = st.checkbox(
+                    "⚡ 문제 유형별 병렬 생성",
+                    value=True,
+                    key="teacher_parallel_generation",
+                    help="유형마다 따로 요청해 동시에 생성합니다. 실패한 유형만 다시 요청합니다."
+                )
+            with col_generate:
+                generate_clicked = st.button("🤖 문제 생성하기", use_container_width=True, type="primary", key="teacher_generate_quiz_btn")
+            if generate_clicked:
+                if not st.session_state.selected_question_types:
+                    st.error("❌ 최소 1개 이상의 문제 유형을 선택해주세요")
+                else:
+                    # 문제가 하나 완성될 때마다 바로 표시
+                    question_stream_area = st.container()
+                    with st.spinner("🤖 AI가 문제를 생성 중입니다..."):
+                        try:
+                            api_key = st.session_state.openai_api_key
+                            quiz_data = generate_quiz_with_openai(
+                                api_key=api_key,
+                                passage=st.session_state.current_passage,
+                                question_types=st.session_state.selected_question_types,
+                                on_question=lambda n, q: question_stream_area.write(f"**문제 {n}:** {q.get('question_text', '')}"),
+                                parallel=parallel_generation
+                            )
+                            st.session_state.generated_quiz = quiz_data
+                            st.success("✅ 문제 생성 완료!")
+                        except Exception as e:
+                            st.error(f"❌ 오류 발생: {str(e)}")
+            if "generated_quiz" in st.session_state and st.session_state.generated_quiz:
+                st.divider()
+                st.info("✅ **생성된 문제 미리보기**")
+                quiz_data = st.session_state.generated_quiz
+                for i, question in enumerate(quiz_data.get("questions", []), 1):
+                    st.write(f"**문제 {i}:** {question.get('question_text', '')}")
+                    if "options" in question:
+                        for j, option in enumerate(question['options'], 1):
+                            st.write(f"  {chr(64+j)}. {option}")
+                    if "explanation" in question:
+                        st.caption(f"💡 해설: {question['explanation']}")
+                    st.write("")
+                col_save, col_discard = st.columns(2)
+                with col_save:
+                    if st.button("💾 저장하기", use_container_width=True, type="primary", key="teacher_save_quiz_btn"):
+                        try:
+                            save_quiz_to_firestore(
+                                textbook_name=st.session_state.selected_textbook,
+                                chapter=st.session_state.selected_chapter,
+                                difficulty=st.session_state.selected_passage_difficulty,
+                                question_types=st.session_state.selected_question_types,
+                                original_passage=get_textbook_store().passage(st.session_state.selected_textbook, st.session_state.selected_chapter),
+                                rewritten_passage=st.session_state.current_passage,
+                                questions=quiz_data.get("questions", [])
+                            )
+                            st.success("✅ 퀴즈가 성공적으로 저장되었습니다!")
+                            st.session_state.step1_completed = False
+                            st.session_state.current_passage = ""
+                            st.session_state.generated_quiz = None
+                        except Exception as e:
+                            st.error(f"❌ 저장 오류: {str(e)}")
+                with col_discard:
+                    if st.button("🗑️ 초기화", use_container_width=True, key="teacher_reset_quiz_btn"):
+                        st.session_state.step1_completed = False
+                        st.session_state.current_passage = ""
+                        st.session_state.generated_quiz = None
+                        st.rerun()
+
+@fragment
+@perf.timed("ui.batch_generation")
+def show_batch_generation():
+    """교과서 전체 퀴즈 일괄 생성"""
+    with st.expander("📦 전체 퀴즈 일괄 생성"):
+        st.caption("모든 교과서/단원 × 난이도 × 문제 유형 조합의 퀴즈를 한 번에 생성합니다. 이미 생성된 조합은 건너뜁니다.")
+        batch_jobs = batch_generate.plan_jobs()
+        batch_progress = batch_generate.BatchProgress()
+        remaining = sum(1 for job in batch_jobs if not batch_progress.is_done(job.key))
+        st.write(f"전체 {len(batch_jobs)}개 중 남은 작업: **{remaining}개**")
+        batch_workers = st.slider("동시 작업 수", 1, 8, 4, key="teacher_batch_workers")
+        if st.button("🚀 일괄 생성 시작", key="teacher_batch_generate_btn", disabled=remaining == 0):
+            progress_bar = st.progress(0.0)
+            def on_batch_progress(completed, total, job, error):
+                progress_bar.progress(completed / total, text=f"{completed}/{total} {job.key}")
+            summary = batch_generate.run_batch(
+                get_db(), get_http_client(), get_rewrite_cache(),
+                st.session_state.openai_api_key, batch_jobs, batch_progress,
+                workers=batch_workers, on_progress=on_batch_progress, usage=get_usage_scope()
+            )
+            st.success(f"✅ 저장 {summary['saved']}개 / 건너뜀 {summary['skipped']}개")
+            for key, error in summary["failed"]:
+                st.error(f"❌ {key}: {error}")
+
+@fragment
+@perf.timed("ui.results_dashboard")
+def show_results_dashboard():
+    """퀴즈별 집계 / 개별 제출 목록 / 통계 재계산"""
+    st.subheader("2. 학생 결과 대시보드")
+    all_stats = get_all_quiz_stats()
+    import pandas as pd
+    import quiz_stats
+    if all_stats:
+        summary_rows = []
+        for stats in all_stats:
+            summary = quiz_stats.summarize(stats)
+            summary_rows.append({
+                "퀴즈 ID": stats.get("quiz_id", ""),
+                "제출 수": summary["count"],
+                "평균 점수": round(summary["mean"], 2),
+                "표준편차": round(summary["std"], 2),
+                "최고 점수": summary["max"],
+                "최저 점수": summary["min"],
+                "문제 수": stats.get("total_questions", 0),
+            })
+        st.dataframe(pd.DataFrame(summary_rows), use_container_width=True)
+        stats_by_quiz = {stats.get("quiz_id", ""): stats for stats in all_stats}
+        selected_quiz_id = st.selectbox("📌 퀴즈 선택", list(stats_by_quiz.keys()), key="teacher_stats_quiz_select")
+        selected_stats = stats_by_quiz[selected_quiz_id]
+        col_hist, col_items = st.columns(2)
+        with col_hist:
+            st.caption("점수 분포")
+            histogram = {int(k): v for k, v in selected_stats.get("histogram", {}).items()}
+            st.bar_chart(pd.Series(histogram).sort_index())
+        with col_items:
+            st.caption("문항별 정답률")
+            count = max(selected_stats.get("count", 0), 1)
+            question_correct = {int(k) + 1: v / count for k, v in selected_stats.get("question_correct", {}).items()}
+            if question_correct:
+                st.bar_chart(pd.Series(question_correct).sort_index())
+        show_item_analysis(selected_quiz_id, selected_stats)
+    else:
+        st.info("아직 제출된 결과가 없습니다.")
+    if st.checkbox("개별 제출 목록 보기", key="teacher_show_raw_results"):
+        show_results_browser("teacher_results", list(stats_by_quiz) if all_stats else [])
+    if st.button("🔁 통계 재계산", key="teacher_rebuild_stats_btn"):
+        import mastery
+        import results_query
+        # (설명, 함수) 순서대로 실행하고, 실패하면 어디까지 끝났는지 알려 줌
+        steps = [
+            ("퀴즈 통계", quiz_stats.rebuild_quiz_stats),
+            ("점수 구간 보완", results_query.backfill_score_bands),
+            ("숙련도 문서", mastery.rebuild_mastery),
+            ("학생용/정답 문서 보완", datastore.backfill_quiz_projections),
+        ]
+        done = []
+        try:
+            with st.spinner("결과로부터 통계를 다시 계산하는 중..."):
+                for label, step in steps:
+                    done.append(f"{label} {step(get_db())}건")
+            st.success(f"✅ 통계를 다시 계산했습니다 ({', '.join(done)})")
+        except Exception as e:
+            finished = ", ".join(done) if done else "없음"
+            st.error(f"❌ 통계 재계산 오류 ({steps[len(done)][0]} 단계): {str(e)} — 완료된 단계: {finished}")
+        if done:
+            clear_results_cache()
+
+def show_item_analysis(quiz_id: str, stats: dict):
+    """문항별 난이도 / 변별도 / 선택지 비율과 KR-20 (집계 문서만으로 계산)"""
+    import pandas as pd
+    import item_analysis
+    with st.expander("🔬 문항 분석", expanded=False):
+        try:
+            quiz = fetch_teacher_quiz(quiz_id) or {}
+        except Exception as e:
+            st.error(f"❌ 퀴즈 조회 오류: {str(e)}")
+            quiz = {}
+        questions = quiz.get("questions", [])
+        with perf.span("item_analysis.analyze"):
+            analysis = item_analysis.analyze(stats, [q.get("correct_answer") for q in questions] or None)
+        if analysis is None:
+            st.info("문항 분석 자료가 없습니다. \"🔁 통계 재계산\"을 누르면 기존 제출로 만들어집니다.")
+            return
+        col1, col2 = st.columns(2)
+        col1.metric("분석한 제출 수", analysis.count)
+        col2.metric("KR-20 신뢰도", f"{analysis.kr20:.2f}" if analysis.kr20 is not None else "-",
+                    help="0.7 이상이면 문항들이 같은 능력을 일관되게 측정한다고 봅니다 (문항이 적으면 낮게 나옵니다)")
+        if analysis.count < stats.get("count", 0):
+            st.caption(f"전체 제출 {stats['count']}건 중 문항 분석 자료가 쌓인 뒤의 {analysis.count}건만 분석했습니다. "
+                       "\"🔁 통계 재계산\"을 누르면 이전 제출까지 반영됩니다.")
+        if analysis.count < item_analysis.MIN_RESPONSES:
+            st.caption(f"제출이 {item_analysis.MIN_RESPONSES}건 미만이라 경고는 표시하지 않습니다.")
+        table = []
+        for item in analysis.items:
+            question = questions[item.index] if item.index < len(questions) else {}
+            row = {
+                "문제": item.index + 1,
+                "유형": question.get("type", ""),
+                "정답": chr(65 + question["correct_answer"]) if isinstance(question.get("correct_answer"), int) else "",
+                "정답률": round(item.difficulty, 2),
+                "변별도": round(item.discrimination, 2) if item.discrimination is not None else None,
+            }
+            for option, rate in enumerate(item.option_rates):
+                row[f"{chr(65 + option)} 선택"] = f"{rate:.0%}"
+            row["확인 필요"] = " / ".join(item.warnings)
+            table.append(row)
+        st.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
+        st.caption("변별도: 이 문항을 맞힌 학생이 나머지 문항도 잘 맞히는 정도 (-1~1, 0.2 미만이면 낮음). "
+                   "변별도가 음수이면 정답이 잘못되었을 수 있으니 \"✏️ 정답 수정 / 재채점\"에서 확인하세요.")
+
+@fragment
+@perf.timed("ui.answer_key_editor")
+def show_answer_key_editor():
+    """퀴즈 정답 수정 → 모든 제출 재채점"""
+    with st.expander("✏️ 정답 수정 / 재채점", expanded=False):
+        try:
+            quizzes = fetch_recent_quizzes()
+        except Exception as e:
+            st.error(f"❌ 퀴즈 목록 조회 오류: {str(e)}")
+            return
+        if not quizzes:
+            st.info("저장된 퀴즈가 없습니다.")
+            return
+        labels = quiz_labels(quizzes)
+        quiz_id = st.selectbox("퀴즈", list(labels), format_func=labels.get, key="teacher_regrade_quiz")
+        try:
+            quiz = fetch_teacher_quiz(quiz_id)
+        except Exception as e:
+            st.error(f"❌ 퀴즈 조회 오류: {str(e)}")
+            return
+        if not quiz:
+            st.error("❌ 퀴즈를 찾을 수 없습니다")
+            return
+        answers = []
+        for i, question in enumerate(quiz.get("questions", [])):
+            options = question.get("options", [])
+            current = question.get("correct_answer", 0)
+            answers.append(st.radio(
+                f"문제 {i+1}. {question.get('question_text', '')}",
+                list(range(len(options))),
+                index=current if 0 <= current < len(options) else 0,
+                format_func=lambda x, options=options: f"{chr(65+x)}. {options[x]}",
+                key=f"teacher_regrade_{quiz_id}_{i}",
+            ))
+        changed = [i + 1 for i, (question, answer) in enumerate(zip(quiz.get("questions", []), answers))
+                   if question.get("correct_answer") != answer]
+        # 바뀐 문항이 없어도 현재 정답으로 다시 채점할 수 있음 (중간에 실패한 재채점 이어 하기)
+        st.caption(f"바뀐 문항: {', '.join(map(str, changed))}" if changed
+                   else "정답이 바뀐 문항이 없습니다. 누르면 현재 정답으로 다시 채점합니다.")
+        if st.button("💾 정답 저장 후 재채점", key="teacher_regrade_btn"):
+            with st.spinner("모든 제출을 다시 채점하는 중..."):
+                report = regrade_with_answer_key(quiz_id, answers)
+            if report:
+                st.success(f"✅ 제출 {report.submissions}건 중 {report.changed}건의 점수를 고쳤습니다 "
+                           f"(평균 {report.mean_before:.2f} → {report.mean_after:.2f}점, "
+                           f"batch {report.batches}개, {report.seconds:.1f}초)")
+                if report.regraded < report.submissions:
+                    st.caption(f"학생 답이 저장되지 않은 옛 제출 {report.submissions - report.regraded}건은 그대로 두었습니다.")
+
+@fragment
+@perf.timed("ui.mastery_dashboard")
+def show_mastery_dashboard():
+    """학급 / 학생별 문제 유형 숙련도 (문서 1개씩 조회)"""
+    st.markdown("#### 🎯 문제 유형별 숙련도")
+    try:
+        class_code = st.text_input("학급 코드 (선택)", key="teacher_mastery_class").strip()
+        if class_code:
+            st.caption(f"학급 {class_code} 전체")
+            show_mastery_profile(fetch_mastery(None, class_code), key="teacher_class_mastery")
+        students = fetch_mastery_students(class_code)
+        if students:
+            student_names = [row["student_name"] for row in students]
+            selected_student = st.selectbox("학생 선택", student_names, key="teacher_mastery_student")
+            show_mastery_profile(fetch_mastery(selected_student, class_code), key="teacher_student_mastery")
+        else:
+            st.info("아직 유형별 기록이 있는 학생이 없습니다.")
+    except Exception as e:
+        st.error(f"❌ 숙련도 조회 오류: {str(e)}")
+
+@fragment
+@perf.timed("ui.usage_dashboard")
+def show_usage_dashboard():
+    """OpenAI 사용액 / 교사별 / 기능별 요약"""
+    st.subheader("3. OpenAI API 사용량")
+    import pandas as pd
+    tracker = get_usage_tracker()
+    email = st.session_state.teacher_email or "anonymous"
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("내 오늘 사용액", f"${tracker.spent_today(email):.4f}",
+                  help=f"교사 1명당 하루 예산 ${tracker.user_daily_budget:.2f}")
+    with col2:
+        st.metric("전체 오늘 사용액", f"${tracker.spent_today():.4f}",
+                  help=f"앱 전체 하루 예산 ${tracker.daily_budget:.2f}")
+    with col3:
+        st.metric("예산 사용률", f"{tracker.spend_ratio(email) * 100:.0f}%")
+    usage_days = st.selectbox("기간", [1, 7, 30], format_func=lambda d: "오늘" if d == 1 else f"최근 {d}일",
+                              key="teacher_usage_days")
+    user_rows = tracker.user_summary(usage_days)
+    if user_rows:
+        st.caption("교사별")
+        st.dataframe(pd.DataFrame(user_rows), use_container_width=True, hide_index=True)
+        st.caption("기능별 (지연 시간 p50 / p95)")
+        st.dataframe(pd.DataFrame(tracker.function_summary(usage_days)), use_container_width=True, hide_index=True)
+    else:
+        st.info("아직 기록된 OpenAI 호출이 없습니다.")
+
+@perf.timed("ui.teacher_dashboard")
+def show_teacher_dashboard():
+    st.header(f"👨‍🏫 교사 대시보드 ({st.session_state.teacher_email})")
+    st.button("로그아웃", on_click=lambda: st.session_state.update({"main_mode": None, "teacher_logged_in": False, "teacher_email": ""}), use_container_width=True)
+    tab1, tab2, tab3 = st.tabs(["📝 지문/퀴즈 생성", "📊 학생 결과 대시보드", "💰 API 사용량"])
+    with tab1:
+        show_quiz_builder()
+        st.divider()
+        show_assignment_manager()
+        show_batch_generation()
+    with tab2:
+        show_results_dashboard()
+        show_answer_key_editor()
+        st.divider()
+        show_mastery_dashboard()
+    with tab3:
+        show_usage_dashboard()
 
 # 학생 모드 함수
+@perf.timed("ui.student_mode")
 def run_student_mode():
     st.title("📚 교과서 기반 영어 퀴즈 생성기")
     st.write("한국 고등학교 교과서를 기반으로 AI가 생성한 맞춤형 영어 퀴즈")
@@ -603,216 +1163,213 @@ def run_student_mode():
     if not student_name.strip():
         st.warning("⚠️ 계속하려면 이름을 입력해주세요")
         return
-    # 최신 퀴즈 로드
+    class_code = st.text_input(
+        "학급 코드",
+        value=st.session_state.student_class_code,
+        placeholder="선생님이 알려 준 학급 코드를 입력하세요"
+    )
+    st.session_state.student_class_code = class_code
+    if not class_code.strip():
+        st.warning("⚠️ 계속하려면 학급 코드를 입력해주세요")
+        return
+    import assignments
+    try:
+        class_code = assignments.normalize_class_code(class_code)
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        return
+    # 우리 반에 배정된 퀴즈 로드
     st.subheader("📖 퀴즈 풀기")
-    if st.button("📥 최신 퀴즈 불러오기", use_container_width=True, type="primary"):
+    if st.button("📥 우리 반 퀴즈 불러오기", use_container_width=True, type="primary"):
         with st.spinner("퀴즈 로드 중..."):
-            quiz = get_latest_quiz()
-            if quiz:
-                st.session_state.current_quiz = quiz
+            class_quizzes = get_class_quizzes(class_code)
+            st.session_state.class_quizzes = class_quizzes or []
+            if class_quizzes:
+                st.session_state.current_quiz = class_quizzes[0]["quiz"]
+                st.session_state.student_picked_quiz_id = class_quizzes[0]["quiz_id"]
+                st.session_state.adaptive_decision = None
+                st.session_state.quiz_submitted = False
                 st.success("✅ 퀴즈가 성공적으로 로드되었습니다!")
-            else:
-                st.error("❌ 사용 가능한 퀴즈가 없습니다")
+            elif class_quizzes is not None:
+                st.error("❌ 지금 풀 수 있는 퀴즈가 없습니다")
+    class_quizzes = st.session_state.get("class_quizzes") or []
+    picked = 0
+    if len(class_quizzes) > 1:
+        titles = [f"{e['quiz'].get('textbook_name', '')} - {e['quiz'].get('chapter', '')} ({e['quiz'].get('difficulty', '')})"
+                  for e in class_quizzes]
+        picked = st.selectbox("배정된 퀴즈", range(len(class_quizzes)), format_func=lambda i: titles[i],
+                              key="student_quiz_pick")
+        if st.session_state.get("student_picked_quiz_id") != class_quizzes[picked]["quiz_id"]:
+            st.session_state.student_picked_quiz_id = class_quizzes[picked]["quiz_id"]
+            st.session_state.current_quiz = class_quizzes[picked]["quiz"]
+            st.session_state.adaptive_decision = None
+            st.session_state.quiz_submitted = False
+    if class_quizzes and st.checkbox("🎯 맞춤 난이도 모드", key="student_adaptive",
+                                     help="최근 점수에 따라 같은 단원의 더 쉬운/어려운 퀴즈를 바로 받습니다"):
+        base_quiz = class_quizzes[picked]["quiz"]
+        # 다시 그릴 때마다 풀을 채우지 않도록 세션마다 단원당 한 번만 미리 채움
+        warm_key = (base_quiz.get("textbook_name"), base_quiz.get("chapter"))
+        warmed = st.session_state.setdefault("adaptive_warmed", set())
+        if warm_key not in warmed:
+            warmed.add(warm_key)
+            get_quiz_pool().warm(*warm_key, question_types=base_quiz.get("question_types"))
+        if st.button("🎯 내 수준에 맞는 다음 퀴즈 받기", key="student_adaptive_btn", use_container_width=True):
+            quiz, decision = pick_adaptive_quiz(student_name, class_code, base_quiz)
+            st.session_state.current_quiz = quiz
+            st.session_state.adaptive_decision = decision
+            st.session_state.quiz_submitted = False
+        decision = st.session_state.get("adaptive_decision")
+        if decision is not None:
+            st.caption(f"🎯 {decision.reason} · 이번 난이도: {decision.difficulty}")
     # 퀴즈 표시 및 풀기
-    if "current_quiz" in st.session_state and st.session_state.current_quiz:
-        quiz = st.session_state.current_quiz
-        st.info(f"📚 **{quiz.get('textbook_name', '알 수 없음')}** - {quiz.get('chapter', '알 수 없음')} | 난이도: {quiz.get('difficulty', '')}")
-        st.subheader("지문")
-        st.write(quiz.get("rewritten_passage", ""))
-        st.subheader("문제")
-        with st.form(key="quiz_form"):
-            answers = {}
-            questions = quiz.get("questions", [])
-            for i, q in enumerate(questions):
-                st.write(f"**문제 {i+1}** [{q.get('type', '')}]")
-                st.write(q.get('question_text', ''))
-                options = q.get("options", [])
-                selected = st.radio(
-                    label=f"문제 {i+1}의 답변을 선택하세요",
-                    options=list(range(len(options))),
-                    format_func=lambda x: f"{chr(64+x)}. {options[x]}",
-                    key=f"q_{i}",
-                    label_visibility="collapsed"
-                )
-                answers[i] = selected
-                st.divider()
-            submit_button = st.form_submit_button(
-                "✅ 퀴즈 제출",
-                use_container_width=True,
-                type="primary"
+    if st.session_state.get("current_quiz"):
+        show_student_quiz(student_name, class_code)
+
+@fragment
+@perf.timed("ui.student_quiz")
+def show_student_quiz(student_name: str, class_code: str):
+    """지문 / 문제 / 제출 결과 (제출·결과 확인은 이 구역만 다시 실행)"""
+    quiz = st.session_state.current_quiz
+    st.info(f"📚 **{quiz.get('textbook_name', '알 수 없음')}** - {quiz.get('chapter', '알 수 없음')} | 난이도: {quiz.get('difficulty', '')}")
+    st.subheader("지문")
+    st.write(quiz.get("rewritten_passage", ""))
+    st.subheader("문제")
+    with st.form(key="quiz_form"):
+        answers = {}
+        questions = quiz.get("questions", [])
+        for i, q in enumerate(questions):
+            st.write(f"**문제 {i+1}** [{q.get('type', '')}]")
+            st.write(q.get('question_text', ''))
+            options = q.get("options", [])
+            selected = st.radio(
+                label=f"문제 {i+1}의 답변을 선택하세요",
+                options=list(range(len(options))),
+                format_func=lambda x: f"{chr(64+x)}. {options[x]}",
+                key=f"q_{i}",
+                label_visibility="collapsed"
             )
-            if submit_button:
-                score = 0
-                for i, q in enumerate(questions):
-                    if answers.get(i) == q.get("correct_answer"):
-                        score += 1
+            answers[i] = selected
+            st.divider()
+        submit_button = st.form_submit_button(
+            "✅ 퀴즈 제출",
+            use_container_width=True,
+            type="primary"
+        )
+        if submit_button:
+            answer_list = [answers.get(i) for i in range(len(questions))]
+            correct_flags, answer_key = grade_quiz(quiz.get("id", "unknown"), answer_list)
+            if correct_flags is not None:
+                score = sum(correct_flags)
                 result_id = save_result_to_firestore(
                     quiz.get("id", "unknown"),
                     student_name,
                     score,
-                    len(questions)
+                    len(questions),
+                    correct_flags=correct_flags,
+                    class_code=class_code,
+                    answers=answer_list,
+                    question_types=[q.get("type") for q in questions],
+                    difficulty=quiz.get("difficulty")
                 )
                 if result_id:
-                    st.session_state.quiz_answers = answers
+                    st.session_state.setdefault("adaptive_history", []).append({
+                        "id": result_id, "quiz_id": quiz.get("id", "unknown"), "difficulty": quiz.get("difficulty"),
+                        "student_name": student_name, "class_code": class_code,
+                        "score": score, "total_questions": len(questions),
+                    })
+                    st.session_state.quiz_result = {
+                        "answers": answer_list,
+                        "correct_flags": correct_flags,
+                        "correct_answers": answer_key.get("answers", []),
+                    }
                     st.session_state.quiz_submitted = True
-        if st.session_state.get("quiz_submitted", False):
-            st.subheader("📊 당신의 결과")
-            questions = quiz.get("questions", [])
-            answers = st.session_state.quiz_answers
-            score = sum(1 for i, q in enumerate(questions) if answers.get(i) == q.get("correct_answer"))
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("점수", f"{score}/{len(questions)}")
-            with col2:
-                st.metric("정답 수", score)
-            with col3:
-                percentage = (score / len(questions) * 100) if len(questions) > 0 else 0
-                st.metric("정답률", f"{percentage:.1f}%")
-            st.write("")
-            for i, q in enumerate(questions):
-                user_answer = answers.get(i)
-                correct = user_answer == q.get("correct_answer")
-                st.write(f"**문제 {i+1}**: {'🟢 정답' if correct else '🔴 오답'}")
-                st.write(f"내 답: {chr(65+user_answer)} | 정답: {chr(65+q.get('correct_answer',0))}")
-                st.write("")
-
-# =====================
-# 학생 모드 진입 분기
-# =====================
-if st.session_state.main_mode == "student":
-    run_student_mode()
-
-    # (중복 학생 모드 코드 완전 삭제)
-st.write("**문제에 포함할 문제 유형을 선택하세요:**")
-st.caption("📌 질문 유형 설명")
-cols = st.columns(len(QUESTION_TYPES_INFO))
-for i, (qtype, description) in enumerate(QUESTION_TYPES_INFO.items()):
-    with cols[i % len(cols)]:
-        st.caption(f"**{qtype}**\n{description}")
-
-selected_types = st.multiselect(
-    "문제 유형 선택",
-    list(QUESTION_TYPES_INFO.keys()),
-    default=list(QUESTION_TYPES_INFO.keys())[:3],
-    key="question_types_select",
-    label_visibility="collapsed"
-)
-st.session_state.selected_question_types = selected_types if selected_types else list(QUESTION_TYPES_INFO.keys())[:3]
-
-# Step 2: 문제 생성 버튼
-st.write("")
-col_generate, col_space2 = st.columns([1, 3])
-with col_generate:
-    if st.button("🤖 문제 생성하기", use_container_width=True, type="primary", key="generate_quiz_btn"):
-        if not st.session_state.selected_question_types:
-            st.error("❌ 최소 1개 이상의 문제 유형을 선택해주세요")
-        else:
-            with st.spinner("🤖 AI가 문제를 생성 중입니다..."):
-                try:
-                    api_key = st.session_state.openai_api_key
-                    quiz_data = generate_quiz_with_openai(
-                        api_key=api_key,
-                        passage=st.session_state.current_passage,
-                        question_types=st.session_state.selected_question_types
-                    )
-                    st.session_state.generated_quiz = quiz_data
-                    st.success("✅ 문제 생성 완료!")
-                except Exception as e:
-                    st.error(f"❌ 오류 발생: {str(e)}")
-
-# 생성된 문제 표시 및 저장
-if "generated_quiz" in st.session_state and st.session_state.generated_quiz:
-    st.divider()
-    st.info("✅ **생성된 문제 미리보기**")
-    quiz_data = st.session_state.generated_quiz
-    for i, question in enumerate(quiz_data.get("questions", []), 1):
-        st.write(f"**문제 {i}:** {question.get('question_text', '')}")
-        if "options" in question:
-            for j, option in enumerate(question['options'], 1):
-                st.write(f"  {chr(64+j)}. {option}")
-        if "explanation" in question:
-            st.caption(f"💡 해설: {question['explanation']}")
+    result = st.session_state.get("quiz_result")
+    if st.session_state.get("quiz_submitted", False) and result:
+        st.subheader("📊 당신의 결과")
+        correct_flags = result["correct_flags"]
+        score = sum(correct_flags)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("점수", f"{score}/{len(correct_flags)}")
+        with col2:
+            st.metric("정답 수", score)
+        with col3:
+            percentage = (score / len(correct_flags) * 100) if len(correct_flags) > 0 else 0
+            st.metric("정답률", f"{percentage:.1f}%")
         st.write("")
-    # 저장 버튼
-    col_save, col_discard = st.columns(2)
-    with col_save:
-        if st.button("💾 저장하기", use_container_width=True, type="primary", key="save_quiz_btn"):
+        for i, (user_answer, correct_answer, correct) in enumerate(
+                zip(result["answers"], result["correct_answers"], correct_flags)):
+            st.write(f"**문제 {i+1}**: {'🟢 정답' if correct else '🔴 오답'}")
+            st.write(f"내 답: {chr(65+user_answer) if user_answer is not None else '-'} | 정답: {chr(65+(correct_answer or 0))}")
+            st.write("")
+        with st.expander("📈 내 문제 유형별 정답률"):
+            st.caption("방금 제출한 결과는 몇 초 뒤에 반영됩니다.")
             try:
-                save_quiz_to_firestore(
-                    textbook_name=st.session_state.selected_textbook,
-                    chapter=st.session_state.selected_chapter,
-                    difficulty=st.session_state.selected_passage_difficulty,
-                    question_types=st.session_state.selected_question_types,
-                    original_passage=TEXTBOOKS[st.session_state.selected_textbook][st.session_state.selected_chapter]["original_passage"],
-                    rewritten_passage=st.session_state.current_passage,
-                    questions=quiz_data.get("questions", [])
-                )
-                st.success("✅ 퀴즈가 성공적으로 저장되었습니다!")
-                # 저장 후 상태 초기화
-                st.session_state.step1_completed = False
-                st.session_state.current_passage = ""
-                st.session_state.generated_quiz = None
+                show_mastery_profile(fetch_mastery(student_name, class_code),
+                                     key="student_mastery")
             except Exception as e:
-                st.error(f"❌ 저장 오류: {str(e)}")
-    with col_discard:
-        if st.button("🗑️ 초기화", use_container_width=True, key="reset_quiz_btn"):
-            st.session_state.step1_completed = False
-            st.session_state.current_passage = ""
-            st.session_state.generated_quiz = None
-            st.rerun()
-
-    
-    # 학생 결과 대시보드
-    st.divider()
-    st.subheader("📊 학생 결과 대시보드")
-    
-    if st.button("📈 결과 불러오기", use_container_width=True):
-        results = get_all_results()
-        
-        if results:
-            st.write(f"총 제출 현황: **{len(results)}명**")
-            
-            # 요약 테이블
-            summary_data = []
-            for result in results:
-                summary_data.append({
-                    "학생 이름": result.get("student_name", "알 수 없음"),
-                    "점수": result.get("score", 0),
-                    "전체 문제": result.get("total_questions", 0),
-                    "정답률": f"{(result.get('score', 0) / max(result.get('total_questions', 1), 1) * 100):.1f}%",
-                    "제출 시간": result.get("timestamp", "")
-                })
-            
-            st.dataframe(summary_data, use_container_width=True)
-            
-            # 통계
-            col1, col2, col3, col4 = st.columns(4)
-            
-            total_submissions = len(results)
-            avg_score = sum(r.get("score", 0) for r in results) / max(total_submissions, 1)
-            max_score = max((r.get("score", 0) for r in results), default=0)
-            min_score = min((r.get("score", 0) for r in results), default=0)
-            
-            with col1:
-                st.metric("총 제출 수", total_submissions)
-            with col2:
-                st.metric("평균 점수", f"{avg_score:.1f}")
-            with col3:
-                st.metric("최고 점수", max_score)
-            with col4:
-                st.metric("최저 점수", min_score)
-        else:
-            st.info("ℹ️ 아직 제출된 결과가 없습니다")
-
-    # (함수 밖 학생 모드 코드 완전 삭제)
+                st.error(f"❌ 숙련도 조회 오류: {str(e)}")
 
 # ============================================================================
-# 푸터
+# 시작 시간 보고 (?timing=1 이면 사이드바에 표시, 콜드 스타트는 로그에 기록)
+# 구간별 p50/p95 (?perf=1 이면 로그인한 교사에게만 사이드바에 표시)
 # ============================================================================
-st.divider()
-st.markdown(
-    "<p style='text-align: center; color: gray; font-size: 0.8em;'>"
-    "교과서 기반 영어 퀴즈 생성기 | Streamlit & Firebase 기반"
-    "</p>",
-    unsafe_allow_html=True
-)
+def finish_run():
+    startup_timer.mark("화면 렌더링")
+    perf.recorder.end_run()
+    cold_start = startup_timing.is_first_run()
+    lines = startup_timer.report_lines(cold_start=cold_start)
+    if cold_start:
+        print("[startup] " + " | ".join(lines), flush=True)
+    if st.query_params.get("timing") == "1":
+        with st.sidebar.expander("⏱️ 시작 시간", expanded=True):
+            for line in lines:
+                st.caption(line)
+    if st.query_params.get("perf") == "1" and st.session_state.teacher_logged_in:
+        show_perf_panel()
+
+def show_perf_panel():
+    """이 프로세스의 구간별 호출 수 / p50 / p95 (최근 perf.RECENT_SAMPLES개 기준)"""
+    import pandas as pd
+
+    with st.sidebar.expander("🩺 구간별 소요 시간", expanded=True):
+        if not perf.recorder.enabled:
+            st.caption("PERF_ENABLED=1 (secrets 또는 환경 변수)로 실행하면 기록됩니다.")
+            return
+        rows = perf.recorder.summary()
+        if not rows:
+            st.caption("아직 기록된 구간이 없습니다.")
+            return
+        st.dataframe(pd.DataFrame([{
+            "구간": row["span"],
+            "호출 수": row["count"],
+            "p50 (ms)": row["p50_ms"],
+            "p95 (ms)": row["p95_ms"],
+            "최대 (ms)": row["max_ms"],
+        } for row in rows]), use_container_width=True, hide_index=True)
+        st.caption(f"실행 기록: {perf.recorder.log_path} · Prometheus: {perf.recorder.prom_path}")
+        st.button("기록 초기화", key="perf_reset", on_click=perf.recorder.reset)
+
+def show_footer():
+    st.divider()
+    st.markdown(
+        "<p style='text-align: center; color: gray; font-size: 0.8em;'>"
+        "교과서 기반 영어 퀴즈 생성기 | Streamlit & Firebase 기반"
+        "</p>",
+        unsafe_allow_html=True
+    )
+
+# 진입 분기
+if st.session_state.main_mode is None:
+    show_entry_buttons()
+elif st.session_state.main_mode == "teacher":
+    if not st.session_state.teacher_logged_in:
+        show_teacher_login()
+    else:
+        if not st.session_state.openai_api_key:
+            st.session_state.openai_api_key = get_openai_api_key()
+        show_teacher_dashboard()
+elif st.session_state.main_mode == "student":
+    run_student_mode()
+    show_footer()
+finish_run()
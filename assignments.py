@@ -0,0 +1,111 @@
+# ============================================================================
+# 학급별 퀴즈 배정 (assignments 컬렉션)
+# ============================================================================
+# 문서 id는 학급 코드이고, 배정된 퀴즈는 quiz_id를 키로 한 맵에 들어간다.
+# 각 항목에 학생용 퀴즈 projection(정답 없는 지문, 문제)을 함께 담아 두므로
+# 학생은 자기 학급 문서 1개를 id로 읽기만 하면 된다 (정렬 쿼리 없음).
+# 배정/해제는 맵의 해당 키만 merge로 바꾸므로 두 교사가 동시에 배정해도
+# 서로 덮어쓰지 않는다.
+#
+# 문서 구조:
+#     {class_code, updated_at,
+#      quizzes: {quiz_id: {opens_at, closes_at, assigned_by, assigned_at, quiz: {...}}}}
+import re
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from datastore import POOL_QUIZ_SOURCE, student_projection
+
+ASSIGNMENTS_COLLECTION = "assignments"
+CLASS_CODE_RE = re.compile(r"^[0-9A-Za-z가-힣_-]{1,40}$")
+
+
+def normalize_class_code(class_code: str) -> str:
+    """학급 코드 정규화 (공백 제거, 대문자). 허용되지 않는 문자가 있으면 ValueError"""
+    code = "".join((class_code or "").split()).upper()
+    if not CLASS_CODE_RE.match(code):
+        raise ValueError("학급 코드는 1-40자의 한글/영문/숫자/-/_ 만 사용할 수 있습니다.")
+    return code
+
+
+def _naive(value):
+    """Firestore에서 읽은 tz 포함 시각을 앱이 저장한 naive 시각 기준으로 맞춤"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def assignment_ref(db, class_code: str):
+    return db.collection(ASSIGNMENTS_COLLECTION).document(normalize_class_code(class_code))
+
+
+def assign_quiz(db, class_code: str, quiz: dict, opens_at: datetime = None, closes_at: datetime = None,
+                assigned_by: str = "") -> str:
+    """학급에 퀴즈 배정 (같은 퀴즈를 다시 배정하면 기간만 바뀜). 정규화된 학급 코드 반환"""
+    if opens_at and closes_at and closes_at <= opens_at:
+        raise ValueError("마감 시각은 시작 시각보다 뒤여야 합니다.")
+    ref = assignment_ref(db, class_code)
+    ref.set({
+        "class_code": ref.id,
+        "updated_at": datetime.now(),
+        "quizzes": {
+            quiz["id"]: {
+                "opens_at": opens_at or datetime.now(),
+                "closes_at": closes_at,
+                "assigned_by": assigned_by,
+                "assigned_at": datetime.now(),
+                "quiz": student_projection(quiz),
+            }
+        },
+    }, merge=True)
+    return ref.id
+
+
+def unassign_quiz(db, class_code: str, quiz_id: str):
+    """학급 배정에서 퀴즈 1개 제거 (다른 배정은 그대로)"""
+    ref = assignment_ref(db, class_code)
+    ref.update({
+        FieldPath("quizzes", quiz_id).to_api_repr(): firestore.DELETE_FIELD,
+        "updated_at": datetime.now(),
+    })
+
+
+def get_assignment(db, class_code: str):
+    """학급 배정 문서 1개 (id로 읽기, 없으면 None)"""
+    snapshot = assignment_ref(db, class_code).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def assigned_quizzes(assignment: dict, now: datetime = None, include_closed: bool = False) -> list:
+    """배정 문서 → 지금 열려 있는 배정 목록 (최근에 열린 순)"""
+    now = now or datetime.now()
+    rows = []
+    for quiz_id, entry in (assignment or {}).get("quizzes", {}).items():
+        opens_at, closes_at = _naive(entry.get("opens_at")), _naive(entry.get("closes_at"))
+        is_open = (opens_at is None or opens_at <= now) and (closes_at is None or now < closes_at)
+        if is_open or include_closed:
+            # 분리 이전 배정 문서에는 정답이 들어 있으므로 학생에게 넘기기 전에 다시 projection
+            rows.append({**entry, "quiz": student_projection(entry.get("quiz", {})), "quiz_id": quiz_id,
+                         "opens_at": opens_at, "closes_at": closes_at, "open": is_open})
+    rows.sort(key=lambda row: row["opens_at"] or datetime.min, reverse=True)
+    return rows
+
+
+def recent_quizzes(db, limit: int = 20) -> list:
+    """배정할 퀴즈 선택용 최근 퀴즈 목록 (지문/문제 본문과 맞춤 난이도 풀 퀴즈는 제외)"""
+    # source 필드가 없는 예전 문서도 남아야 하므로 != 쿼리 대신 넉넉히 읽어 걸러냄
+    query = db.collection("quizzes").select(
+        ["id", "textbook_name", "chapter", "difficulty", "created_at", "source"]
+    ).order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit * 3)
+    quizzes = []
+    for doc in query.stream():
+        quiz = doc.to_dict()
+        if quiz.pop("source", None) == POOL_QUIZ_SOURCE:
+            continue
+        quizzes.append(quiz)
+        if len(quizzes) >= limit:
+            break
+    return quizzes
+
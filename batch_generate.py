@@ -0,0 +1,225 @@
+# ============================================================================
+# 퀴즈 일괄 생성 (교과서 × 단원 × 난이도 × 문제 유형 조합)
+# ============================================================================
+# 지문 변환 → 문제 생성을 스레드 풀에서 병렬로 돌리고, 완성된 퀴즈는
+# Firestore WriteBatch로 묶어서 저장한다. 완료된 작업은 진행 파일에 기록되어
+# 중단 후 다시 실행하면 남은 작업만 처리한다.
+#
+# 사용법:
+#     python batch_generate.py --workers 4 --rpm 60
+#     python batch_generate.py --mix "주제 추론,빈칸 추론" --difficulty "쉬움 (Easy)" --dry-run
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import datastore
+import quiz_ai
+from http_client import HttpClient
+from rewrite_cache import RewriteCache
+from textbook_store import default_store
+from textbooks import QUESTION_TYPES_INFO, DIFFICULTY_OPTIONS
+from usage_tracker import DEFAULT_DAILY_BUDGET_USD, UsageTracker
+
+DEFAULT_PROGRESS_PATH = os.path.join(".cache", "batch_progress.json")
+DEFAULT_QUESTION_MIXES = [
+    tuple(list(QUESTION_TYPES_INFO.keys())[:3]),
+    tuple(QUESTION_TYPES_INFO.keys()),
+]
+MAX_BATCH_WRITES = 500
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """퀴즈 1개 생성 작업"""
+    textbook: str
+    chapter: str
+    difficulty: str
+    question_types: tuple
+
+    @property
+    def key(self) -> str:
+        return "|".join((self.textbook, self.chapter, self.difficulty, ",".join(self.question_types)))
+
+
+def plan_jobs(store=None, difficulties=None, question_mixes=None, publisher: str = None) -> list:
+    """모든 교과서/단원(또는 한 출판사)에 대해 난이도 × 문제 유형 조합 작업 목록 생성 (색인만 사용)"""
+    store = default_store() if store is None else store
+    difficulties = DIFFICULTY_OPTIONS if difficulties is None else difficulties
+    question_mixes = DEFAULT_QUESTION_MIXES if question_mixes is None else question_mixes
+    return [
+        BatchJob(textbook, chapter, difficulty, tuple(mix))
+        for textbook in store.textbooks(publisher)
+        for chapter in store.chapters(textbook)
+        for difficulty in difficulties
+        for mix in question_mixes
+    ]
+
+
+class RateLimiter:
+    """분당 요청 수 제한 (요청 시작 간격을 60/rpm 초 이상으로 유지)"""
+
+    def __init__(self, requests_per_minute: float):
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class BatchProgress:
+    """완료된 작업 키 → quiz_id 기록 (JSON 파일, 원자적 저장)"""
+
+    def __init__(self, path: str = DEFAULT_PROGRESS_PATH):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f).get("done", {})
+
+    def is_done(self, key: str) -> bool:
+        return key in self.done
+
+    def mark_done(self, entries):
+        self.done.update(entries)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": self.done}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def run_job(job: BatchJob, client, cache, api_key: str, limiter: RateLimiter, usage=None) -> dict:
+    """지문 변환 → 문제 생성 후 저장할 퀴즈 문서 반환"""
+    original_passage = default_store().passage(job.textbook, job.chapter)
+    if job.difficulty != "보통 (Original)":
+        limiter.wait()
+    rewritten_passage = quiz_ai.rewrite_passage(client, cache, api_key, original_passage, job.difficulty, usage=usage)
+    limiter.wait()
+    quiz = quiz_ai.generate_quiz(client, api_key, rewritten_passage, list(job.question_types), usage=usage)
+    return datastore.quiz_document(
+        job.textbook, job.chapter, job.difficulty, list(job.question_types),
+        original_passage, rewritten_passage, quiz["questions"]
+    )
+
+
+def run_batch(db, client, cache, api_key: str, jobs: list, progress: BatchProgress,
+              workers: int = 4, requests_per_minute: float = 60, commit_size: int = 20,
+              on_progress=None, usage=None) -> dict:
+    """남은 작업을 병렬 실행하고 commit_size개씩 묶어 저장. 결과 요약 dict 반환
+
+    on_progress(완료 수, 전체 수, 작업, 오류)는 작업이 끝날 때마다 호출된다.
+    usage(UsageScope)가 주어지면 OpenAI 호출을 기록하고 일일 예산을 적용한다.
+    """
+    # 퀴즈 1개당 문서 3개(전체 / 학생용 / 정답)를 쓰므로 batch 한도를 그만큼 나눔
+    commit_size = max(1, min(commit_size, MAX_BATCH_WRITES // 3))
+    pending = [job for job in jobs if not progress.is_done(job.key)]
+    summary = {"total": len(jobs), "skipped": len(jobs) - len(pending), "saved": 0, "failed": []}
+    limiter = RateLimiter(requests_per_minute)
+    staged = {}
+    batch = db.batch()
+
+    def flush():
+        nonlocal batch
+        if not staged:
+            return
+        batch.commit()
+        progress.mark_done(staged)
+        summary["saved"] += len(staged)
+        staged.clear()
+        batch = db.batch()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, client, cache, api_key, limiter, usage): job for job in pending}
+        for completed, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            error = None
+            try:
+                quiz_data = future.result()
+            except Exception as e:
+                error = e
+                summary["failed"].append((job.key, str(e)))
+            else:
+                datastore.add_quiz_to_batch(batch, db, quiz_data)
+                staged[job.key] = quiz_data["id"]
+                if len(staged) >= commit_size:
+                    flush()
+            if on_progress:
+                on_progress(completed, len(pending), job, error)
+    flush()
+    return summary
+
+
+def load_local_secrets(path: str = os.path.join(".streamlit", "secrets.toml")) -> dict:
+    """CLI 실행 시 .streamlit/secrets.toml 읽기 (없으면 빈 dict)"""
+    if not os.path.exists(path):
+        return {}
+    import tomllib
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="교과서 전체 퀴즈 일괄 생성")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 작업 수")
+    parser.add_argument("--rpm", type=float, default=60, help="OpenAI 분당 최대 요청 수")
+    parser.add_argument("--commit-size", type=int, default=20, help="Firestore batch 하나에 묶을 퀴즈 수")
+    parser.add_argument("--progress", default=DEFAULT_PROGRESS_PATH, help="진행 상황 파일 경로")
+    parser.add_argument("--credentials", default=datastore.CREDENTIALS_PATH, help="Firebase 서비스 계정 파일")
+    parser.add_argument("--publisher", help="한 출판사 교과서만 생성")
+    parser.add_argument("--difficulty", action="append", choices=DIFFICULTY_OPTIONS, help="생성할 난이도 (반복 지정 가능)")
+    parser.add_argument("--mix", action="append", help="쉼표로 구분한 문제 유형 조합 (반복 지정 가능)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_DAILY_BUDGET_USD, help="오늘 OpenAI 사용 예산 (USD)")
+    parser.add_argument("--dry-run", action="store_true", help="작업 목록만 출력")
+    args = parser.parse_args(argv)
+
+    mixes = None
+    if args.mix:
+        mixes = [tuple(t.strip() for t in mix.split(",") if t.strip()) for mix in args.mix]
+        unknown = {t for mix in mixes for t in mix} - set(QUESTION_TYPES_INFO)
+        if unknown:
+            parser.error(f"알 수 없는 문제 유형: {', '.join(sorted(unknown))}")
+    if args.publisher and args.publisher not in default_store().publishers():
+        parser.error(f"알 수 없는 출판사: {args.publisher}")
+    jobs = plan_jobs(difficulties=args.difficulty, question_mixes=mixes, publisher=args.publisher)
+    progress = BatchProgress(args.progress)
+
+    if args.dry_run:
+        for job in jobs:
+            print(("✔ " if progress.is_done(job.key) else "  ") + job.key)
+        return 0
+
+    secrets = load_local_secrets()
+    api_key = secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ OPENAI_API_KEY가 설정되지 않았습니다", file=sys.stderr)
+        return 1
+    db = datastore.init_firebase_app(secrets or None, args.credentials)
+
+    def report(completed, total, job, error):
+        status = f"❌ {error}" if error else "✅"
+        print(f"[{completed}/{total}] {status} {job.key}", flush=True)
+
+    summary = run_batch(
+        db, HttpClient(), RewriteCache(), api_key, jobs, progress,
+        workers=args.workers, requests_per_minute=args.rpm,
+        commit_size=args.commit_size, on_progress=report,
+        usage=UsageTracker(daily_budget=args.budget, user_daily_budget=None).scope("batch-cli")
+    )
+    print(f"저장 {summary['saved']}개 / 건너뜀 {summary['skipped']}개 / 실패 {len(summary['failed'])}개")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
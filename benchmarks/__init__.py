@@ -0,0 +1 @@
+# 부하 테스트 / 벤치마크 도구 (python -m benchmarks.run)
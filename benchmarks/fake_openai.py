@@ -0,0 +1,128 @@
+# ============================================================================
+# 로컬 가짜 chat/completions 서버 (벤치마크용)
+# ============================================================================
+# OpenAI와 같은 SSE 스트림 형식으로 응답하며, 응답 지연과 오류(429/500) 비율을
+# 설정할 수 있다. 프롬프트 내용을 보고 지문 변환 / 퀴즈 생성 응답을 구분한다.
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_PASSAGE = (
+    "Dreams give young people direction. When we follow a dream, we learn new skills "
+    "and meet new people. Challenges will come, but a clear goal keeps us moving forward. "
+) * 4
+
+
+def fake_question(question_type: str, n: int) -> dict:
+    return {
+        "question_text": f"[{question_type}] 벤치마크용 문제 {n}",
+        "type": question_type,
+        "options": ["선택지 A", "선택지 B", "선택지 C", "선택지 D"],
+        "correct_answer": n % 4,
+    }
+
+
+def fake_completion(prompt: str) -> str:
+    """프롬프트에 맞는 가짜 응답 본문"""
+    if "재작성" in prompt:
+        return FAKE_PASSAGE
+    single = re.search(r"'([^']+)' 유형의 객관식 문제를 정확히 1개", prompt)
+    if single:
+        questions = [fake_question(single.group(1), 0)]
+    else:
+        count = int((re.search(r"정확히 (\d+)개", prompt) or [None, "3"])[1])
+        types_match = re.search(r"요청된 질문 유형: ([^\n]+)", prompt)
+        types = types_match.group(1).split(", ") if types_match else ["주제 추론"]
+        questions = [fake_question(types[i % len(types)], i) for i in range(count)]
+    return "```json\n" + json.dumps({"questions": questions}, ensure_ascii=False) + "\n```"
+
+
+class FakeOpenAIServer:
+    """백그라운드 스레드에서 동작하는 가짜 OpenAI 서버"""
+
+    def __init__(self, latency: float = 0.5, error_rate: float = 0.0, chunk_size: int = 16,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.handle_error = lambda request, client_address: None  # 클라이언트 연결 끊김은 무시
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if server._should_fail():
+                    status = 429 if server._random.random() < 0.5 else 500
+                    payload = json.dumps({"error": {"message": "fake failure"}}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    if status == 429:
+                        self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+                text = fake_completion(prompt)
+                chunks = [text[i:i + server.chunk_size] for i in range(0, len(text), server.chunk_size)]
+                delay = server.latency / max(len(chunks), 1)
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in chunks:
+                    time.sleep(delay)
+                    event = {"choices": [{"index": 0, "delta": {"content": chunk}}]}
+                    self._write_event(json.dumps(event, ensure_ascii=False))
+                self._write_event(json.dumps({"choices": [], "usage": usage}))
+                self._write_event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_event(self, data: str):
+                payload = f"data: {data}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(payload):X}\r\n".encode() + payload + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,70 @@
+# ============================================================================
+# Firestore 읽기/쓰기 횟수 집계 (벤치마크용)
+# ============================================================================
+# google-cloud-firestore의 조회/커밋 메서드를 감싸서 과금 기준과 비슷하게 센다.
+# - 읽기: 쿼리 결과 문서 수 (결과가 없어도 쿼리당 최소 1), 문서 get 1회당 1
+# - 쓰기: WriteBatch.commit에 포함된 write 수 (DocumentReference.set도 내부적으로 batch 사용)
+import threading
+from contextlib import contextmanager
+
+
+class FirestoreCounter:
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def add(self, reads: int = 0, writes: int = 0):
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return self.reads, self.writes
+
+
+@contextmanager
+def count_firestore_ops(counter: FirestoreCounter):
+    """with 블록 동안 Firestore 읽기/쓰기 횟수를 counter에 누적"""
+    from google.cloud.firestore_v1.batch import WriteBatch
+    from google.cloud.firestore_v1.client import Client
+    from google.cloud.firestore_v1.document import DocumentReference
+    from google.cloud.firestore_v1.query import Query
+
+    original_stream = Query.stream
+    original_get = DocumentReference.get
+    original_get_all = Client.get_all
+    original_commit = WriteBatch.commit
+
+    def stream(self, *args, **kwargs):
+        count = 0
+        for snapshot in original_stream(self, *args, **kwargs):
+            count += 1
+            yield snapshot
+        counter.add(reads=max(count, 1))
+
+    def get(self, *args, **kwargs):
+        counter.add(reads=1)
+        return original_get(self, *args, **kwargs)
+
+    def get_all(self, references, *args, **kwargs):
+        references = list(references)
+        counter.add(reads=len(references))
+        return original_get_all(self, references, *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        counter.add(writes=len(self._write_pbs))
+        return original_commit(self, *args, **kwargs)
+
+    Query.stream = stream
+    DocumentReference.get = get
+    Client.get_all = get_all
+    WriteBatch.commit = commit
+    try:
+        yield counter
+    finally:
+        Query.stream = original_stream
+        DocumentReference.get = original_get
+        Client.get_all = original_get_all
+        WriteBatch.commit = original_commit
@@ -0,0 +1,105 @@
+# ============================================================================
+# 벤치마크 실행기
+# ============================================================================
+# 사용법:
+#     python -m benchmarks.run                                   # 가능한 모든 시나리오
+#     python -m benchmarks.run --scenario openai_generate_quiz --latency 1.5 --error-rate 0.1
+#     FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.run --students 35
+#     python -m benchmarks.run --output bench.json --baseline benchmarks/baseline.json --max-regression 0.2
+#
+# Firestore 시나리오는 FIRESTORE_EMULATOR_HOST가 설정된 경우에만 실행된다
+# (firebase emulators:start --only firestore).
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.scenarios import SCENARIOS, BenchContext, seed_quiz
+
+
+def check_regressions(report: dict, baseline: dict, max_regression: float) -> list:
+    """p95 지연이 기준보다 max_regression 비율 이상 나빠진 시나리오 목록"""
+    regressions = []
+    for name, metrics in report.items():
+        base = baseline.get(name)
+        if not base or not base.get("p95_ms"):
+            continue
+        limit = base["p95_ms"] * (1 + max_regression)
+        if metrics["p95_ms"] > limit:
+            regressions.append(f"{name}: p95 {metrics['p95_ms']}ms > 허용치 {limit:.1f}ms (기준 {base['p95_ms']}ms)")
+    return regressions
+
+
+def print_table(report: dict):
+    header = f"{'scenario':32} {'calls':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'ops/s':>8} {'reads':>7} {'writes':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, m in report.items():
+        print(f"{name:32} {m['calls']:>6} {m['errors']:>4} {m['p50_ms']:>9} {m['p95_ms']:>9} "
+              f"{m['p99_ms']:>9} {m['throughput_per_s']:>8} {m['firestore_reads']:>7} {m['firestore_writes']:>7}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="교과서 퀴즈 앱 부하 테스트")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="실행할 시나리오 (반복 지정 가능)")
+    parser.add_argument("--students", type=int, default=35, help="동시에 접속하는 학생 수")
+    parser.add_argument("--concurrency", type=int, default=None, help="최대 동시 실행 수 (기본: 학생 수)")
+    parser.add_argument("--iterations", type=int, default=20, help="OpenAI/대시보드/AppTest 시나리오 반복 횟수")
+    parser.add_argument("--latency", type=float, default=0.5, help="가짜 OpenAI 응답 전체 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 OpenAI 오류 응답 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=None, help="오류 발생 난수 시드")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="허용하는 p95 악화 비율")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    import quiz_ai
+    from http_client import HttpClient
+
+    quiz_ai.OPENAI_CHAT_URL = server.base_url + "/chat/completions"
+
+    ctx = BenchContext(
+        students=args.students,
+        concurrency=args.concurrency or args.students,
+        iterations=args.iterations,
+        http_client=HttpClient(),
+    )
+    emulator = bool(os.getenv("FIRESTORE_EMULATOR_HOST"))
+    if emulator:
+        import datastore
+        ctx.db = datastore.init_firebase_app()
+        ctx.quiz_id = seed_quiz(ctx)
+
+    report = {}
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            needs_firestore, scenario = SCENARIOS[name]
+            if needs_firestore and not emulator:
+                print(f"⏭️  {name}: FIRESTORE_EMULATOR_HOST가 없어 건너뜀", file=sys.stderr)
+                continue
+            report[name] = scenario(ctx).to_dict()
+    finally:
+        server.stop()
+
+    print_table(report)
+    print(f"\n가짜 OpenAI 서버: 요청 {server.requests}회, 주입된 오류 {server.errors}회")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = check_regressions(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"❌ {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# ============================================================================
+# 벤치마크 시나리오
+# ============================================================================
+# 각 시나리오는 실제 앱 코드(datastore / quiz_cache / results_query / quiz_ai,
+# 그리고 Streamlit AppTest로 실행하는 app.py)를 그대로 호출한다.
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+from benchmarks.firestore_counter import FirestoreCounter, count_firestore_ops
+
+BENCH_CLASS_CODE = "BENCH-1"
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@dataclass
+class BenchContext:
+    """시나리오 공통 설정"""
+    students: int = 35
+    concurrency: int = 35
+    iterations: int = 20
+    db: object = None
+    http_client: object = None
+    api_key: str = "sk-bench"
+    quiz_id: str = None
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+    reads: int = 0
+    writes: int = 0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index]
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": len(self.latencies),
+            "errors": self.errors,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "throughput_per_s": round(self.throughput, 2),
+            "firestore_reads": self.reads,
+            "firestore_writes": self.writes,
+        }
+
+
+def measure(name: str, operation, calls: int, concurrency: int, count_firestore: bool = False) -> ScenarioResult:
+    """operation(i)를 calls번, 최대 concurrency개 동시에 실행하며 호출별 지연을 측정"""
+    result = ScenarioResult(name)
+    counter = FirestoreCounter()
+
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            operation(i)
+        except Exception:
+            return None
+        return time.perf_counter() - started
+
+    with count_firestore_ops(counter) if count_firestore else nullcontext():
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for latency in pool.map(timed, range(calls)):
+                if latency is None:
+                    result.errors += 1
+                else:
+                    result.latencies.append(latency)
+        result.wall_seconds = time.perf_counter() - started
+    result.reads, result.writes = counter.snapshot()
+    return result
+
+
+def seed_quiz(ctx: BenchContext) -> str:
+    """Firestore 시나리오에서 사용할 퀴즈 1개 저장 후 벤치마크 학급에 배정"""
+    import assignments
+    import datastore
+    from benchmarks.fake_openai import FAKE_PASSAGE, fake_question
+
+    quiz_data = datastore.quiz_document(
+        "벤치마크 교과서", "1단원", "보통 (Original)", ["주제 추론", "빈칸 추론"],
+        FAKE_PASSAGE, FAKE_PASSAGE, [fake_question("주제 추론", 0), fake_question("빈칸 추론", 1)]
+    )
+    quiz_id = datastore.save_quiz(ctx.db, quiz_data)
+    assignments.assign_quiz(ctx.db, BENCH_CLASS_CODE, quiz_data)
+    return quiz_id
+
+
+# ============================================================================
+# OpenAI (가짜 서버)
+# ============================================================================
+def openai_rewrite(ctx: BenchContext) -> ScenarioResult:
+    import quiz_ai
+    from benchmarks.fake_openai import FAKE_PASSAGE
+    from rewrite_cache import RewriteCache
+
+    cache = RewriteCache(os.path.join(tempfile.mkdtemp(), "rewrites.sqlite3"))
+    return measure(
+        "openai_rewrite",
+        lambda i: quiz_ai.rewrite_passage(ctx.http_client, cache, ctx.api_key, FAKE_PASSAGE, "쉬움 (Easy)", regenerate=True),
+        ctx.iterations, ctx.concurrency,
+    )
+
+
+def openai_generate_quiz(ctx: BenchContext) -> ScenarioResult:
+    import quiz_ai
+    from benchmarks.fake_openai import FAKE_PASSAGE
+    from textbooks import QUESTION_TYPES_INFO
+
+    types = list(QUESTION_TYPES_INFO)
+    return measure(
+        "openai_generate_quiz",
+        lambda i: quiz_ai.generate_quiz(ctx.http_client, ctx.api_key, FAKE_PASSAGE, types),
+        ctx.iterations, ctx.concurrency,
+    )
+
+
+def openai_generate_quiz_parallel(ctx: BenchContext) -> ScenarioResult:
+    import quiz_ai
+    from benchmarks.fake_openai import FAKE_PASSAGE
+    from textbooks import QUESTION_TYPES_INFO
+
+    types = list(QUESTION_TYPES_INFO)
+    return measure(
+        "openai_generate_quiz_parallel",
+        lambda i: quiz_ai.generate_quiz_parallel(ctx.http_client, ctx.api_key, FAKE_PASSAGE, types),
+        ctx.iterations, ctx.concurrency,
+    )
+
+
+# ============================================================================
+# Firestore (에뮬레이터)
+# ============================================================================
+def firestore_class_quiz(ctx: BenchContext) -> ScenarioResult:
+    """학급 전체가 동시에 자기 반 배정 문서를 직접 조회"""
+    import assignments
+
+    return measure("firestore_class_quiz", lambda i: assignments.assigned_quizzes(
+        assignments.get_assignment(ctx.db, BENCH_CLASS_CODE)), ctx.students, ctx.concurrency, count_firestore=True)
+
+
+def firestore_class_quiz_cached(ctx: BenchContext) -> ScenarioResult:
+    """학급 전체가 공용 캐시를 통해 자기 반 배정 퀴즈 조회"""
+    from quiz_cache import AssignmentCache
+
+    cache = AssignmentCache(ctx.db, listen=False)
+    return measure("firestore_class_quiz_cached", lambda i: cache.active_quizzes(BENCH_CLASS_CODE),
+                   ctx.students, ctx.concurrency, count_firestore=True)
+
+
+def firestore_submit_burst(ctx: BenchContext) -> ScenarioResult:
+    """종이 울린 직후 학급 전체가 동시에 제출"""
+    import datastore
+
+    def submit(i):
+        result_data = datastore.result_document(
+            ctx.quiz_id, f"student-{i}", i % 3, 2, correct_flags=[i % 2 == 0, i % 3 == 0]
+        )
+        datastore.save_result(ctx.db, result_data)
+
+    return measure("firestore_submit_burst", submit, ctx.students, ctx.concurrency, count_firestore=True)
+
+
+def firestore_submit_burst_buffered(ctx: BenchContext) -> ScenarioResult:
+    """같은 제출 폭주를 write-behind 큐(result_writer)로 처리 (마지막 flush까지 포함)"""
+    import datastore
+    from result_writer import ResultWriter
+
+    writer = ResultWriter(ctx.db, journal_path=os.path.join(tempfile.mkdtemp(), "pending.jsonl"))
+
+    def submit(i):
+        writer.submit(datastore.result_document(
+            ctx.quiz_id, f"student-{i}", i % 3, 2, correct_flags=[i % 2 == 0, i % 3 == 0]
+        ))
+
+    result = measure("firestore_submit_burst_buffered", submit, ctx.students, ctx.concurrency, count_firestore=True)
+    counter = FirestoreCounter()
+    with count_firestore_ops(counter):
+        writer.close()
+    reads, writes = counter.snapshot()
+    result.reads += reads
+    result.writes += writes
+    return result
+
+
+def firestore_dashboard(ctx: BenchContext) -> ScenarioResult:
+    """교사 대시보드 rerun 반복 (퀴즈 통계 + 결과 첫 페이지와 건수)"""
+    import quiz_stats
+    import results_query
+
+    filters = results_query.ResultFilters()
+
+    def rerun(i):
+        quiz_stats.get_all_quiz_stats(ctx.db)
+        results_query.fetch_page(ctx.db, filters, page_size=50)
+        results_query.count_results(ctx.db, filters)
+
+    return measure("firestore_dashboard", rerun, ctx.iterations, 1, count_firestore=True)
+
+
+# ============================================================================
+# Streamlit AppTest (app.py 전체 흐름)
+# ============================================================================
+def _app_test():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["FIREBASE_WEB_API_KEY"] = "bench"
+    at.secrets["OPENAI_API_KEY"] = "sk-bench"
+    return at
+
+
+def _click(at, label: str):
+    for button in at.button:
+        if button.label == label:
+            return button.click().run()
+    raise LookupError(f"버튼을 찾을 수 없습니다: {label}")
+
+
+def apptest_student_flow(ctx: BenchContext) -> ScenarioResult:
+    """학생 입장 → 이름/학급 코드 입력 → 우리 반 퀴즈 불러오기 → 제출"""
+    def flow(i):
+        at = _app_test()
+        at.run()
+        _click(at, "학생 입장")
+        at.text_input[0].input(f"student-{i}").run()
+        at.text_input[1].input(BENCH_CLASS_CODE).run()
+        _click(at, "📥 우리 반 퀴즈 불러오기")
+        _click(at, "✅ 퀴즈 제출")
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    return measure("apptest_student_flow", flow, ctx.iterations, min(ctx.concurrency, 4), count_firestore=True)
+
+
+def apptest_teacher_flow(ctx: BenchContext) -> ScenarioResult:
+    """로그인된 교사 대시보드 렌더링 → 지문 변환"""
+    def flow(i):
+        at = _app_test()
+        at.session_state["main_mode"] = "teacher"
+        at.session_state["teacher_logged_in"] = True
+        at.session_state["teacher_email"] = f"teacher-{i}@bench"
+        at.run()
+        at.checkbox(key="teacher_regenerate_passage").check().run()
+        at.button(key="teacher_convert_passage_btn").click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    return measure("apptest_teacher_flow", flow, ctx.iterations, 1, count_firestore=True)
+
+
+# 이름 → (Firestore 필요 여부, 시나리오 함수)
+SCENARIOS = {
+    "openai_rewrite": (False, openai_rewrite),
+    "openai_generate_quiz": (False, openai_generate_quiz),
+    "openai_generate_quiz_parallel": (False, openai_generate_quiz_parallel),
+    "firestore_class_quiz": (True, firestore_class_quiz),
+    "firestore_class_quiz_cached": (True, firestore_class_quiz_cached),
+    "firestore_submit_burst": (True, firestore_submit_burst),
+    "firestore_submit_burst_buffered": (True, firestore_submit_burst_buffered),
+    "firestore_dashboard": (True, firestore_dashboard),
+    "apptest_student_flow": (True, apptest_student_flow),
+    "apptest_teacher_flow": (True, apptest_teacher_flow),
+}
@@ -0,0 +1,228 @@
+# ============================================================================
+# Firestore 데이터 접근 계층
+# ============================================================================
+# app.py와 batch_generate.py가 같은 인증 방식과 문서 구조를 쓰도록 모아 둔다.
+# firebase_admin / google-cloud-firestore는 가져오는 데 시간이 걸리므로
+# 실제로 Firestore를 사용하는 함수 안에서만 import 한다 (진입 화면 속도 개선).
+import os
+from datetime import datetime
+from uuid import uuid4
+
+CREDENTIALS_PATH = "firebase-credentials_2.json"
+SERVICE_ACCOUNT_FIELDS = (
+    "type", "project_id", "private_key_id", "private_key", "client_email", "client_id",
+    "auth_uri", "token_uri", "auth_provider_x509_cert_url", "client_x509_cert_url",
+)
+
+
+def firebase_credentials(secrets=None, path: str = CREDENTIALS_PATH):
+    """로컬에서는 인증 파일, Streamlit Cloud에서는 secrets["firebase"]에서 인증 정보 생성"""
+    from firebase_admin import credentials
+
+    if os.path.exists(path):
+        return credentials.Certificate(path)
+    if secrets is None:
+        raise FileNotFoundError(f"Firebase 인증 파일을 찾을 수 없습니다: {path}")
+    firebase_config = {field: secrets["firebase"][field] for field in SERVICE_ACCOUNT_FIELDS}
+    return credentials.Certificate(firebase_config)
+
+
+def init_firebase_app(secrets=None, path: str = CREDENTIALS_PATH):
+    """Firebase 앱을 한 번만 초기화하고 Firestore 클라이언트 반환
+
+    FIRESTORE_EMULATOR_HOST가 설정되어 있으면 인증 정보 없이 로컬 에뮬레이터에 연결한다.
+    """
+    import firebase_admin
+    from firebase_admin import firestore
+
+    if not firebase_admin._apps:
+        if os.getenv("FIRESTORE_EMULATOR_HOST"):
+            project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "demo-english-reading")
+            firebase_admin.initialize_app(_emulator_credential(), {"projectId": project_id})
+        else:
+            firebase_admin.initialize_app(firebase_credentials(secrets, path))
+    return firestore.client()
+
+
+def _emulator_credential():
+    """에뮬레이터용 익명 인증 정보"""
+    from firebase_admin import credentials
+    from google.auth.credentials import AnonymousCredentials
+
+    class EmulatorCredential(credentials.Base):
+        def get_credential(self):
+            return AnonymousCredentials()
+
+    return EmulatorCredential()
+
+
+# ============================================================================
+# 퀴즈
+# ============================================================================
+# 퀴즈 1개는 문서 3개로 저장한다.
+#   - quizzes/{id}        : 교사용 전체 문서 (원본 지문, 정답, 해설 포함)
+#   - student_quizzes/{id}: 학생 화면용 projection (변환 지문 + 정답 없는 문제)
+#   - answer_keys/{id}    : 정답 번호와 해설 (채점할 때만 읽음)
+# 학생 세션에는 projection만 들어가므로 정답이 세션 상태에 남지 않는다.
+QUIZ_COLLECTION = "quizzes"
+STUDENT_QUIZ_COLLECTION = "student_quizzes"
+ANSWER_KEY_COLLECTION = "answer_keys"
+STUDENT_QUIZ_FIELDS = ("id", "textbook_name", "chapter", "difficulty", "question_types",
+                       "rewritten_passage", "questions", "created_at")
+STUDENT_QUESTION_FIELDS = ("type", "question_text", "options")
+# 맞춤 난이도 풀이 자동 생성한 퀴즈는 quizzes/{id}.source에 표시해 교사 목록에서 뺀다
+POOL_QUIZ_SOURCE = "adaptive_pool"
+
+
+def quiz_document(textbook_name: str, chapter: str, difficulty: str, question_types: list,
+                  original_passage: str, rewritten_passage: str, questions: list) -> dict:
+    """quizzes 컬렉션에 저장할 퀴즈 문서 생성 (id 포함)"""
+    return {
+        "id": str(uuid4()),
+        "textbook_name": textbook_name,
+        "chapter": chapter,
+        "difficulty": difficulty,
+        "question_types": question_types,
+        "original_passage": original_passage,
+        "rewritten_passage": rewritten_passage,
+        "questions": questions,
+        "created_at": datetime.now()
+    }
+
+
+def student_projection(quiz_data: dict) -> dict:
+    """학생 화면용 퀴즈 (정답 / 해설 / 원본 지문 제외)"""
+    projection = {field: quiz_data[field] for field in STUDENT_QUIZ_FIELDS if field in quiz_data}
+    projection["questions"] = [
+        {field: question[field] for field in STUDENT_QUESTION_FIELDS if field in question}
+        for question in quiz_data.get("questions", [])
+    ]
+    return projection
+
+
+def answer_key_document(quiz_data: dict) -> dict:
+    """채점용 정답 문서 (문항 순서대로 정답 번호와 해설)"""
+    questions = quiz_data.get("questions", [])
+    return {
+        "quiz_id": quiz_data["id"],
+        "answers": [question.get("correct_answer") for question in questions],
+        "explanations": [question.get("explanation", "") for question in questions],
+        "created_at": quiz_data.get("created_at") or datetime.now(),
+    }
+
+
+def add_quiz_to_batch(batch, db, quiz_data: dict):
+    """교사용 전체 문서, 학생용 projection, 정답 문서를 batch에 추가"""
+    quiz_id = quiz_data["id"]
+    batch.set(db.collection(QUIZ_COLLECTION).document(quiz_id), quiz_data)
+    batch.set(db.collection(STUDENT_QUIZ_COLLECTION).document(quiz_id), student_projection(quiz_data))
+    batch.set(db.collection(ANSWER_KEY_COLLECTION).document(quiz_id), answer_key_document(quiz_data))
+
+
+def save_quiz(db, quiz_data: dict) -> str:
+    """퀴즈 문서 3개(전체 / 학생용 / 정답)를 하나의 batch로 저장 후 id 반환"""
+    batch = db.batch()
+    add_quiz_to_batch(batch, db, quiz_data)
+    batch.commit()
+    return quiz_data["id"]
+
+
+def find_quizzes(db, textbook_name: str, chapter: str, difficulty: str, limit: int = 10) -> list:
+    """같은 교과서/단원/난이도로 이미 생성된 학생용 퀴즈 (등호 조건만 쓰므로 복합 색인 불필요)"""
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    query = (db.collection(STUDENT_QUIZ_COLLECTION)
+             .where(filter=FieldFilter("textbook_name", "==", textbook_name))
+             .where(filter=FieldFilter("chapter", "==", chapter))
+             .where(filter=FieldFilter("difficulty", "==", difficulty))
+             .limit(limit))
+    return [doc.to_dict() for doc in query.stream()]
+
+
+def get_quiz(db, quiz_id: str):
+    """교사용 퀴즈 문서 1개 (id로 읽기, 없으면 None)"""
+    snapshot = db.collection(QUIZ_COLLECTION).document(quiz_id).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def get_answer_key(db, quiz_id: str):
+    """채점용 정답 문서 (분리 이전에 저장된 퀴즈는 교사용 문서에서 만듦, 없으면 None)"""
+    snapshot = db.collection(ANSWER_KEY_COLLECTION).document(quiz_id).get()
+    if snapshot.exists:
+        return snapshot.to_dict()
+    quiz_data = get_quiz(db, quiz_id)
+    return answer_key_document(quiz_data) if quiz_data else None
+
+
+def grade(answer_key: dict, answers: list) -> list:
+    """학생 답(문항별 선택지 번호, 안 고른 문항은 None) → 문항별 정답 여부"""
+    correct = answer_key.get("answers", [])
+    return [i < len(answers) and answers[i] is not None and answers[i] == answer
+            for i, answer in enumerate(correct)]
+
+
+def backfill_quiz_projections(db) -> int:
+    """분리 이전에 저장된 퀴즈의 학생용 / 정답 문서 작성 (작성한 퀴즈 수 반환)"""
+    existing = {doc.id for doc in db.collection(STUDENT_QUIZ_COLLECTION).select([]).stream()}
+    batch, written = db.batch(), 0
+    for doc in db.collection(QUIZ_COLLECTION).stream():
+        if doc.id in existing:
+            continue
+        quiz_data = doc.to_dict()
+        quiz_data.setdefault("id", doc.id)
+        batch.set(db.collection(STUDENT_QUIZ_COLLECTION).document(doc.id), student_projection(quiz_data))
+        batch.set(db.collection(ANSWER_KEY_COLLECTION).document(doc.id), answer_key_document(quiz_data))
+        written += 1
+        if written % 200 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return written
+
+
+# ============================================================================
+# 학생 결과
+# ============================================================================
+def result_document(quiz_id: str, student_name: str, score: int, total_questions: int,
+                    correct_flags: list = None, class_code: str = None,
+                    answers: list = None, question_types: list = None, difficulty: str = None) -> dict:
+    """results 컬렉션에 저장할 결과 문서 생성 (id, 대시보드 필터용 score_band 포함)
+
+    answers(문항별 선택지 번호)와 question_types(문항별 유형)는 숙련도 집계에,
+    difficulty(퀴즈 난이도)는 맞춤 난이도 결정에 쓰인다.
+    """
+    from results_query import score_band
+
+    result_data = {
+        "id": str(uuid4()),
+        "quiz_id": quiz_id,
+        "student_name": student_name,
+        "score": score,
+        "total_questions": total_questions,
+        "score_band": score_band(score, total_questions),
+        "timestamp": datetime.now()
+    }
+    if correct_flags is not None:
+        result_data["correct_flags"] = correct_flags
+    if answers is not None:
+        result_data["answers"] = answers
+    if question_types is not None:
+        result_data["question_types"] = question_types
+    if difficulty:
+        result_data["difficulty"] = difficulty
+    if class_code:
+        result_data["class_code"] = class_code
+    return result_data
+
+
+def save_result(db, result_data: dict) -> str:
+    """결과 문서와 퀴즈 집계 / 숙련도 문서를 하나의 batch로 저장 후 id 반환"""
+    import mastery
+    import quiz_stats
+
+    batch = db.batch()
+    batch.set(db.collection("results").document(result_data["id"]), result_data)
+    quiz_stats.add_results_to_batch(batch, db, [result_data])
+    mastery.add_results_to_batch(batch, db, [result_data])
+    batch.commit()
+    return result_data["id"]
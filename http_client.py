@@ -0,0 +1,152 @@
+# ============================================================================
+# 공용 HTTP 클라이언트 (OpenAI / Firebase Auth)
+# ============================================================================
+# requests.Session 하나로 연결을 재사용(keep-alive)하고, 429/5xx 및 일시적인
+# 네트워크 오류는 지터가 들어간 지수 백오프로 재시도한다 (Retry-After 우선).
+# 엔드포인트마다 타임아웃과 동시 요청 수 제한을 따로 둔다.
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """엔드포인트별 호출 정책"""
+    connect_timeout: float
+    read_timeout: float
+    max_concurrency: int
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 20.0
+
+
+ENDPOINT_POLICIES = {
+    "openai_chat": EndpointPolicy(connect_timeout=5, read_timeout=60, max_concurrency=8),
+    "firebase_auth": EndpointPolicy(connect_timeout=5, read_timeout=15, max_concurrency=16, max_retries=2),
+}
+
+
+def retry_after_seconds(response):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환 (없으면 None)"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """연결 풀링 + 재시도 + 엔드포인트별 동시성 제한을 갖춘 클라이언트 (스레드 안전)"""
+
+    def __init__(self, policies: dict = None, pool_size: int = 32):
+        self.policies = dict(ENDPOINT_POLICIES if policies is None else policies)
+        self.session = requests.Session()
+        # 재시도는 아래에서 직접 처리하므로 어댑터 재시도는 끔
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._semaphores = {
+            name: threading.BoundedSemaphore(policy.max_concurrency)
+            for name, policy in self.policies.items()
+        }
+
+    def post(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """정책에 따라 POST 요청 (재시도 후에도 실패하면 마지막 응답 또는 예외를 그대로 전달)"""
+        return self.request(endpoint, "POST", url, **kwargs)
+
+    def request(self, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+        response, release = self._send(endpoint, method, url, kwargs)
+        release()
+        return response
+
+    @contextmanager
+    def stream(self, endpoint: str, url: str, **kwargs):
+        """스트리밍 POST: 본문을 다 읽을 때까지 동시성 슬롯을 점유 (재시도는 첫 응답 전까지만)
+
+        오류 응답(4xx/5xx)은 본문을 미리 읽어 두므로, 응답을 닫은 뒤에도 e.response.json()으로
+        오류 메시지를 볼 수 있다.
+        """
+        kwargs["stream"] = True
+        response, release = self._send(endpoint, "POST", url, kwargs)
+        try:
+            if response.status_code >= 400:
+                response.content
+            yield response
+        finally:
+            response.close()
+            release()
+
+    def _send(self, endpoint: str, method: str, url: str, kwargs: dict):
+        """재시도 루프. (응답, 슬롯 반환 함수)를 돌려줌"""
+        policy = self.policies[endpoint]
+        semaphore = self._semaphores[endpoint]
+        kwargs.setdefault("timeout", (policy.connect_timeout, policy.read_timeout))
+        attempt = 0
+        while True:
+            response = None
+            semaphore.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                semaphore.release()
+                if attempt >= policy.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= policy.max_retries:
+                    return response, semaphore.release
+                response.close()
+                semaphore.release()
+            time.sleep(self._backoff(policy, attempt, response))
+            attempt += 1
+
+    @staticmethod
+    def _backoff(policy: EndpointPolicy, attempt: int, response) -> float:
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, policy.backoff_cap)
+        # full jitter: 0 ~ min(cap, base * 2^attempt)
+        return random.uniform(0, min(policy.backoff_cap, policy.backoff_base * (2 ** attempt)))
+
+
+def iter_sse_data(response):
+    """text/event-stream 응답에서 data: 페이로드를 순서대로 반환 ([DONE]에서 종료)"""
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield data
+
+
+def iter_chat_completion_deltas(response, usage: dict = None):
+    """chat/completions 스트림에서 content 조각만 추출
+
+    usage dict가 주어지면 마지막 usage 이벤트(stream_options.include_usage)의 토큰 수를 채운다.
+    """
+    for data in iter_sse_data(response):
+        chunk = json.loads(data)
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"].get("message", "알 수 없는 오류"))
+        if usage is not None and chunk.get("usage"):
+            usage.update(chunk["usage"])
+        for choice in chunk.get("choices", []):
+            content = choice.get("delta", {}).get("content")
+            if content:
+                yield content
@@ -0,0 +1,213 @@
+# ============================================================================
+# 문항 분석 (난이도 / 변별도 / 오답 선택 비율 / KR-20 신뢰도)
+# ============================================================================
+# 결과를 행마다 dict로 다시 읽지 않도록, quiz_stats 집계 문서의 "items" 맵에
+# 충분 통계(제출 수, 점수 합 / 제곱합, 문항별 정답 수 / 정답자 점수 합, 문항별 선택지 선택 수)를
+# Increment로 쌓아 두고, 분석은 이 값들만으로 문항 전체를 NumPy 벡터 연산으로 계산한다.
+# 새 결과가 저장될 때마다 같은 batch에서 갱신되므로 따로 다시 계산할 필요가 없다.
+#
+#   items: {count, score_sum, score_sq_sum, correct: {"0": n, ...},
+#           correct_score_sum: {"0": ...}, options: {"0": {"0": n, "1": n, ...}}}
+# 문항 분석은 items만 사용한다. 바깥의 count / question_correct는 items 도입 전 제출까지
+# 세고 있어 기간이 다르므로 섞지 않는다 (items.count가 더 작으면 도입 이후 제출만 분석한 것).
+# correct에는 정답자가 없는 문항도 0으로 넣어, correct가 없는 옛 items는 구분해서 건너뛴다.
+# 변별도는 해당 문항을 뺀 나머지 점수와의 점이연 상관(corrected point-biserial)이다.
+#
+# 사용법:
+#     python item_analysis.py QUIZ_ID      # 저장된 학생 답 전체로 분석 (집계 문서와 대조용)
+import argparse
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+UNANSWERED = -1
+MIN_RESPONSES = 10          # 이보다 제출이 적으면 경고 표시를 하지 않음
+EASY_AT = 0.9               # 정답률이 이 이상이면 너무 쉬움
+HARD_AT = 0.2               # 정답률이 이 이하이면 너무 어려움
+LOW_DISCRIMINATION = 0.2    # 변별도가 이보다 낮으면 변별력 부족
+UNUSED_DISTRACTOR = 0.05    # 오답 선택 비율이 이보다 낮으면 기능하지 않는 오답
+OPTION_COUNT = 4            # 문제당 선택지 수 (quiz_parser 검증과 같음)
+
+
+@dataclass(frozen=True)
+class ItemStats:
+    index: int
+    difficulty: float        # 정답률 p
+    discrimination: float    # 나머지 점수와의 점이연 상관 (계산할 수 없으면 None)
+    option_rates: list       # 선택지별 선택 비율 (학생 답이 없으면 빈 목록)
+    warnings: list
+
+
+@dataclass(frozen=True)
+class QuizAnalysis:
+    count: int
+    kr20: float              # 문항이 2개 미만이거나 점수 분산이 0이면 None
+    items: list
+
+
+# ============================================================================
+# 학생 답 → 행렬
+# ============================================================================
+def answer_matrix(rows: list, question_count: int, field: str = "answers") -> np.ndarray:
+    """제출 목록 → (제출 수, 문항 수) 정수 행렬 (안 고른 문항 / 없는 값은 UNANSWERED)"""
+    matrix = np.full((len(rows), question_count), UNANSWERED, dtype=np.int16)
+    for i, row in enumerate(rows):
+        values = [UNANSWERED if v is None else int(v) for v in (row.get(field) or [])[:question_count]]
+        matrix[i, :len(values)] = values
+    return matrix
+
+
+def flag_matrix(rows: list, question_count: int) -> np.ndarray:
+    """저장된 correct_flags → (제출 수, 문항 수) bool 행렬 (없으면 모두 False)"""
+    flags = np.zeros((len(rows), question_count), dtype=bool)
+    for i, row in enumerate(rows):
+        values = [bool(v) for v in (row.get("correct_flags") or [])[:question_count]]
+        flags[i, :len(values)] = values
+    return flags
+
+
+# ============================================================================
+# 충분 통계
+# ============================================================================
+def totals_from_matrices(answers: np.ndarray, flags: np.ndarray, scores: np.ndarray) -> dict:
+    """행렬에서 items 맵에 쌓을 합계 계산 (값은 파이썬 int)"""
+    scores = scores.astype(np.int64)
+    correct_score_sum = flags.T.astype(np.int64) @ scores
+    option_count = int(answers.max()) + 1 if answers.size else 0
+    options = {}
+    for option in range(option_count):
+        chosen = (answers == option).sum(axis=0)
+        for question in np.flatnonzero(chosen):
+            options.setdefault(str(question), {})[str(option)] = int(chosen[question])
+    return {
+        "count": int(len(scores)),
+        "score_sum": int(scores.sum()),
+        "score_sq_sum": int((scores * scores).sum()),
+        "correct": {str(q): int(n) for q, n in enumerate(flags.sum(axis=0))},
+        "correct_score_sum": {str(q): int(n) for q, n in enumerate(correct_score_sum) if n},
+        "options": options,
+    }
+
+
+def item_totals(rows: list) -> dict:
+    """결과 여러 건 → items 합계 (문항별 정답 여부가 있는 결과만, question_correct와 같은 기준)"""
+    rows = [row for row in rows if row.get("correct_flags") is not None]
+    question_count = max((len(row["correct_flags"]) for row in rows), default=0)
+    scores = np.array([row.get("score", 0) for row in rows], dtype=np.int64)
+    return totals_from_matrices(answer_matrix(rows, question_count), flag_matrix(rows, question_count), scores)
+
+
+# ============================================================================
+# 분석
+# ============================================================================
+def analyze(stats: dict, answer_key: list = None) -> QuizAnalysis:
+    """집계 문서(quiz_stats) → 문항 분석 (items 맵만 사용). items나 문항별 정답 수가 없는 옛 문서는 None"""
+    items = (stats or {}).get("items")
+    if not items or not items.get("count") or "correct" not in items:
+        return None
+    question_count = int(stats.get("total_questions") or len(answer_key or []) or
+                         1 + max((int(q) for q in items["correct"]), default=-1))
+    correct = np.zeros(question_count)
+    correct_score_sum = np.zeros(question_count)
+    for q, n in items["correct"].items():
+        if int(q) < question_count:
+            correct[int(q)] = n
+    for q, n in items.get("correct_score_sum", {}).items():
+        if int(q) < question_count:
+            correct_score_sum[int(q)] = n
+    n = items["count"]
+    mean = items["score_sum"] / n
+    var_total = max(items["score_sq_sum"] / n - mean * mean, 0.0)
+
+    p = correct / n
+    var_item = p * (1 - p)
+    cov_total = correct_score_sum / n - p * mean
+    # 문항 자신을 뺀 나머지 점수와의 상관 (짧은 퀴즈에서 자기 상관으로 부풀려지지 않도록)
+    cov_rest = cov_total - var_item
+    var_rest = var_total - 2 * cov_total + var_item
+    denominator = np.sqrt(np.clip(var_item * var_rest, 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discrimination = np.where(denominator > 1e-12, cov_rest / denominator, np.nan)
+    kr20 = None
+    if question_count > 1 and var_total > 0:
+        kr20 = float(question_count / (question_count - 1) * (1 - var_item.sum() / var_total))
+
+    option_counts = items.get("options", {})
+    results = []
+    for q in range(question_count):
+        chosen = option_counts.get(str(q), {})
+        width = max([int(k) + 1 for k in chosen] + [OPTION_COUNT if chosen else 0])
+        counts = np.zeros(width)
+        for option, count in chosen.items():
+            counts[int(option)] = count
+        rates = (counts / counts.sum()).tolist() if counts.sum() else []
+        r = None if np.isnan(discrimination[q]) else float(discrimination[q])
+        key = answer_key[q] if answer_key and q < len(answer_key) else None
+        results.append(ItemStats(q, float(p[q]), r, rates, _warnings(n, float(p[q]), r, rates, key)))
+    return QuizAnalysis(n, kr20, results)
+
+
+def analyze_responses(answers: np.ndarray, answer_key: list) -> QuizAnalysis:
+    """학생 답 행렬과 정답으로 바로 분석 (집계 문서 없이)"""
+    key = np.array([UNANSWERED if v is None else int(v) for v in answer_key], dtype=np.int16)
+    flags = (answers == key[None, :]) & (answers != UNANSWERED)
+    scores = flags.sum(axis=1)
+    stats = {"total_questions": len(answer_key), "items": totals_from_matrices(answers, flags, scores)}
+    return analyze(stats, answer_key)
+
+
+def _warnings(n: int, p: float, r, rates: list, key) -> list:
+    if n < MIN_RESPONSES:
+        return []
+    warnings = []
+    if p >= EASY_AT:
+        warnings.append("너무 쉬움")
+    elif p <= HARD_AT:
+        warnings.append("너무 어려움")
+    if r is not None and r < 0:
+        warnings.append("변별도 음수 (정답 오류 의심)")
+    elif r is not None and r < LOW_DISCRIMINATION:
+        warnings.append("변별도 낮음")
+    if rates and key is not None and key < len(rates):
+        for option, rate in enumerate(rates):
+            if option == key:
+                continue
+            if rate > rates[key]:
+                warnings.append(f"오답 {chr(65 + option)}를 정답보다 많이 고름 (모호한 문항)")
+            elif rate < UNUSED_DISTRACTOR:
+                warnings.append(f"오답 {chr(65 + option)}를 거의 고르지 않음")
+    return warnings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="퀴즈 문항 분석 (저장된 학생 답 전체 사용)")
+    parser.add_argument("quiz_id")
+    args = parser.parse_args(argv)
+
+    import datastore
+    import regrade
+    from batch_generate import load_local_secrets
+
+    db = datastore.init_firebase_app(load_local_secrets())
+    answer_key = datastore.get_answer_key(db, args.quiz_id)
+    if answer_key is None:
+        print(f"정답 정보를 찾을 수 없습니다: {args.quiz_id}")
+        return 1
+    key = answer_key["answers"]
+    rows = [row for row in regrade.load_submissions(db, args.quiz_id) if row.get("answers")]
+    analysis = analyze_responses(answer_matrix(rows, len(key)), key)
+    if analysis is None:
+        print("학생 답이 저장된 제출이 없습니다.")
+        return 1
+    kr20 = f"{analysis.kr20:.3f}" if analysis.kr20 is not None else "-"
+    print(f"제출 {analysis.count}건, KR-20 {kr20}")
+    for item in analysis.items:
+        r = f"{item.discrimination:6.3f}" if item.discrimination is not None else "     -"
+        rates = " ".join(f"{chr(65 + i)}:{rate:.0%}" for i, rate in enumerate(item.option_rates))
+        print(f"문제 {item.index + 1:2d}  p={item.difficulty:.2f}  r={r}  {rates}  {' / '.join(item.warnings)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
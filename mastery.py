@@ -0,0 +1,190 @@
+# ============================================================================
+# 학생별 / 학급별 문제 유형 숙련도 (student_mastery, class_mastery 컬렉션)
+# ============================================================================
+# 결과가 저장될 때 같은 WriteBatch 안에서 학생(및 학급) 숙련도 문서를
+# Increment 변환으로 갱신한다. 유형별 누적 문제 수/정답 수와 함께 주(ISO week)별
+# 카운터를 남겨 두어, 최근 몇 주의 정답률도 문서 1개만 읽어서 계산할 수 있다.
+#
+# 문서 구조:
+#     {student_name, class_code, attempts, questions, correct, last_seen,
+#      types: {"주제 추론": {questions, correct, last_seen,
+#                           weeks: {"2026-W42": {questions, correct}}}}}
+from collections import Counter
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+STUDENT_COLLECTION = "student_mastery"
+CLASS_COLLECTION = "class_mastery"
+ROLLING_WEEKS = 4     # 최근 정답률 계산 구간
+UNKNOWN_TYPE = "기타"
+
+
+def normalize_name(student_name: str) -> str:
+    return " ".join(student_name.split())
+
+
+def student_doc_id(student_name: str, class_code: str = None) -> str:
+    """학생 문서 id (같은 이름이라도 학급이 다르면 다른 학생, '/' 등은 이스케이프)"""
+    key = normalize_name(student_name)
+    if class_code:
+        key = f"{class_code}:{key}"
+    return quote(key, safe="")
+
+
+def week_key(day) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def mastery_keys(rows: list) -> set:
+    """결과 목록이 갱신하는 숙련도 문서 키 집합 (quiz_stats.stats_keys와 겹치지 않도록 3-튜플)"""
+    keys = set()
+    for row in rows:
+        if not row.get("question_types") or row.get("correct_flags") is None:
+            continue
+        keys.add(("mastery", STUDENT_COLLECTION, student_doc_id(row["student_name"], row.get("class_code"))))
+        if row.get("class_code"):
+            keys.add(("mastery", CLASS_COLLECTION, row["class_code"]))
+    return keys
+
+
+def mastery_increment_many(rows: list) -> dict:
+    """같은 학생(또는 학급)의 결과 여러 건을 변환 하나로 합침"""
+    questions, correct, weekly = Counter(), Counter(), Counter()
+    last_seen = {}
+    for row in rows:
+        timestamp = row.get("timestamp") or datetime.now()
+        week = week_key(timestamp)
+        for question_type, is_correct in zip(row["question_types"], row["correct_flags"]):
+            question_type = question_type or UNKNOWN_TYPE
+            questions[question_type] += 1
+            correct[question_type] += int(bool(is_correct))
+            weekly[(question_type, week, "questions")] += 1
+            weekly[(question_type, week, "correct")] += int(bool(is_correct))
+            last_seen[question_type] = max(last_seen.get(question_type, timestamp), timestamp)
+
+    types = {}
+    for question_type in questions:
+        types[question_type] = {
+            "questions": firestore.Increment(questions[question_type]),
+            "correct": firestore.Increment(correct[question_type]),
+            "last_seen": last_seen[question_type],
+            "weeks": {},
+        }
+    for (question_type, week, field), n in weekly.items():
+        types[question_type]["weeks"].setdefault(week, {})[field] = firestore.Increment(n)
+    return {
+        "attempts": firestore.Increment(len(rows)),
+        "questions": firestore.Increment(sum(questions.values())),
+        "correct": firestore.Increment(sum(correct.values())),
+        "last_seen": max(last_seen.values()),
+        "types": types,
+    }
+
+
+def add_results_to_batch(batch, db, rows: list) -> int:
+    """결과 여러 건의 숙련도 갱신을 문서당 쓰기 1회로 합쳐 batch에 추가 (추가한 쓰기 수 반환)"""
+    groups = {}
+    for row in rows:
+        for key in mastery_keys([row]):
+            groups.setdefault(key, []).append(row)
+    for (_, collection, doc_id), group in groups.items():
+        document = mastery_increment_many(group)
+        if collection == STUDENT_COLLECTION:
+            document["student_name"] = normalize_name(group[-1]["student_name"])
+        if group[-1].get("class_code"):
+            document["class_code"] = group[-1]["class_code"]
+        batch.set(db.collection(collection).document(doc_id), document, merge=True)
+    return len(groups)
+
+
+def get_student_mastery(db, student_name: str, class_code: str = None):
+    """학생 숙련도 문서 1개 조회 (없으면 None)"""
+    snapshot = db.collection(STUDENT_COLLECTION).document(student_doc_id(student_name, class_code)).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def get_class_mastery(db, class_code: str):
+    """학급 숙련도 문서 1개 조회 (없으면 None)"""
+    snapshot = db.collection(CLASS_COLLECTION).document(class_code).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def list_students(db, class_code: str = None, limit: int = 200) -> list:
+    """숙련도 문서가 있는 학생 목록 (최근 제출 순)"""
+    query = db.collection(STUDENT_COLLECTION)
+    if class_code:
+        query = query.where(filter=FieldFilter("class_code", "==", class_code))
+    query = query.order_by("last_seen", direction=firestore.Query.DESCENDING).limit(limit)
+    return [doc.to_dict() for doc in query.stream()]
+
+
+def profile(document: dict, weeks: int = ROLLING_WEEKS, today: date = None) -> list:
+    """숙련도 문서 → 유형별 누적/최근 정답률 목록 (최근 정답률 낮은 순)"""
+    today = today or date.today()
+    recent_weeks = {week_key(today - timedelta(weeks=i)) for i in range(weeks)}
+    rows = []
+    for question_type, stats in (document or {}).get("types", {}).items():
+        recent = [v for week, v in stats.get("weeks", {}).items() if week in recent_weeks]
+        recent_questions = sum(v.get("questions", 0) for v in recent)
+        recent_correct = sum(v.get("correct", 0) for v in recent)
+        total = stats.get("questions", 0)
+        rows.append({
+            "type": question_type,
+            "questions": total,
+            "accuracy": stats.get("correct", 0) / total if total else None,
+            "recent_questions": recent_questions,
+            "recent_accuracy": recent_correct / recent_questions if recent_questions else None,
+            "last_seen": stats.get("last_seen"),
+        })
+    rows.sort(key=lambda r: (r["recent_accuracy"] if r["recent_accuracy"] is not None
+                             else r["accuracy"] if r["accuracy"] is not None else 1.0))
+    return rows
+
+
+def rebuild_mastery(db, results_collection: str = "results") -> int:
+    """기존 results 문서로 숙련도 문서를 다시 계산 (유형 정보가 없는 옛 결과는 퀴즈 문서에서 보완)"""
+    quiz_types = {}
+    groups = {}
+    for doc in db.collection(results_collection).stream():
+        row = doc.to_dict()
+        if row.get("correct_flags") is None or not row.get("student_name"):
+            continue
+        if not row.get("question_types"):
+            quiz_id = row.get("quiz_id")
+            if quiz_id not in quiz_types:
+                quiz_snapshot = db.collection("quizzes").document(quiz_id).get() if quiz_id else None
+                quiz = quiz_snapshot.to_dict() if quiz_snapshot is not None and quiz_snapshot.exists else {}
+                quiz_types[quiz_id] = [q.get("type") for q in quiz.get("questions", [])]
+            row["question_types"] = quiz_types[quiz_id]
+        if isinstance(row.get("timestamp"), datetime):
+            # Firestore 타임스탬프(tz 포함)와 새 결과(datetime.now())를 같은 기준으로 비교
+            row["timestamp"] = row["timestamp"].replace(tzinfo=None)
+        for key in mastery_keys([row]):
+            groups.setdefault(key, []).append(row)
+
+    batch = db.batch()
+    for n, ((_, collection, doc_id), rows) in enumerate(groups.items(), 1):
+        document = _resolve(mastery_increment_many(rows))
+        if collection == STUDENT_COLLECTION:
+            document["student_name"] = normalize_name(rows[-1]["student_name"])
+        if rows[-1].get("class_code"):
+            document["class_code"] = rows[-1]["class_code"]
+        batch.set(db.collection(collection).document(doc_id), document)
+        if n % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return len(groups)
+
+
+def _resolve(value):
+    """Increment 변환을 실제 값으로 바꿈 (문서를 통째로 덮어쓸 때)"""
+    if isinstance(value, firestore.Increment):
+        return value.value
+    if isinstance(value, dict):
+        return {k: _resolve(v) for k, v in value.items()}
+    return value
@@ -0,0 +1,287 @@
+# ============================================================================
+# 교과서 지문 검색 (BM25 역색인 + 유사 지문 벡터 색인)
+# ============================================================================
+# textbook_store의 지문을 미리 색인해 data/textbooks/에 저장해 두고,
+# 검색할 때는 색인만 읽는다 (지문 본문을 매번 훑지 않음).
+#   - search_index.json : 단어 → [(지문 번호, 빈도)] 역색인, 지문 길이 (BM25 키워드 검색)
+#   - search_vectors.npz: 지문별 LSA 벡터 (해시 TF-IDF를 SVD로 줄인 것, "비슷한 지문" 찾기)
+# 벡터는 색인을 만들 때 로컬에서 계산하므로 검색 시 네트워크가 필요 없다.
+# passages.jsonl이 바뀌면 다음 로드 때 자동으로 다시 만든다.
+#
+# 사용법:
+#     python passage_search.py build
+#     python passage_search.py query "climate change"
+#     python passage_search.py similar "YBM 고등 영어 1" "3단원: Technology and Our Lives"
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+from readability import WORD_RE
+from textbook_store import TextbookStore, default_store, source_signature, source_unchanged
+
+SEARCH_INDEX_FILE = "search_index.json"
+SEARCH_VECTORS_FILE = "search_vectors.npz"
+SEARCH_INDEX_VERSION = 1
+
+# BM25 파라미터 (일반적으로 쓰는 값)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 벡터 색인: 해시 특성 차원 / LSA 차원 상한
+HASH_DIM = 2048
+LSA_DIM = 128
+# 주제 검색에서 이보다 코사인 유사도가 낮은 지문은 관련 없는 것으로 보고 뺌
+MIN_SEMANTIC_SIMILARITY = 0.1
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does
+each even for from had has have he her him his how i if in into is it its just many may
+me more most much must my no not of on one only or other our out over own same she should
+so some such than that the their them then there these they this those through to too up
+us very was we were what when where which while who why will with would you your
+""".split())
+SENTENCE_RE = re.compile(r"[^.!?]+[.!?]?")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    textbook: str
+    chapter: str
+    publisher: str
+    score: float
+
+
+def stem(word: str) -> str:
+    """복수형 정도만 맞추는 가벼운 어간 처리 (media/medium 같은 경우는 그대로 둠)"""
+    if word.endswith("'s"):
+        word = word[:-2]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """소문자 → 불용어 제거 → 어간 처리한 단어 목록"""
+    words = (w.lower() for w in WORD_RE.findall(text))
+    return [stem(w) for w in words if w not in STOPWORDS and len(w) > 1]
+
+
+def _hashed(tokens: list, idf: dict) -> dict:
+    """단어/연속 두 단어를 HASH_DIM 차원으로 해시한 TF-IDF (crc32라 프로세스가 달라도 같은 값)"""
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    vector = {}
+    for feature, tf in features.items():
+        # 두 단어 특성의 idf는 두 단어 중 드문 쪽 기준
+        weight = (1 + math.log(tf)) * max(idf.get(part, 0.0) for part in feature.split(" "))
+        slot = zlib.crc32(feature.encode("utf-8")) % HASH_DIM
+        vector[slot] = vector.get(slot, 0.0) + weight
+    return vector
+
+
+# ============================================================================
+# 색인 생성
+# ============================================================================
+def build_search_index(store: TextbookStore, data_dir: str = None) -> dict:
+    """저장소의 모든 지문으로 역색인 + LSA 벡터 작성"""
+    import numpy as np
+
+    data_dir = data_dir or os.path.dirname(store.passages_path)
+    entries = list(store.entries())
+    doc_tokens = [tokenize(e.chapter + " " + store.passage(e.textbook, e.chapter)) for e in entries]
+
+    postings = {}
+    for doc, tokens in enumerate(doc_tokens):
+        for term, tf in Counter(tokens).items():
+            postings.setdefault(term, []).append([doc, tf])
+    doc_len = [len(tokens) for tokens in doc_tokens]
+    index = {
+        "version": SEARCH_INDEX_VERSION,
+        "source": source_signature(store.passages_path),
+        "ids": [e.id for e in entries],
+        "doc_len": doc_len,
+        "avgdl": sum(doc_len) / len(doc_len) if doc_len else 0.0,
+        "postings": postings,
+    }
+
+    # 해시 TF-IDF 행렬 → SVD로 상위 성분만 남김 (LSA)
+    idf = _idf_table(postings, len(entries))
+    matrix = np.zeros((len(entries), HASH_DIM), dtype=np.float32)
+    for doc, tokens in enumerate(doc_tokens):
+        for slot, weight in _hashed(tokens, idf).items():
+            matrix[doc, slot] = weight
+    if len(entries):
+        _, singular, components = np.linalg.svd(matrix, full_matrices=False)
+        rank = max(1, min(LSA_DIM, int((singular > 1e-6).sum())))
+        components = components[:rank].astype(np.float32)
+    else:
+        components = np.zeros((1, HASH_DIM), dtype=np.float32)
+    vectors = _normalize(matrix @ components.T)
+
+    tmp_path = os.path.join(data_dir, SEARCH_INDEX_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(data_dir, SEARCH_INDEX_FILE))
+    tmp_path = os.path.join(data_dir, "search_vectors.tmp.npz")
+    np.savez(tmp_path, vectors=vectors, components=components)
+    os.replace(tmp_path, os.path.join(data_dir, SEARCH_VECTORS_FILE))
+    return index
+
+
+def _idf_table(postings: dict, doc_count: int) -> dict:
+    return {
+        term: math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+        for term, docs in postings.items()
+    }
+
+
+def _normalize(matrix):
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+# ============================================================================
+# 검색
+# ============================================================================
+class PassageSearch:
+    """키워드(BM25) 검색과 유사 지문 검색. 벡터 색인은 처음 쓸 때 읽는다."""
+
+    def __init__(self, store: TextbookStore, data_dir: str = None):
+        self.store = store
+        self.data_dir = data_dir or os.path.dirname(store.passages_path)
+        index_path = os.path.join(self.data_dir, SEARCH_INDEX_FILE)
+        index = None
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        if (index is None or index.get("version") != SEARCH_INDEX_VERSION
+                or not source_unchanged(index.get("source"), store.passages_path)
+                or not os.path.exists(os.path.join(self.data_dir, SEARCH_VECTORS_FILE))):
+            index = build_search_index(store, self.data_dir)
+        by_id = {e.id: e for e in store.entries()}
+        self._entries = [by_id[doc_id] for doc_id in index["ids"]]
+        self._postings = index["postings"]
+        self._doc_len = index["doc_len"]
+        self._avgdl = index["avgdl"] or 1.0
+        self._idf = _idf_table(self._postings, len(self._entries))
+        self._vectors = None
+        self._components = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _hit(self, doc: int, score: float) -> SearchHit:
+        entry = self._entries[doc]
+        return SearchHit(entry.textbook, entry.chapter, entry.publisher, round(float(score), 4))
+
+    def _top(self, scores, limit: int, publisher: str = None, min_score: float = 0.0) -> list:
+        candidates = (
+            (score, doc) for doc, score in scores
+            if score > min_score and (publisher is None or self._entries[doc].publisher == publisher)
+        )
+        return [self._hit(doc, score) for score, doc in heapq.nlargest(limit, candidates)]
+
+    def search(self, query: str, limit: int = 10, publisher: str = None) -> list:
+        """BM25 키워드 검색 (질의 단어가 하나도 없는 지문은 제외)"""
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self._postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc] / self._avgdl)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return self._top(scores.items(), limit, publisher)
+
+    def _load_vectors(self):
+        if self._vectors is None:
+            import numpy as np
+
+            with np.load(os.path.join(self.data_dir, SEARCH_VECTORS_FILE)) as data:
+                self._vectors = data["vectors"]
+                self._components = data["components"]
+        return self._vectors
+
+    def similar(self, textbook: str, chapter: str, limit: int = 5, publisher: str = None) -> list:
+        """선택한 지문과 주제가 비슷한 지문 (코사인 유사도, 자기 자신 제외)"""
+        vectors = self._load_vectors()
+        target = self.store.entry(textbook, chapter)
+        doc = next(i for i, e in enumerate(self._entries) if e.id == target.id)
+        scores = vectors @ vectors[doc]
+        return self._top(((i, s) for i, s in enumerate(scores) if i != doc), limit, publisher)
+
+    def semantic(self, query: str, limit: int = 10, publisher: str = None) -> list:
+        """질의 문장을 같은 LSA 공간으로 옮겨 주제가 가까운 지문 검색 (MIN_SEMANTIC_SIMILARITY 이하는 제외)"""
+        import numpy as np
+
+        vectors = self._load_vectors()
+        hashed = np.zeros(HASH_DIM, dtype=np.float32)
+        for slot, weight in _hashed(tokenize(query), self._idf).items():
+            hashed[slot] = weight
+        projected = _normalize((self._components @ hashed)[None, :])[0]
+        return self._top(enumerate(vectors @ projected), limit, publisher, min_score=MIN_SEMANTIC_SIMILARITY)
+
+    def snippet(self, hit: SearchHit, query: str, width: int = 160) -> str:
+        """질의 단어가 들어 있는 첫 문장 (없으면 지문 앞부분)"""
+        passage = self.store.passage(hit.textbook, hit.chapter)
+        terms = set(tokenize(query))
+        for sentence in SENTENCE_RE.findall(passage):
+            if terms & set(tokenize(sentence)):
+                sentence = " ".join(sentence.split())
+                return sentence if len(sentence) <= width else sentence[:width - 1] + "…"
+        text = " ".join(passage.split())
+        return text if len(text) <= width else text[:width - 1] + "…"
+
+
+@lru_cache(maxsize=None)
+def default_search() -> PassageSearch:
+    """기본 저장소에 대한 검색기 (프로세스당 하나)"""
+    return PassageSearch(default_store())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="교과서 지문 검색 색인")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="검색 색인 다시 만들기")
+    query_parser = sub.add_parser("query", help="키워드 검색")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--semantic", action="store_true", help="벡터 검색 사용")
+    query_parser.add_argument("--limit", type=int, default=10)
+    similar_parser = sub.add_parser("similar", help="비슷한 지문 찾기")
+    similar_parser.add_argument("textbook")
+    similar_parser.add_argument("chapter")
+    similar_parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = build_search_index(default_store())
+        print(f"검색 색인 생성 완료: 지문 {len(index['ids'])}개, 단어 {len(index['postings'])}개")
+        return 0
+
+    search = default_search()
+    if args.command == "query":
+        hits = (search.semantic if args.semantic else search.search)(args.text, limit=args.limit)
+    else:
+        hits = search.similar(args.textbook, args.chapter, limit=args.limit)
+    for hit in hits:
+        print(f"{hit.score:8.3f}  {hit.textbook} / {hit.chapter}")
+    if not hits:
+        print("검색 결과가 없습니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+# ============================================================================
+# 구간(span)별 소요 시간 측정 (opt-in)
+# ============================================================================
+# PERF_ENABLED=1 (secrets 또는 환경 변수)일 때만 기록하고, 꺼져 있으면 플래그 확인만 한다.
+# Firestore / OpenAI 호출 함수와 화면 구역을 span으로 감싸서
+#   - 스크립트 실행(rerun) 1회마다 span별 호출 수 / 합계 시간을 JSONL에 한 줄씩 남기고
+#   - 프로세스 누적 호출 수 / 합계와 최근 값의 p50 / p95를 Prometheus 텍스트 파일로 내보낸다.
+# fragment만 다시 실행되는 경우에는 가장 바깥 span이 그 실행 1회가 된다.
+# 백그라운드 스레드(퀴즈 풀 등)의 span은 누적 통계에만 들어간다.
+#
+# 사용법:
+#     python perf.py summary                     # 기본 로그의 span별 p50 / p95
+#     python perf.py summary .cache/perf_runs.jsonl --last 500
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_LOG_PATH = os.path.join(".cache", "perf_runs.jsonl")
+DEFAULT_PROM_PATH = os.path.join(".cache", "perf_metrics.prom")
+RECENT_SAMPLES = 500          # span별로 백분위 계산에 쓰는 최근 값 개수
+PROM_EXPORT_INTERVAL = 10.0   # Prometheus 파일을 다시 쓰는 최소 간격 (초)
+MAX_LOG_BYTES = 5_000_000     # 이보다 커지면 .1로 옮기고 새로 시작
+RUN_SPAN = "rerun"
+
+
+def percentile(values, q: float) -> float:
+    """최근접 순위 백분위 (q: 0-1)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)), 1) - 1]
+
+
+class _SpanStats:
+    __slots__ = ("count", "total_ms", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+class PerfRecorder:
+    """span 기록기 (스레드 안전, 프로세스당 하나)"""
+
+    def __init__(self, enabled: bool = False, log_path: str = DEFAULT_LOG_PATH, prom_path: str = DEFAULT_PROM_PATH):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._local = threading.local()
+        self._last_prom_export = 0.0
+
+    def configure(self, enabled: bool, log_path: str = None, prom_path: str = None):
+        self.enabled = enabled
+        self.log_path = log_path or self.log_path
+        self.prom_path = prom_path or self.prom_path
+
+    # ------------------------------------------------------------------
+    # 실행(rerun) 단위
+    # ------------------------------------------------------------------
+    def begin_run(self, name: str = RUN_SPAN):
+        """스크립트 실행 시작 (중단된 이전 실행이 남아 있으면 버림)"""
+        if not self.enabled:
+            return
+        self._local.run = {"name": name, "started": time.perf_counter(), "spans": {}}
+
+    def end_run(self):
+        """실행 1회 합계를 기록하고 내보냄"""
+        run = getattr(self._local, "run", None)
+        self._local.run = None
+        if not self.enabled or run is None:
+            return
+        elapsed_ms = (time.perf_counter() - run["started"]) * 1000
+        self._add(run["name"], elapsed_ms)
+        self._export(run, elapsed_ms)
+
+    # ------------------------------------------------------------------
+    # span
+    # ------------------------------------------------------------------
+    @contextmanager
+    def span(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        implicit_run = getattr(self._local, "run", None) is None and self._in_script_thread()
+        if implicit_run:
+            self.begin_run(f"fragment:{name}")
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._add(name, elapsed_ms)
+            run = getattr(self._local, "run", None)
+            if run is not None:
+                count, total = run["spans"].get(name, (0, 0.0))
+                run["spans"][name] = (count + 1, total + elapsed_ms)
+            if implicit_run:
+                self.end_run()
+
+    def timed(self, name: str = None):
+        """함수 호출 전체를 span으로 감싸는 데코레이터 (이름을 생략하면 함수 이름)"""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _in_script_thread() -> bool:
+        """Streamlit 스크립트 스레드에서만 fragment 실행을 따로 묶음 (백그라운드 스레드 제외)"""
+        return threading.current_thread().name.startswith("ScriptRunner")
+
+    def _add(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _SpanStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.recent.append(elapsed_ms)
+
+    # ------------------------------------------------------------------
+    # 조회 / 내보내기
+    # ------------------------------------------------------------------
+    def summary(self) -> list:
+        """span별 누적 호출 수 / 합계와 최근 값의 p50 / p95 / 최대 (p95 큰 순)"""
+        with self._lock:
+            items = [(name, s.count, s.total_ms, list(s.recent)) for name, s in self._stats.items()]
+        rows = [{
+            "span": name,
+            "count": count,
+            "total_ms": round(total_ms, 1),
+            "p50_ms": round(percentile(recent, 0.5), 1),
+            "p95_ms": round(percentile(recent, 0.95), 1),
+            "max_ms": round(max(recent), 1) if recent else 0.0,
+        } for name, count, total_ms, recent in items]
+        rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _export(self, run: dict, elapsed_ms: float):
+        """실행 기록은 JSONL에 추가, Prometheus 파일은 PROM_EXPORT_INTERVAL마다 다시 씀 (실패해도 앱은 계속)"""
+        try:
+            if self.log_path:
+                self._append_jsonl({
+                    "time": datetime.now().isoformat(timespec="seconds"),
+                    "run": run["name"],
+                    "total_ms": round(elapsed_ms, 2),
+                    "spans": {name: [count, round(ms, 2)] for name, (count, ms) in run["spans"].items()},
+                })
+            now = time.monotonic()
+            if self.prom_path and now - self._last_prom_export >= PROM_EXPORT_INTERVAL:
+                self._last_prom_export = now
+                self.write_prometheus(self.prom_path)
+        except OSError as e:
+            print(f"[perf] 기록 실패: {e}", flush=True)
+
+    def _append_jsonl(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if os.path.dirname(self.log_path):
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP quiz_app_span_duration_ms Span duration in milliseconds (quantiles over recent samples)",
+            "# TYPE quiz_app_span_duration_ms summary",
+        ]
+        for row in sorted(self.summary(), key=lambda row: row["span"]):
+            label = row["span"].replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'quiz_app_span_duration_ms{{span="{label}",quantile="0.5"}} {row["p50_ms"]}')
+            lines.append(f'quiz_app_span_duration_ms{{span="{label}",quantile="0.95"}} {row["p95_ms"]}')
+            lines.append(f'quiz_app_span_duration_ms_sum{{span="{label}"}} {row["total_ms"]}')
+            lines.append(f'quiz_app_span_duration_ms_count{{span="{label}"}} {row["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """node_exporter textfile collector 등이 읽을 수 있도록 임시 파일에 쓴 뒤 교체"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+# 프로세스 공용 기록기 (모듈 수준 데코레이터에서 바로 쓸 수 있도록)
+recorder = PerfRecorder()
+span = recorder.span
+timed = recorder.timed
+
+
+def summarize_log(path: str = DEFAULT_LOG_PATH, last: int = None) -> list:
+    """JSONL 실행 기록 → span별 실행당 합계 시간의 p50 / p95 (실행 자체는 RUN_SPAN과 fragment:* 이름)"""
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if last:
+        records = records[-last:]
+    per_span = {}
+    for record in records:
+        per_span.setdefault(record["run"], []).append(record["total_ms"])
+        for name, (_, ms) in record["spans"].items():
+            per_span.setdefault(name, []).append(ms)
+    rows = [{
+        "span": name,
+        "runs": len(values),
+        "p50_ms": round(percentile(values, 0.5), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+    } for name, values in per_span.items()]
+    rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="span 기록 요약")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary_parser = sub.add_parser("summary", help="JSONL 실행 기록의 span별 p50 / p95")
+    summary_parser.add_argument("path", nargs="?", default=DEFAULT_LOG_PATH)
+    summary_parser.add_argument("--last", type=int, default=None, help="최근 실행 N개만")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"기록 파일이 없습니다: {args.path} (PERF_ENABLED=1로 앱을 실행하세요)")
+        return 1
+    rows = summarize_log(args.path, args.last)
+    print(f"{'span':40s} {'runs':>6s} {'p50 ms':>9s} {'p95 ms':>9s}")
+    for row in rows:
+        print(f"{row['span']:40s} {row['runs']:6d} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+# ============================================================================
+# OpenAI 지문 변환 / 퀴즈 생성 (Streamlit 비의존)
+# ============================================================================
+# app.py의 교사 화면과 batch_generate.py 일괄 생성 도구가 함께 사용한다.
+# 오류는 예외로 올려 보내고, 화면 표시(st.error)는 호출하는 쪽에서 처리한다.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import readability
+from http_client import iter_chat_completion_deltas
+from quiz_parser import QuestionStreamParser, parse_questions, question_errors
+from rewrite_cache import rewrite_cache_key
+from textbooks import QUESTION_TYPES_INFO
+from usage_tracker import estimate_tokens, route_quiz, route_rewrite
+
+# OPENAI_BASE_URL로 호환 서버(벤치마크용 가짜 서버 등)를 지정할 수 있음
+OPENAI_CHAT_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/") + "/chat/completions"
+
+REWRITE_MODEL = "gpt-3.5-turbo"
+QUIZ_MODEL = "gpt-3.5-turbo"
+# 프롬프트 문구를 바꾸면 버전을 올려서 이전 캐시가 재사용되지 않도록 함
+REWRITE_PROMPT_VERSION = "1"
+
+DIFFICULTY_MAP = {
+    "쉬움 (Easy)": "easy (초등학교 수준의 단어와 간단한 문장 사용, Lexile 600-800)",
+    "어려움 (Hard)": "hard (대학 수준의 어휘와 복잡한 문장 구조, Lexile 1200+)"
+}
+
+
+class QuizAIError(Exception):
+    """OpenAI 응답을 사용할 수 없을 때 발생"""
+
+
+def stream_chat_completion(client, api_key: str, data: dict, on_delta=None, usage=None,
+                           function: str = "chat") -> str:
+    """chat/completions를 SSE 스트림으로 호출하고 전체 응답 텍스트를 반환 (조각마다 on_delta 호출)
+
+    usage(UsageScope)가 주어지면 호출 전에 일일 예산을 확인하고, 끝난 뒤 토큰/지연/성공 여부를 기록한다.
+    """
+    if usage:
+        usage.check_budget()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    parts = []
+    reported = {}
+    ok = False
+    started = time.perf_counter()
+    try:
+        request = {**data, "stream": True, "stream_options": {"include_usage": True}}
+        with client.stream("openai_chat", OPENAI_CHAT_URL, headers=headers, json=request) as response:
+            response.raise_for_status()
+            for delta in iter_chat_completion_deltas(response, usage=reported):
+                parts.append(delta)
+                if on_delta:
+                    on_delta(delta)
+        ok = True
+    finally:
+        if usage:
+            _record_usage(usage, function, data, "".join(parts), reported, ok, time.perf_counter() - started)
+    return "".join(parts)
+
+
+def _record_usage(usage, function: str, data: dict, text: str, reported: dict, ok: bool, latency: float):
+    """usage 이벤트가 없으면(호환 서버, 중간 실패) 글자 수로 토큰을 추정해서 기록"""
+    estimated = "prompt_tokens" not in reported
+    if estimated and ok:
+        prompt_text = "".join(message.get("content", "") for message in data.get("messages", []))
+        prompt_tokens, completion_tokens = estimate_tokens(prompt_text), estimate_tokens(text)
+    else:
+        prompt_tokens = reported.get("prompt_tokens", 0)
+        completion_tokens = reported.get("completion_tokens", estimate_tokens(text))
+    usage.record(function, data["model"], prompt_tokens, completion_tokens, latency, ok, estimated)
+
+
+def rewrite_passage(client, cache, api_key: str, original_passage: str, difficulty: str,
+                    regenerate: bool = False, on_text=None, max_attempts: int = 2, usage=None) -> str:
+    """지문을 선택된 난이도 수준으로 재작성 (regenerate=True면 캐시를 무시하고 새로 생성)
+
+    on_text가 주어지면 토큰이 도착할 때마다 지금까지 받은 텍스트로 호출한다.
+    결과의 추정 Lexile이 목표 구간을 벗어나면 측정값을 알려 주고 max_attempts까지 다시 요청하며,
+    그중 목표에 가장 가까운 결과를 반환한다.
+    """
+    # "보통 (Original)"이면 원본 반환 (API 호출 없음)
+    if difficulty == "보통 (Original)":
+        return original_passage
+
+    route = route_rewrite(original_passage, REWRITE_MODEL, usage.spend_ratio() if usage else 0.0)
+    cache_key = rewrite_cache_key(original_passage, difficulty, route.model, REWRITE_PROMPT_VERSION)
+    if not regenerate:
+        # 예산 때문에 저렴한 모델로 바뀌었어도 기본 모델로 만든 결과가 있으면 그것을 사용
+        for model in dict.fromkeys((REWRITE_MODEL, route.model)):
+            cached_text = cache.get(rewrite_cache_key(original_passage, difficulty, model, REWRITE_PROMPT_VERSION))
+            if cached_text is not None:
+                return cached_text
+
+    difficulty_level = DIFFICULTY_MAP.get(difficulty, "original")
+
+    prompt = f"""당신은 영어 교육 전문가입니다. 다음 작업을 수행하세요:
+
+원본 지문:
+{original_passage}
+
+작업:
+주어진 지문을 {difficulty_level} 수준으로 재작성하세요.
+- 주요 내용과 의미는 유지하세요
+- 단어와 문장 구조만 변경하세요
+- 재작성된 지문의 길이는 200-350단어 정도여야 합니다
+
+재작성된 지문만 반환하세요 (다른 설명 없음)."""
+
+    best_text, best_gap = None, None
+    feedback = ""
+    for _ in range(max(1, max_attempts)):
+        data = {
+            "model": route.model,
+            "messages": [
+                {"role": "system", "content": "당신은 영어 교육 전문가로서 텍스트 난이도를 조정하는 데 능숙합니다."},
+                {"role": "user", "content": prompt + feedback}
+            ],
+            "temperature": 0.7,
+            "max_tokens": route.max_tokens
+        }
+
+        received = []
+        def on_delta(delta):
+            received.append(delta)
+            if on_text:
+                on_text("".join(received))
+
+        rewritten_text = stream_chat_completion(
+            client, api_key, data, on_delta=on_delta, usage=usage, function="rewrite_passage"
+        ).strip()
+        if not rewritten_text:
+            continue
+        lexile = readability.analyze(rewritten_text).lexile
+        gap = readability.level_gap(lexile, difficulty)
+        if best_gap is None or abs(gap) < abs(best_gap):
+            best_text, best_gap = rewritten_text, gap
+        if gap == 0:
+            break
+        direction = "더 쉽게 (문장을 짧게, 기초 어휘 위주로)" if gap > 0 else "더 어렵게 (문장을 길게, 고급 어휘를 사용해)"
+        feedback = (f"\n\n참고: 이전 재작성 결과는 Lexile 약 {lexile}L로 측정되어 목표 수준을 벗어났습니다. "
+                    f"이번에는 {direction} 작성하세요.")
+
+    if best_text is None:
+        raise QuizAIError("빈 응답을 받았습니다")
+    cache.put(cache_key, best_text)
+    return best_text
+
+
+def generate_quiz(client, api_key: str, passage: str, question_types: list, on_question=None, usage=None,
+                  repair_attempts: int = 2) -> dict:
+    """주어진 지문을 기반으로 퀴즈 생성
+
+    on_question이 주어지면 유효한 문제 객체가 하나 완성될 때마다 (번호, 문제)로 호출한다.
+    응답이 잘렸거나 일부 문제가 형식에 맞지 않으면, 빠진 유형만 유형별로 다시 요청해서 채운다.
+    끝내 채우지 못한 유형은 "failed_types"에 담는다.
+    """
+    question_types_str = ", ".join(question_types)
+
+    prompt = f"""당신은 한국 고등학교 영어 교사입니다. 다음 작업을 수행하세요:
+
+지문:
+{passage}
+
+작업:
+위 지문을 기반으로 다음 질문 유형으로 정확히 {len(question_types)}개의 객관식 문제를 생성하세요:
+- 요청된 질문 유형: {question_types_str}
+
+질문 유형 설명:
+- 주제 추론: 지문의 주제나 주요 내용을 파악하는 문제
+- 제목 추론: 지문에 가장 적합한 제목을 선택하는 문제
+- 빈칸 추론: 지문의 빈칸에 들어갈 가장 적절한 단어/구를 선택하는 문제
+- 요지 추론: 지문의 요점이나 결론을 파악하는 문제
+- 문단 요약: 특정 문단의 내용을 가장 잘 요약한 것을 선택하는 문제
+
+다음의 정확한 JSON 형식으로 응답하세요 (다른 텍스트는 없음):
+{{
+    "questions": [
+        {{
+            "question_text": "문제 텍스트",
+            "type": "질문 유형",
+            "options": ["선택지 1", "선택지 2", "선택지 3", "선택지 4"],
+            "correct_answer": 0
+        }}
+    ]
+}}
+
+주의:
+- 각 문제는 정확히 4개의 선택지를 가져야 합니다
+- correct_answer는 정답의 인덱스 (0-3)입니다
+- 빈칸 추론 문제의 경우, 지문의 원문을 참고하여 지문 내에서 빈칸을 명시하지 마세요
+- JSON만 반환하세요"""
+
+    route = route_quiz(passage, len(question_types), QUIZ_MODEL, usage.spend_ratio() if usage else 0.0)
+    data = {
+        "model": route.model,
+        "messages": [
+            {"role": "system", "content": "당신은 한국 고등학교 영어 교사로서 지문 기반 퀴즈를 만드는 전문가입니다."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": route.max_tokens
+    }
+
+    parser = QuestionStreamParser()
+    valid = []
+    def accept(question):
+        if question_errors(question, allowed_types=QUESTION_TYPES_INFO):
+            return
+        valid.append(question)
+        if on_question:
+            on_question(len(valid), question)
+
+    def on_delta(delta):
+        for question in parser.feed(delta):
+            accept(question)
+
+    response_text = stream_chat_completion(
+        client, api_key, data, on_delta=on_delta, usage=usage, function="generate_quiz"
+    ).strip()
+    if not parser.questions:
+        # "questions" 배열이 없는 형식 (단일 객체, 최상위 배열 등)
+        for question in parse_questions(response_text):
+            accept(question)
+
+    slots = _assign_by_type(valid, question_types)
+    missing = [i for i, question in enumerate(slots) if question is None]
+    failures = {}
+    if missing:
+        filled = len(valid)
+        def on_repaired(_, question):
+            nonlocal filled
+            filled += 1
+            if on_question:
+                on_question(filled, question)
+
+        results, failures = _generate_by_type(
+            client, api_key, passage, [question_types[i] for i in missing],
+            max_attempts=repair_attempts, on_question=on_repaired, usage=usage
+        )
+        for j, i in enumerate(missing):
+            slots[i] = results.get(j)
+        failures = {missing[j]: reason for j, reason in failures.items()}
+
+    questions = [question for question in slots if question is not None]
+    if not questions:
+        raise QuizAIError(f"OpenAI 응답에서 유효한 문제를 찾지 못했습니다: {response_text[:300]}")
+    quiz_data = {"questions": questions}
+    if failures:
+        quiz_data["failed_types"] = {question_types[i]: failures[i] for i in sorted(failures)}
+    return quiz_data
+
+
+def _assign_by_type(questions: list, question_types: list) -> list:
+    """요청한 유형 순서대로 문제를 하나씩 배정 (없는 자리는 None)"""
+    pool = list(questions)
+    slots = []
+    for question_type in question_types:
+        match = next((q for q in pool if q.get("type") == question_type), None)
+        if match is not None:
+            pool.remove(match)
+        slots.append(match)
+    return slots
+
+
+# ============================================================================
+# 문제 유형별 병렬 생성
+# ============================================================================
+def generate_question(client, api_key: str, passage: str, question_type: str, usage=None) -> dict:
+    """한 가지 유형의 문제 1개를 생성하고 형식을 검증 (실패 시 QuizAIError)"""
+    prompt = f"""당신은 한국 고등학교 영어 교사입니다. 다음 작업을 수행하세요:
+
+지문:
+{passage}
+
+작업:
+위 지문을 기반으로 '{question_type}' 유형의 객관식 문제를 정확히 1개 생성하세요.
+- {question_type}: {QUESTION_TYPES_INFO.get(question_type, "")}
+
+다음의 정확한 JSON 형식으로 응답하세요 (다른 텍스트는 없음):
+{{
+    "questions": [
+        {{
+            "question_text": "문제 텍스트",
+            "type": "{question_type}",
+            "options": ["선택지 1", "선택지 2", "선택지 3", "선택지 4"],
+            "correct_answer": 0
+        }}
+    ]
+}}
+
+주의:
+- 정확히 4개의 선택지를 가져야 합니다
+- correct_answer는 정답의 인덱스 (0-3)입니다
+- 빈칸 추론 문제의 경우, 지문의 원문을 참고하여 지문 내에서 빈칸을 명시하지 마세요
+- JSON만 반환하세요"""
+
+    route = route_quiz(passage, 1, QUIZ_MODEL, usage.spend_ratio() if usage else 0.0)
+    data = {
+        "model": route.model,
+        "messages": [
+            {"role": "system", "content": "당신은 한국 고등학교 영어 교사로서 지문 기반 퀴즈를 만드는 전문가입니다."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": route.max_tokens
+    }
+
+    questions = parse_questions(stream_chat_completion(client, api_key, data, usage=usage, function="generate_question"))
+    if not questions:
+        raise QuizAIError(f"{question_type}: 응답에서 문제를 찾지 못했습니다")
+    question = questions[0]
+    question.setdefault("type", question_type)
+    errors = question_errors(question, question_type)
+    if errors:
+        raise QuizAIError(f"{question_type}: {', '.join(errors)}")
+    return question
+
+
+def generate_quiz_parallel(client, api_key: str, passage: str, question_types: list,
+                           max_attempts: int = 2, on_question=None, usage=None) -> dict:
+    """문제 유형마다 요청을 동시에 보내고, 실패한 유형만 재시도한 뒤 요청 순서대로 합침
+
+    일부 유형이 끝내 실패하면 성공한 문제만 반환하고 "failed_types"에 실패 유형과 사유를 담는다.
+    on_question(완성된 문제 수, 문제)은 호출한 스레드에서 호출된다.
+    """
+    results, failures = _generate_by_type(client, api_key, passage, question_types, max_attempts,
+                                          on_question=on_question, usage=usage)
+    if not results:
+        raise QuizAIError("모든 문제 생성에 실패했습니다: " + "; ".join(failures.values()))
+    quiz_data = {"questions": [results[i] for i in sorted(results)]}
+    if failures:
+        quiz_data["failed_types"] = {question_types[i]: failures[i] for i in sorted(failures)}
+    return quiz_data
+
+
+def _generate_by_type(client, api_key: str, passage: str, question_types: list, max_attempts: int = 2,
+                      on_question=None, usage=None) -> tuple:
+    """유형별 1문제씩 동시에 생성 → ({인덱스: 문제}, {인덱스: 실패 사유})"""
+    results = {}
+    failures = {}
+    remaining = list(range(len(question_types)))
+    with ThreadPoolExecutor(max_workers=max(len(question_types), 1)) as pool:
+        for _ in range(max_attempts):
+            if not remaining:
+                break
+            futures = {
+                pool.submit(generate_question, client, api_key, passage, question_types[i], usage): i
+                for i in remaining
+            }
+            remaining = []
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    failures[i] = str(e)
+                    remaining.append(i)
+                else:
+                    failures.pop(i, None)
+                    if on_question:
+                        on_question(len(results), results[i])
+    return results, failures
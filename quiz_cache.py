@@ -0,0 +1,91 @@
+# ============================================================================
+# 학급별 배정 퀴즈 공용 캐시
+# ============================================================================
+# 학생마다 "우리 반 퀴즈 불러오기"를 누를 때 Firestore를 다시 읽지 않도록
+# 프로세스 전체에서 학급 코드별 배정 문서를 메모리에 보관한다.
+# 학급 문서마다 on_snapshot 리스너를 달아 교사가 배정을 바꾸면 캐시를 교체하고,
+# 리스너가 동작하지 않을 때는 TTL이 지나면 다시 조회한다.
+import threading
+import time
+from datetime import datetime
+
+from assignments import ASSIGNMENTS_COLLECTION, assigned_quizzes, get_assignment, normalize_class_code
+
+
+class AssignmentCache:
+    """학급 코드 → 배정 문서 캐시 (프로세스 공용, 학급마다 문서 리스너 1개)
+
+    같은 학급 학생들이 동시에 불러와도 Firestore 읽기는 학급당 1회이고,
+    교사가 배정을 바꾸면 리스너가 캐시를 갱신한다. 리스너를 쓸 수 없으면 TTL로 다시 읽는다.
+    """
+
+    def __init__(self, db, ttl_seconds: float = 60.0, listen: bool = True, max_classes: int = 500):
+        self._db = db
+        self._ttl = ttl_seconds
+        self._listen = listen
+        self._max_classes = max_classes
+        self._lock = threading.Lock()
+        self._entries = {}     # class_code → (assignment, loaded_at)
+        self._watches = {}     # class_code → Watch
+
+    def get(self, class_code: str):
+        """학급 배정 문서 (없으면 None)"""
+        code = normalize_class_code(class_code)
+        with self._lock:
+            cached = self._entries.get(code)
+            if cached is not None and self._is_fresh(code, cached[1]):
+                return cached[0]
+        assignment = get_assignment(self._db, code)
+        with self._lock:
+            if len(self._entries) >= self._max_classes and code not in self._entries:
+                self._evict_oldest()
+            self._entries[code] = (assignment, time.monotonic())
+            if self._listen and code not in self._watches:
+                self._start_listener(code)
+        return assignment
+
+    def active_quizzes(self, class_code: str, now: datetime = None) -> list:
+        return assigned_quizzes(self.get(class_code), now)
+
+    def invalidate(self, class_code: str = None):
+        """다음 get()에서 다시 읽도록 표시 (class_code가 없으면 전체)"""
+        with self._lock:
+            if class_code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_class_code(class_code), None)
+
+    def close(self):
+        with self._lock:
+            for watch in self._watches.values():
+                watch.unsubscribe()
+            self._watches.clear()
+
+    def _is_fresh(self, code: str, loaded_at: float) -> bool:
+        watch = self._watches.get(code)
+        if watch is not None and watch.is_active:
+            return True
+        return time.monotonic() - loaded_at < self._ttl
+
+    def _evict_oldest(self):
+        code = min(self._entries, key=lambda c: self._entries[c][1])
+        del self._entries[code]
+        watch = self._watches.pop(code, None)
+        if watch is not None:
+            watch.unsubscribe()
+
+    def _start_listener(self, code: str):
+        try:
+            self._watches[code] = self._db.collection(ASSIGNMENTS_COLLECTION).document(code).on_snapshot(
+                lambda docs, changes, read_time: self._on_snapshot(code, docs)
+            )
+        except Exception:
+            # 리스너를 쓸 수 없는 환경에서는 TTL 기반으로만 동작
+            pass
+
+    def _on_snapshot(self, code: str, docs):
+        # Firestore 백그라운드 스레드에서 호출됨
+        snapshot = docs[0] if docs else None
+        with self._lock:
+            self._entries[code] = (snapshot.to_dict() if snapshot is not None and snapshot.exists else None,
+                                   time.monotonic())
@@ -0,0 +1,220 @@
+# ============================================================================
+# 퀴즈 응답 JSON 증분 파서
+# ============================================================================
+# 모델 응답이 조각(token) 단위로 도착할 때 "questions" 배열 안의 객체가
+# 하나 완성될 때마다 바로 꺼내 준다. 앞뒤의 ```json 펜스나 설명 문장은 무시한다.
+# 끝에 붙은 쉼표, True/None 같은 Python 표기, 문자열 안 줄바꿈 등은 고쳐서 읽고,
+# max_tokens에서 잘린 응답이라도 완성된 문제까지는 살린다.
+import json
+import re
+
+QUESTIONS_ARRAY_RE = re.compile(r'"questions"\s*:\s*\[')
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+ANSWER_LETTERS = {"A": 0, "B": 1, "C": 2, "D": 3, "①": 0, "②": 1, "③": 2, "④": 3}
+
+
+class QuestionStreamParser:
+    """feed()로 텍스트 조각을 넣으면 새로 완성된 문제 dict 목록을 반환"""
+
+    def __init__(self):
+        self.text = ""
+        self.questions = []
+        self.finished = False     # questions 배열의 닫는 괄호까지 읽었는지
+        self._pos = None          # 배열 내부 스캔 위치 (배열 시작 전에는 None)
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        if self.finished:
+            return []
+        if self._pos is None:
+            match = QUESTIONS_ARRAY_RE.search(self.text)
+            if not match:
+                return []
+            self._pos = match.end()
+        return self._scan()
+
+    def _scan(self) -> list:
+        completed = []
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._object_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # questions 배열 종료
+                    self.finished = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and ch == "}" and self._object_start is not None:
+                    question = self._decode(text[self._object_start:i + 1])
+                    if question is not None:
+                        self.questions.append(question)
+                        completed.append(question)
+                    self._object_start = None
+            i += 1
+        self._pos = i
+        return completed
+
+    @staticmethod
+    def _decode(fragment: str):
+        value = loads_lenient(fragment)
+        return normalize_question(value) if isinstance(value, dict) else None
+
+
+def repair_json(fragment: str) -> str:
+    """문자열 밖의 끝 쉼표 / Python 리터럴 제거, 문자열 안 제어 문자 이스케이프"""
+    out = []
+    in_string = escape = False
+    i = 0
+    while i < len(fragment):
+        ch = fragment[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            elif ch == "\t":
+                ch = "\\t"
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch == ",":
+            j = i + 1
+            while j < len(fragment) and fragment[j].isspace():
+                j += 1
+            if j < len(fragment) and fragment[j] in "}]":
+                i += 1
+                continue
+            out.append(ch)
+        else:
+            for literal, replacement in PYTHON_LITERALS.items():
+                if fragment.startswith(literal, i) and not fragment[i - 1:i].isalnum():
+                    out.append(replacement)
+                    i += len(literal)
+                    break
+            else:
+                out.append(ch)
+                i += 1
+            continue
+        i += 1
+    return "".join(out)
+
+
+def loads_lenient(fragment: str):
+    """json.loads 후 실패하면 흔한 오류를 고쳐서 한 번 더 시도 (실패 시 None)"""
+    for candidate in (fragment, repair_json(fragment)):
+        try:
+            return json.loads(candidate, strict=False)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def extract_balanced(text: str, opener: str = "{"):
+    """텍스트에서 처음 나오는 괄호 짝이 맞는 JSON 조각 (닫히지 않았으면 None)"""
+    closer = "}" if opener == "{" else "]"
+    start = text.find(opener)
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1] if ch == closer else None
+    return None
+
+
+def normalize_question(question: dict) -> dict:
+    """모델이 자주 틀리는 표기를 스키마 형태로 맞춤 ("2"/"C" 정답, dict 선택지 등)"""
+    options = question.get("options")
+    if isinstance(options, dict):
+        question["options"] = list(options.values())
+    answer = question.get("correct_answer")
+    if isinstance(answer, str):
+        answer = answer.strip().lstrip("(").rstrip(".)")
+        # '③'.isdigit()도 True이므로 기호 정답을 먼저 확인하고, 읽을 수 없는 값은 그대로 둠 (검증에서 걸러짐)
+        if answer.upper() in ANSWER_LETTERS:
+            question["correct_answer"] = ANSWER_LETTERS[answer.upper()]
+        elif answer.isdecimal():
+            question["correct_answer"] = int(answer)
+    if isinstance(question.get("type"), str):
+        question["type"] = question["type"].strip()
+    return question
+
+
+def parse_questions(text: str) -> list:
+    """완성된 응답 텍스트 전체에서 문제 목록 추출
+
+    "questions" 배열을 찾지 못하면 처음 나오는 JSON 객체/배열에서 문제를 찾는다.
+    """
+    parser = QuestionStreamParser()
+    parser.feed(text)
+    if parser.questions:
+        return parser.questions
+    # 먼저 나오는 괄호부터 (최상위가 배열이면 배열 전체를 읽음)
+    for opener in sorted("{[", key=lambda c: (text.find(c) < 0, text.find(c))):
+        value = loads_lenient(extract_balanced(text, opener) or "null")
+        if isinstance(value, dict):
+            value = value.get("questions", [value] if "question_text" in value else [])
+        if isinstance(value, list):
+            questions = [normalize_question(q) for q in value if isinstance(q, dict)]
+            if questions:
+                return questions
+    return []
+
+
+def question_errors(question, expected_type: str = None, allowed_types=None) -> list:
+    """문제 1개의 형식 오류 목록 (비어 있으면 유효)"""
+    if not isinstance(question, dict):
+        return ["문제가 JSON 객체가 아닙니다"]
+    errors = []
+    if not isinstance(question.get("question_text"), str) or not question["question_text"].strip():
+        errors.append("question_text 누락")
+    options = question.get("options")
+    if not isinstance(options, list) or len(options) != 4 or not all(isinstance(o, str) and o.strip() for o in options):
+        errors.append("선택지는 정확히 4개의 문자열이어야 합니다")
+    answer = question.get("correct_answer")
+    if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer <= 3:
+        errors.append("correct_answer는 0-3 사이 정수여야 합니다")
+    if expected_type is not None and question.get("type") != expected_type:
+        errors.append(f"문제 유형 불일치: {question.get('type')!r} (요청: {expected_type})")
+    elif allowed_types is not None and question.get("type") not in allowed_types:
+        errors.append(f"알 수 없는 문제 유형: {question.get('type')!r}")
+    return errors
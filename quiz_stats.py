@@ -0,0 +1,213 @@
+# ============================================================================
+# 퀴즈별 사전 집계 통계 (quiz_stats 컬렉션)
+# ============================================================================
+# 결과가 저장될 때마다 같은 WriteBatch 안에서 퀴즈(및 학급) 집계 문서를
+# Increment / Minimum / Maximum 변환으로 갱신한다. 읽기 없이 서버에서 합산되므로
+# 대시보드는 결과 N개 대신 퀴즈당 문서 1개만 읽으면 된다.
+import math
+from collections import Counter
+from datetime import datetime
+
+from firebase_admin import firestore
+
+from item_analysis import item_totals
+
+STATS_COLLECTION = "quiz_stats"
+CLASS_SUBCOLLECTION = "classes"
+
+
+def quiz_stats_ref(db, quiz_id: str, class_code: str = None):
+    """퀴즈 전체 또는 학급별 집계 문서 참조"""
+    ref = db.collection(STATS_COLLECTION).document(quiz_id)
+    if class_code:
+        ref = ref.collection(CLASS_SUBCOLLECTION).document(class_code)
+    return ref
+
+
+def stats_increment(score: int, total_questions: int, correct_flags: list = None) -> dict:
+    """결과 1건을 집계 문서에 반영하는 필드 변환 (set(..., merge=True)용)"""
+    return stats_increment_many([
+        {"score": score, "total_questions": total_questions, "correct_flags": correct_flags}
+    ])
+
+
+def stats_increment_many(rows: list) -> dict:
+    """같은 퀴즈의 결과 여러 건을 변환 하나로 합침 (쓰기 1회로 N건 반영)"""
+    scores = [row["score"] for row in rows]
+    histogram = Counter(str(score) for score in scores)
+    update = {
+        "count": firestore.Increment(len(rows)),
+        "score_sum": firestore.Increment(sum(scores)),
+        "score_sq_sum": firestore.Increment(sum(score * score for score in scores)),
+        "score_min": firestore.Minimum(min(scores)),
+        "score_max": firestore.Maximum(max(scores)),
+        "total_questions": rows[-1]["total_questions"],
+        "histogram": {score: firestore.Increment(n) for score, n in histogram.items()},
+        "updated_at": datetime.now(),
+    }
+    question_correct = Counter()
+    has_flags = False
+    for row in rows:
+        if row.get("correct_flags") is None:
+            continue
+        has_flags = True
+        for i, correct in enumerate(row["correct_flags"]):
+            question_correct[str(i)] += 1 if correct else 0
+    if has_flags:
+        update["question_correct"] = {i: firestore.Increment(n) for i, n in question_correct.items()}
+        update["items"] = _increments(item_totals(rows))
+    return update
+
+
+def _increments(totals: dict) -> dict:
+    """합계 dict → Increment 변환 (merge=True에서 기존 맵을 비우지 않도록 빈 맵은 뺌)"""
+    update = {}
+    for key, value in totals.items():
+        if isinstance(value, dict):
+            value = _increments(value)
+            if value:
+                update[key] = value
+        else:
+            update[key] = firestore.Increment(value)
+    return update
+
+
+def stats_keys(rows: list) -> set:
+    """결과 목록이 갱신하는 집계 문서 키 (quiz_id, class_code) 집합"""
+    keys = set()
+    for row in rows:
+        keys.add((row["quiz_id"], None))
+        if row.get("class_code"):
+            keys.add((row["quiz_id"], row["class_code"]))
+    return keys
+
+
+def add_result_to_batch(batch, db, quiz_id: str, score: int, total_questions: int,
+                        correct_flags: list = None, class_code: str = None):
+    """결과 저장 batch에 퀴즈/학급 집계 갱신을 추가"""
+    add_results_to_batch(batch, db, [{
+        "quiz_id": quiz_id, "score": score, "total_questions": total_questions,
+        "correct_flags": correct_flags, "class_code": class_code,
+    }])
+
+
+def add_results_to_batch(batch, db, rows: list) -> int:
+    """결과 여러 건의 집계 갱신을 집계 문서당 쓰기 1회로 합쳐 batch에 추가 (추가한 쓰기 수 반환)"""
+    groups = {}
+    for row in rows:
+        for key in stats_keys([row]):
+            groups.setdefault(key, []).append(row)
+    for (quiz_id, class_code), group in groups.items():
+        document = {"quiz_id": quiz_id, **stats_increment_many(group)}
+        if class_code:
+            document["class_code"] = class_code
+        batch.set(quiz_stats_ref(db, quiz_id, class_code), document, merge=True)
+    return len(groups)
+
+
+def get_quiz_stats(db, quiz_id: str, class_code: str = None):
+    """집계 문서 1개 조회 (없으면 None)"""
+    snapshot = quiz_stats_ref(db, quiz_id, class_code).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def get_all_quiz_stats(db) -> list:
+    """모든 퀴즈의 집계 문서 조회 (퀴즈 수만큼만 읽음)"""
+    docs = db.collection(STATS_COLLECTION).order_by(
+        "updated_at", direction=firestore.Query.DESCENDING
+    ).stream()
+    return [doc.to_dict() for doc in docs]
+
+
+def summarize(stats: dict) -> dict:
+    """집계 문서에서 평균/표준편차/최소/최대 계산"""
+    count = stats.get("count", 0)
+    if not count:
+        return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0, "max": 0}
+    mean = stats.get("score_sum", 0) / count
+    variance = max(stats.get("score_sq_sum", 0) / count - mean * mean, 0.0)
+    return {
+        "count": count,
+        "mean": mean,
+        "std": math.sqrt(variance),
+        "min": stats.get("score_min", 0),
+        "max": stats.get("score_max", 0),
+    }
+
+
+def combine(stats_list) -> dict:
+    """여러 집계 문서를 하나로 합침 (전체 요약용)"""
+    combined = {"count": 0, "score_sum": 0, "score_sq_sum": 0}
+    for stats in stats_list:
+        if not stats.get("count"):
+            continue
+        combined["count"] += stats["count"]
+        combined["score_sum"] += stats.get("score_sum", 0)
+        combined["score_sq_sum"] += stats.get("score_sq_sum", 0)
+        for key, pick in (("score_min", min), ("score_max", max)):
+            if key in stats:
+                combined[key] = pick(combined[key], stats[key]) if key in combined else stats[key]
+    return combined
+
+
+def stats_document(rows: list) -> dict:
+    """결과 목록 → 집계 문서 전체 값 (재계산용, Increment 없이 그대로 덮어씀)"""
+    scores = [row.get("score", 0) for row in rows]
+    question_correct = Counter()
+    for row in rows:
+        for i, correct in enumerate(row.get("correct_flags") or []):
+            question_correct[str(i)] += int(bool(correct))
+    return {
+        "count": len(rows),
+        "score_sum": sum(scores),
+        "score_sq_sum": sum(score * score for score in scores),
+        "score_min": min(scores),
+        "score_max": max(scores),
+        "total_questions": rows[-1].get("total_questions", 0),
+        "histogram": dict(Counter(str(score) for score in scores)),
+        "question_correct": dict(question_correct),
+        "items": item_totals(rows),
+    }
+
+
+def rebuild_quiz_stats(db, results_collection: str = "results") -> int:
+    """기존 results 문서로부터 퀴즈 전체 / 학급별 집계 문서를 모두 다시 계산해 덮어씀
+
+    결과가 없어진 퀴즈·학급의 집계 문서는 지운다. 재채점이 중간에 실패하는 등 Increment가
+    어긋났을 때의 복구 경로이므로 학급별 문서까지 함께 맞춘다. 다시 계산한 퀴즈 수 반환.
+    """
+    groups = {}
+    for doc in db.collection(results_collection).stream():
+        row = doc.to_dict()
+        if not row.get("quiz_id"):
+            continue
+        for key in stats_keys([row]):
+            groups.setdefault(key, []).append(row)
+
+    stale = []
+    for doc in db.collection(STATS_COLLECTION).stream():
+        for class_doc in quiz_stats_ref(db, doc.id).collection(CLASS_SUBCOLLECTION).stream():
+            if (doc.id, class_doc.id) not in groups:
+                stale.append((doc.id, class_doc.id))
+        if (doc.id, None) not in groups:
+            stale.append((doc.id, None))
+
+    batch = db.batch()
+    staged = 0
+    for (quiz_id, class_code), rows in groups.items():
+        document = {"quiz_id": quiz_id, **stats_document(rows), "updated_at": datetime.now()}
+        if class_code:
+            document["class_code"] = class_code
+        batch.set(quiz_stats_ref(db, quiz_id, class_code), document)
+        staged += 1
+        if staged % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    for quiz_id, class_code in stale:
+        batch.delete(quiz_stats_ref(db, quiz_id, class_code))
+        staged += 1
+        if staged % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return sum(1 for _, class_code in groups if class_code is None)
@@ -0,0 +1,175 @@
+# ============================================================================
+# 영어 지문 난이도 측정 (API 호출 없음, 순수 Python)
+# ============================================================================
+# Flesch-Kincaid 학년 / Flesch 읽기 용이도 / 문장 길이 통계와
+# Lexile과 비슷한 척도의 추정치를 계산한다. 실제 Lexile 측정기는 대규모 말뭉치의
+# 단어 빈도를 쓰지만, 여기서는 고빈도 어휘 표 밖의 단어 비율로 대신한다.
+# (목표 구간 안/밖 판정용 추정치이며 공식 Lexile 수치가 아님)
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from textbooks import LEXILE_TARGETS
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+# 추정 Lexile = A * ln(평균 문장 길이) + B * 저빈도 어휘 비율 + C
+# (짧은 문장·기초 어휘의 쉬운 재작성 ≈ 650-700, 교과서 본문 ≈ 1000, 학술 문장 ≈ 1500이 되도록 맞춘 계수.
+#  textbooks.LEXILE_TARGETS의 쉬움 600-800 / 어려움 1200+ 구간과 같은 척도)
+LEXILE_A = 194.0
+LEXILE_B = 1005.0
+LEXILE_C = 272.0
+# 추정치 오차를 감안해 목표 구간 밖으로 이만큼까지는 허용
+DEFAULT_TOLERANCE = 100
+
+# 모음 묶음 규칙이 틀리는 단어의 음절 수
+SYLLABLE_EXCEPTIONS = {
+    "the": 1, "are": 1, "were": 1, "there": 1, "where": 1, "here": 1, "one": 1, "once": 1,
+    "some": 1, "come": 1, "done": 1, "gone": 1, "give": 1, "live": 1, "love": 1, "move": 1,
+    "have": 1, "whole": 1, "every": 3, "everyone": 4, "everything": 4,
+    "business": 3, "different": 3, "interesting": 4, "family": 3, "people": 2, "little": 2,
+    "simple": 2, "example": 3, "able": 2, "table": 2, "idea": 3, "area": 3, "really": 3,
+    "create": 2, "science": 2, "quiet": 2, "poem": 2, "being": 2, "doing": 2, "going": 2,
+    "seeing": 2, "lion": 2, "real": 1, "toward": 2, "towards": 2, "society": 4, "anxiety": 4,
+    "variety": 4, "experience": 4, "audience": 3, "radio": 3, "video": 3, "museum": 3,
+    "ourselves": 2, "yourself": 2, "themselves": 2, "something": 2, "sometimes": 2,
+    "somewhere": 2, "someone": 2, "lives": 1, "changed": 1, "believed": 2, "loved": 1,
+}
+
+# 고빈도 영어 기초 어휘 (원형 기준, 활용형은 _is_common에서 처리)
+COMMON_WORDS = frozenset("""
+a about above across act add afraid after again against age ago agree air all allow almost alone
+along already also always am among an and angry animal another answer any anyone anything appear
+apple are area arm around arrive art as ask at away baby back bad bag ball bank be beautiful because
+become bed been before begin behind believe best better between big bird black blue boat body book
+born both box boy bread break bring brother build busy but buy by call can car care carry case cat
+catch cause center certain chair chance change child children city class clean clear close cold
+color come common community complete cook cool could country course cry cup cut dance dark daughter
+day dead dear decide deep did die different difficult dinner do doctor does dog door down draw dream
+drink drive during each ear early earth easy eat education egg eight either else end enjoy enough
+even evening ever every everyone everything example eye face fact fall family famous far farm fast
+father fear feel few field fight fill find fine finish fire first fish five floor fly follow food
+foot for forget form four free friend from front full fun future game garden get girl give glad go
+good great green ground group grow guess hair half hand happen happy hard has hat have he head health
+healthy hear heart help her here high him his hold home hope hot hour house how however hundred
+i idea if important in inside interest into is it its job join just keep kid kind know land language
+large last late later laugh learn least leave left leg less let letter life light like line list
+listen little live long look lose lot love low machine make man many map may me mean meet member
+might mind minute miss moment money month more morning most mother move much music must my name near
+need never new news next nice night nine no not nothing now number of off offer often oh old on once
+one only open or other our out outside over own page paper parent part party pass past pay people
+perhaps person pick picture piece place plan plant play please point poor possible power problem
+problems put question quick quiet rain reach read ready real really reason red remember rest right
+river road rock room run sad safe same save say school sea second see seem sell send sentence set
+seven several shall she ship short should show side simple since sing sister sit six size skill sleep
+slow small smile so some someone something sometimes son song soon sorry sound speak special spend
+sport stand start state stay still stop story street strong student study such summer sun support
+sure swim table take talk teach teacher team tell ten than thank that the their them then there these
+they thing think this those though thought three through time to today together too top toward town
+tree true try turn two under understand until up us use very visit voice wait walk wall want war warm
+was watch water way we wear weather week well went were what when where which while white who whole
+why will win window winter wish with without woman women word work world worry would write wrong
+year yes yesterday yet you young your yourself ourselves themselves myself himself herself
+began came felt found gave got kept knew made ran said sat saw told took
+""".split())
+
+
+@dataclass(frozen=True)
+class ReadabilityReport:
+    words: int
+    sentences: int
+    syllables: int
+    mean_sentence_length: float
+    sentence_length_std: float
+    max_sentence_length: int
+    syllables_per_word: float
+    rare_word_ratio: float
+    flesch_reading_ease: float
+    flesch_kincaid_grade: float
+    lexile: int
+
+
+@lru_cache(maxsize=20000)
+def count_syllables(word: str) -> int:
+    """단어 하나의 음절 수 (예외 표 → 모음 묶음 규칙)"""
+    word = word.lower().strip("'")
+    if word in SYLLABLE_EXCEPTIONS:
+        return SYLLABLE_EXCEPTIONS[word]
+    if len(word) <= 3:
+        return 1
+    if word.endswith("'s"):
+        word = word[:-2]
+    if word.endswith("e") and not word.endswith(("le", "ee", "ie", "ye")):
+        word = word[:-1]
+    elif word.endswith(("es", "ed")) and not word.endswith(("ted", "ded", "ses", "zes", "ces", "ges", "shes", "ches", "xes")):
+        word = word[:-2]
+    return max(1, len(VOWEL_GROUP_RE.findall(word)))
+
+
+@lru_cache(maxsize=20000)
+def _is_common(word: str) -> bool:
+    word = word.lower()
+    if word in COMMON_WORDS:
+        return True
+    for suffix, replacement in (("'s", ""), ("s", ""), ("es", ""), ("ies", "y"), ("ed", ""), ("ed", "e"),
+                                ("ing", ""), ("ing", "e"), ("er", ""), ("est", ""), ("ly", "")):
+        if word.endswith(suffix) and word[: -len(suffix)] + replacement in COMMON_WORDS:
+            return True
+    return False
+
+
+def split_sentences(text: str) -> list:
+    return [s for s in SENTENCE_SPLIT_RE.split(" ".join(text.split())) if WORD_RE.search(s)]
+
+
+def analyze(text: str) -> ReadabilityReport:
+    """지문 난이도 지표 계산"""
+    lengths = []
+    words = []
+    for sentence in split_sentences(text):
+        sentence_words = WORD_RE.findall(sentence)
+        lengths.append(len(sentence_words))
+        words.extend(sentence_words)
+    if not words:
+        return ReadabilityReport(0, 0, 0, 0.0, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0)
+
+    n_words = len(words)
+    n_sentences = len(lengths)
+    syllables = sum(count_syllables(w) for w in words)
+    mean_length = n_words / n_sentences
+    std_length = math.sqrt(sum((n - mean_length) ** 2 for n in lengths) / n_sentences)
+    per_word = syllables / n_words
+    rare_ratio = sum(1 for w in words if not _is_common(w)) / n_words
+    lexile = LEXILE_A * math.log(max(mean_length, 1.0)) + LEXILE_B * rare_ratio + LEXILE_C
+    return ReadabilityReport(
+        words=n_words,
+        sentences=n_sentences,
+        syllables=syllables,
+        mean_sentence_length=round(mean_length, 2),
+        sentence_length_std=round(std_length, 2),
+        max_sentence_length=max(lengths),
+        syllables_per_word=round(per_word, 3),
+        rare_word_ratio=round(rare_ratio, 3),
+        flesch_reading_ease=round(206.835 - 1.015 * mean_length - 84.6 * per_word, 1),
+        flesch_kincaid_grade=round(0.39 * mean_length + 11.8 * per_word - 15.59, 1),
+        lexile=int(round(min(max(lexile, 0), 2000), -1)),
+    )
+
+
+def level_gap(lexile: int, difficulty: str, tolerance: int = DEFAULT_TOLERANCE) -> int:
+    """목표 구간 대비 차이 (0이면 구간 안, 음수면 너무 쉬움, 양수면 너무 어려움)"""
+    low, high = LEXILE_TARGETS.get(difficulty, (None, None))
+    if low is not None and lexile < low - tolerance:
+        return lexile - low
+    if high is not None and lexile > high + tolerance:
+        return lexile - high
+    return 0
+
+
+def format_level(report: ReadabilityReport) -> str:
+    """화면 표시용 한 줄 요약"""
+    return (f"추정 Lexile ≈ {report.lexile}L · FK 학년 {report.flesch_kincaid_grade} · "
+            f"평균 문장 {report.mean_sentence_length}단어 · {report.words}단어")
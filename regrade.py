@@ -0,0 +1,328 @@
+# ============================================================================
+# 정답 수정 후 일괄 재채점
+# ============================================================================
+# 모델이 만든 정답이 틀렸을 때 교사가 정답 문서를 고치면, 그 퀴즈의 모든 제출을
+# (제출 수 × 문항 수) NumPy 행렬로 읽어 새 정답과 한 번에 비교한다.
+# 점수나 문항별 정답 여부가 바뀐 results 문서만 WriteBatch(최대 500 쓰기)로 고치고,
+# 퀴즈 집계(quiz_stats, 학급별 포함)와 숙련도 문서에는 바뀐 만큼만 Increment로 더하므로
+# 재채점 중에 들어온 새 제출의 집계를 덮어쓰지 않는다.
+# 학생 답(answers)이나 문항별 정답 여부가 저장되지 않은 옛 결과는 다시 채점할 수 없어 그대로 둔다.
+#
+# 재채점은 원자적이지 않다. batch 여러 개로 나누어 커밋하므로 중간에 실패하면 일부 결과만
+# 고쳐진 채 RegradeError(커밋된 batch 수 포함)가 발생한다. 다시 실행하면 남은 결과만 고치고,
+# 이미 커밋된 결과의 집계 변화량은 다시 더해지지 않으므로 "통계 재계산"으로 집계를 맞춘다.
+# 앱의 write-behind 큐에 남은 제출은 읽을 수 없으므로, 앱에서는 큐를 먼저 비운 뒤 재채점하고
+# 명령줄로 실행할 때는 앱의 정답 캐시(최대 10분)가 지난 뒤 한 번 더 실행한다.
+#
+# 사용법:
+#     python regrade.py QUIZ_ID --dry-run            # 현재 정답으로 바뀌는 점수만 확인
+#     python regrade.py QUIZ_ID --answers 0,2,1,3    # 정답 수정 후 재채점
+import argparse
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from firebase_admin import firestore
+
+import datastore
+import mastery
+import quiz_stats
+from item_analysis import UNANSWERED, answer_matrix, flag_matrix
+from results_query import RESULTS_COLLECTION, score_band
+
+MAX_BATCH_WRITES = 500
+SUBMISSION_FIELDS = ["id", "quiz_id", "student_name", "class_code", "score", "total_questions",
+                     "answers", "correct_flags", "question_types", "timestamp"]
+
+
+@dataclass(frozen=True)
+class RegradeReport:
+    quiz_id: str
+    submissions: int        # 읽은 제출 수
+    regraded: int           # 학생 답과 정답 여부가 있어 다시 채점한 제출 수
+    changed: int            # 점수 또는 문항별 정답 여부가 바뀐 제출 수
+    mean_before: float
+    mean_after: float
+    writes: int
+    batches: int            # 커밋한 batch 수
+    seconds: float
+
+
+class RegradeError(Exception):
+    """재채점 쓰기가 중간에 실패함 (앞쪽 batch는 이미 커밋됨)"""
+
+    def __init__(self, quiz_id: str, batches: int, writes: int, cause: Exception):
+        super().__init__(f"{quiz_id} 재채점이 중간에 실패했습니다 (batch {batches}개, 쓰기 {writes}회 커밋됨): {cause}. "
+                         "다시 실행한 뒤 \"통계 재계산\"으로 집계를 맞추세요.")
+        self.quiz_id = quiz_id
+        self.batches = batches
+        self.writes = writes
+
+
+# ============================================================================
+# 정답 수정
+# ============================================================================
+def update_answer_key(db, quiz_id: str, answers: list):
+    """정답 문서와 교사용 퀴즈 문서의 정답을 함께 수정 (학생용 문서에는 정답이 없으므로 그대로)"""
+    quiz_data = datastore.get_quiz(db, quiz_id)
+    if quiz_data is None:
+        raise ValueError(f"퀴즈를 찾을 수 없습니다: {quiz_id}")
+    questions = quiz_data.get("questions", [])
+    if len(answers) != len(questions):
+        raise ValueError(f"정답 수({len(answers)})가 문항 수({len(questions)})와 다릅니다.")
+    for question, answer in zip(questions, answers):
+        question["correct_answer"] = int(answer)
+    batch = db.batch()
+    batch.set(db.collection(datastore.QUIZ_COLLECTION).document(quiz_id),
+              {"questions": questions, "answer_key_updated_at": datetime.now()}, merge=True)
+    batch.set(db.collection(datastore.ANSWER_KEY_COLLECTION).document(quiz_id),
+              {**datastore.answer_key_document({**quiz_data, "questions": questions}), "updated_at": datetime.now()})
+    batch.commit()
+
+
+# ============================================================================
+# 벡터화 채점
+# ============================================================================
+def regrade_matrix(answers: np.ndarray, key) -> tuple:
+    """학생 답 행렬과 정답 벡터를 한 번에 비교 → (문항별 정답 여부 행렬, 점수 벡터)"""
+    key = np.array([UNANSWERED if v is None else int(v) for v in key], dtype=np.int16)
+    flags = (answers == key[None, :]) & (answers != UNANSWERED)
+    return flags, flags.sum(axis=1)
+
+
+# ============================================================================
+# 재채점 + 쓰기
+# ============================================================================
+def load_submissions(db, quiz_id: str, collection: str = RESULTS_COLLECTION) -> list:
+    """퀴즈의 모든 제출 (재채점에 필요한 필드만 읽음)"""
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    query = db.collection(collection).where(filter=FieldFilter("quiz_id", "==", quiz_id)).select(SUBMISSION_FIELDS)
+    rows = []
+    for doc in query.stream():
+        row = doc.to_dict()
+        row["id"] = doc.id
+        if isinstance(row.get("timestamp"), datetime):
+            row["timestamp"] = row["timestamp"].replace(tzinfo=None)
+        rows.append(row)
+    return rows
+
+
+class _BatchWriter:
+    """MAX_BATCH_WRITES마다 커밋하는 WriteBatch"""
+
+    def __init__(self, db):
+        self._db = db
+        self._batch = db.batch()
+        self._staged = 0
+        self.writes = 0         # 커밋된 쓰기 수
+        self.batches = 0        # 커밋된 batch 수
+
+    def set(self, ref, document, merge=False):
+        self._batch.set(ref, document, merge=merge)
+        self._count()
+
+    def update(self, ref, fields):
+        self._batch.update(ref, fields)
+        self._count()
+
+    def _count(self):
+        self._staged += 1
+        if self._staged >= MAX_BATCH_WRITES:
+            self.commit()
+
+    def commit(self):
+        if self._staged:
+            self._batch.commit()
+            self.writes += self._staged
+            self.batches += 1
+            self._batch = self._db.batch()
+            self._staged = 0
+
+
+def regrade_quiz(db, quiz_id: str, key: list = None, collection: str = RESULTS_COLLECTION,
+                 dry_run: bool = False) -> RegradeReport:
+    """저장된 정답(또는 key)으로 퀴즈의 모든 제출을 다시 채점하고 바뀐 것만 반영
+
+    원자적이지 않음: 쓰기가 중간에 실패하면 RegradeError (커밋된 batch / 쓰기 수 포함)
+    """
+    started = time.perf_counter()
+    if key is None:
+        answer_key = datastore.get_answer_key(db, quiz_id)
+        if answer_key is None:
+            raise ValueError(f"정답 정보를 찾을 수 없습니다: {quiz_id}")
+        key = answer_key["answers"]
+    rows = load_submissions(db, quiz_id, collection)
+    gradable = [row for row in rows if row.get("answers") and row.get("correct_flags") is not None]
+    question_count = len(key)
+
+    answers = answer_matrix(gradable, question_count)
+    old_flags = flag_matrix(gradable, question_count)
+    old_scores = np.array([row.get("score", 0) for row in gradable], dtype=np.int64)
+    new_flags, new_scores = regrade_matrix(answers, key)
+    changed = (new_scores != old_scores) | (new_flags != old_flags).any(axis=1)
+    for row in gradable:
+        row.setdefault("total_questions", question_count)
+
+    all_scores = np.array([row.get("score", 0) for row in rows], dtype=np.int64)
+    mean_before = float(all_scores.mean()) if len(rows) else 0.0
+    mean_after = float((all_scores.sum() - old_scores.sum() + new_scores.sum()) / len(rows)) if len(rows) else 0.0
+
+    writer = _BatchWriter(db)
+    if not dry_run and changed.any():
+        changed_idx = np.flatnonzero(changed)
+        try:
+            for i in changed_idx:
+                row = gradable[i]
+                writer.update(db.collection(collection).document(row["id"]), {
+                    "score": int(new_scores[i]),
+                    "score_band": score_band(int(new_scores[i]), row["total_questions"]),
+                    "correct_flags": new_flags[i].tolist(),
+                    "regraded_at": datetime.now(),
+                })
+            _write_stats_deltas(writer, db, quiz_id, rows, gradable, changed_idx, old_scores, new_scores,
+                                old_flags, new_flags)
+            _write_mastery_deltas(writer, db, gradable, changed_idx, old_flags, new_flags)
+            writer.commit()
+        except Exception as e:
+            print(f"[regrade] {quiz_id}: batch {writer.batches}개 커밋 후 실패 ({e})", flush=True)
+            raise RegradeError(quiz_id, writer.batches, writer.writes, e) from e
+    return RegradeReport(quiz_id, len(rows), len(gradable), int(changed.sum()), mean_before, mean_after,
+                         writer.writes, writer.batches, time.perf_counter() - started)
+
+
+def _write_stats_deltas(writer, db, quiz_id, rows, gradable, changed_idx, old_scores, new_scores,
+                        old_flags, new_flags):
+    """퀴즈 전체 / 학급별 집계 문서에 점수 변화량을 Increment로 반영
+
+    최소/최대는 바깥쪽으로 넓어질 때만 Minimum/Maximum 변환으로 갱신해서 재채점 중에 들어온 제출을
+    덮어쓰지 않는다. 안쪽으로 좁아질 때는(가장 낮던 제출의 점수가 오른 경우 등) 변환으로 표현할 수 없어
+    재채점 후 값으로 덮어쓰므로, 그사이 들어온 제출이 더 낮거나 높으면 "통계 재계산"으로 맞춘다.
+    """
+    new_by_id = {row["id"]: int(score) for row, score in zip(gradable, new_scores)}
+    all_old_scores = np.array([row.get("score", 0) for row in rows], dtype=np.int64)
+    all_scores = np.array([new_by_id.get(row["id"], row.get("score", 0)) for row in rows], dtype=np.int64)
+    all_classes = np.array([row.get("class_code") or "" for row in rows], dtype=object)
+    classes = np.array([row.get("class_code") or "" for row in gradable], dtype=object)
+    groups = {None: changed_idx}
+    for class_code in set(classes[changed_idx]) - {""}:
+        groups[class_code] = changed_idx[classes[changed_idx] == class_code]
+
+    for class_code, idx in groups.items():
+        old, new = old_scores[idx], new_scores[idx]
+        in_group = slice(None) if class_code is None else all_classes == class_code
+        scores, before = all_scores[in_group], all_old_scores[in_group]
+        histogram = Counter(str(score) for score in new.tolist())
+        histogram.subtract(str(score) for score in old.tolist())
+        question_delta = new_flags[idx].sum(axis=0).astype(np.int64) - old_flags[idx].sum(axis=0)
+        # 문항 분석용 정답자 점수 합 (item_analysis의 items 맵)
+        correct_score_delta = new_flags[idx].T.astype(np.int64) @ new - old_flags[idx].T.astype(np.int64) @ old
+        document = {
+            "quiz_id": quiz_id,
+            "score_sum": firestore.Increment(int(new.sum() - old.sum())),
+            "score_sq_sum": firestore.Increment(int((new * new).sum() - (old * old).sum())),
+            "score_min": (firestore.Minimum(int(scores.min())) if scores.min() <= before.min()
+                          else int(scores.min())),
+            "score_max": (firestore.Maximum(int(scores.max())) if scores.max() >= before.max()
+                          else int(scores.max())),
+            "updated_at": datetime.now(),
+        }
+        # merge=True에서 빈 맵은 기존 맵을 비우므로 바뀐 항목이 있을 때만 넣음
+        histogram = {score: firestore.Increment(n) for score, n in histogram.items() if n}
+        question_correct = {str(q): firestore.Increment(int(n)) for q, n in enumerate(question_delta) if n}
+        if histogram:
+            document["histogram"] = histogram
+        if question_correct:
+            document["question_correct"] = question_correct
+        document["items"] = {
+            "score_sum": document["score_sum"],
+            "score_sq_sum": document["score_sq_sum"],
+        }
+        correct_score_sum = {str(q): firestore.Increment(int(n)) for q, n in enumerate(correct_score_delta) if n}
+        if correct_score_sum:
+            document["items"]["correct_score_sum"] = correct_score_sum
+        if question_correct:
+            document["items"]["correct"] = question_correct
+        if class_code:
+            document["class_code"] = class_code
+        writer.set(quiz_stats.quiz_stats_ref(db, quiz_id, class_code), document, merge=True)
+
+
+def _write_mastery_deltas(writer, db, gradable, changed_idx, old_flags, new_flags):
+    """학생 / 학급 숙련도 문서에 유형별(주별 포함) 정답 수 변화량만 반영
+
+    숙련도는 correct_flags와 question_types가 있는 결과만 집계했으므로 같은 조건의 결과만 고친다.
+    """
+    delta = new_flags.astype(np.int64) - old_flags
+    updates, owners = {}, {}
+    for i in changed_idx:
+        row = gradable[i]
+        if row.get("correct_flags") is None or not row.get("question_types"):
+            continue
+        week = mastery.week_key(row.get("timestamp") or datetime.now())
+        for key in mastery.mastery_keys([row]):
+            owners[key] = row
+            counts = updates.setdefault(key, Counter())
+            for q in np.flatnonzero(delta[i]):
+                if q >= len(row["question_types"]):
+                    continue
+                question_type = row["question_types"][q] or mastery.UNKNOWN_TYPE
+                counts[(question_type, None)] += int(delta[i, q])
+                counts[(question_type, week)] += int(delta[i, q])
+
+    for key, counts in updates.items():
+        _, collection, doc_id = key
+        types = {}
+        for (question_type, week), n in counts.items():
+            if not n:
+                continue
+            entry = types.setdefault(question_type, {})
+            if week is None:
+                entry["correct"] = firestore.Increment(n)
+            else:
+                entry.setdefault("weeks", {})[week] = {"correct": firestore.Increment(n)}
+        if not types:
+            continue
+        document = {"correct": firestore.Increment(sum(n for (_, week), n in counts.items() if week is None)),
+                    "types": types}
+        row = owners[key]
+        if collection == mastery.STUDENT_COLLECTION:
+            document["student_name"] = mastery.normalize_name(row["student_name"])
+        if row.get("class_code"):
+            document["class_code"] = row["class_code"]
+        writer.set(db.collection(collection).document(doc_id), document, merge=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="정답 수정 후 퀴즈 제출 일괄 재채점")
+    parser.add_argument("quiz_id")
+    parser.add_argument("--answers", help="새 정답 (문항 순서대로 0-3, 쉼표로 구분). 생략하면 저장된 정답으로 재채점")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 바뀌는 제출 수만 확인")
+    args = parser.parse_args(argv)
+
+    from batch_generate import load_local_secrets
+
+    db = datastore.init_firebase_app(load_local_secrets())
+    key = None
+    if args.answers:
+        key = [int(v) for v in args.answers.split(",")]
+        if not args.dry_run:
+            update_answer_key(db, args.quiz_id, key)
+    try:
+        report = regrade_quiz(db, args.quiz_id, key=key, dry_run=args.dry_run)
+    except RegradeError as e:
+        print(str(e))
+        return 1
+    print(f"제출 {report.submissions}건 중 {report.regraded}건 재채점, {report.changed}건 변경 "
+          f"(평균 {report.mean_before:.2f} → {report.mean_after:.2f}, 쓰기 {report.writes}회 / batch {report.batches}개, "
+          f"{report.seconds:.2f}초)")
+    if args.answers and not args.dry_run:
+        print("앱이 실행 중이면 정답 캐시(최대 10분)가 지난 뒤 한 번 더 실행해 그사이 채점된 제출도 고치세요.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# ============================================================================
+# 학생 결과 write-behind 큐
+# ============================================================================
+# 수업 종료 직후 학급 전체가 동시에 제출하면 제출마다 Firestore 커밋이 한 번씩
+# 일어난다. 제출은 로컬 저널(JSONL)에 먼저 기록하고 즉시 응답한 뒤,
+# 백그라운드 스레드가 모아서 WriteBatch(최대 500 쓰기) 단위로 커밋한다.
+# 같은 퀴즈의 집계 / 같은 학생의 숙련도 갱신은 batch 안에서 문서당 쓰기 1회로 합쳐진다.
+#
+# 저널은 커밋이 끝난 항목을 제외하고 다시 쓰므로, 프로세스가 재시작되면
+# 남아 있는 항목을 다시 큐에 넣는다. results 문서는 id로 저장되어 재전송해도
+# 중복되지 않지만, 커밋 직후 저널 갱신 전에 종료되면 집계가 한 번 더 더해질 수 있다
+# (그 경우 대시보드의 "통계 재계산"으로 바로잡는다).
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import mastery
+import quiz_stats
+
+DEFAULT_JOURNAL_PATH = os.path.join(".cache", "pending_results.jsonl")
+MAX_BATCH_WRITES = 500
+
+
+def _encode(result_data: dict) -> str:
+    row = dict(result_data)
+    if isinstance(row.get("timestamp"), datetime):
+        row["timestamp"] = row["timestamp"].isoformat()
+    return json.dumps(row, ensure_ascii=False)
+
+
+def _aggregate_keys(rows: list) -> set:
+    """결과 목록이 함께 갱신하는 집계 문서 (퀴즈 통계 + 숙련도)"""
+    return quiz_stats.stats_keys(rows) | mastery.mastery_keys(rows)
+
+
+def _decode(line: str) -> dict:
+    row = json.loads(line)
+    if isinstance(row.get("timestamp"), str):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+class ResultWriter:
+    """프로세스 공용 결과 저장 큐 (st.cache_resource로 한 번만 생성)"""
+
+    def __init__(self, db, journal_path: str = DEFAULT_JOURNAL_PATH, collection: str = "results",
+                 flush_interval: float = 2.0, flush_size: int = 200, max_batch_writes: int = MAX_BATCH_WRITES,
+                 max_backoff: float = 60.0, on_flush=None):
+        self._db = db
+        self._journal_path = journal_path
+        self._collection = collection
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._max_batch_writes = max_batch_writes
+        self._max_backoff = max_backoff
+        self._on_flush = on_flush
+        self._lock = threading.Lock()             # _pending / 저널 파일 보호
+        self._flush_lock = threading.Lock()       # 동시에 flush 하나만
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._pending = self._load_journal()
+        self.committed = 0
+        self.commits = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+    def submit(self, result_data: dict) -> str:
+        """결과를 저널에 기록하고 큐에 넣은 뒤 바로 id 반환 (Firestore 커밋은 백그라운드)"""
+        line = _encode(result_data)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ResultWriter가 이미 종료되었습니다.")
+            with open(self._journal_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.append(result_data)
+            if len(self._pending) >= self._flush_size:
+                self._wakeup.set()
+        return result_data["id"]
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """대기 중인 결과를 모두 커밋하고 커밋한 건수 반환 (실패 시 예외, 항목은 큐에 남음)"""
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._pending)
+            flushed = 0
+            try:
+                for chunk in self._chunks(entries):
+                    batch = self._db.batch()
+                    for row in chunk:
+                        batch.set(self._db.collection(self._collection).document(row["id"]), row)
+                    quiz_stats.add_results_to_batch(batch, self._db, chunk)
+                    mastery.add_results_to_batch(batch, self._db, chunk)
+                    batch.commit()
+                    flushed += len(chunk)
+                    self.commits += 1
+            finally:
+                if flushed:
+                    self._acknowledge(flushed)
+            if flushed and self._on_flush:
+                self._on_flush()
+            return flushed
+
+    def close(self, timeout: float = 10.0):
+        """남은 결과를 커밋하고 백그라운드 스레드 종료"""
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+    def _chunks(self, entries: list):
+        """results 쓰기 + 집계 문서 쓰기가 max_batch_writes를 넘지 않도록 분할"""
+        chunk, keys = [], set()
+        for row in entries:
+            row_keys = keys | _aggregate_keys([row])
+            if chunk and len(chunk) + 1 + len(row_keys) > self._max_batch_writes:
+                yield chunk
+                chunk, row_keys = [], _aggregate_keys([row])
+            chunk.append(row)
+            keys = row_keys
+        if chunk:
+            yield chunk
+
+    def _acknowledge(self, flushed: int):
+        """커밋된 앞쪽 항목을 큐에서 빼고 저널을 남은 항목으로 교체"""
+        with self._lock:
+            del self._pending[:flushed]
+            self.committed += flushed
+            tmp_path = self._journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for row in self._pending:
+                    f.write(_encode(row) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._journal_path)
+
+    def _load_journal(self) -> list:
+        """이전 프로세스가 커밋하지 못한 결과 복구"""
+        os.makedirs(os.path.dirname(self._journal_path) or ".", exist_ok=True)
+        if not os.path.exists(self._journal_path):
+            return []
+        rows = []
+        with open(self._journal_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(_decode(line))
+                except ValueError:
+                    # 기록 도중 종료되어 잘린 마지막 줄
+                    continue
+        return rows
+
+    def _run(self):
+        backoff = self._flush_interval
+        while True:
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            with self._lock:
+                closed = self._closed
+                has_pending = bool(self._pending)
+            if closed:
+                return
+            if not has_pending:
+                continue
+            try:
+                self.flush()
+                self.last_error = None
+                backoff = self._flush_interval
+            except Exception as e:
+                self.last_error = e
+                backoff = min(backoff * 2, self._max_backoff)
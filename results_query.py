@@ -0,0 +1,97 @@
+# ============================================================================
+# 학생 결과 페이지 조회 (커서 기반 페이지네이션 + 서버 측 필터)
+# ============================================================================
+# results 컬렉션 전체를 읽지 않고, 화면에 보이는 한 페이지만 Firestore에서 가져온다.
+# 정렬은 (timestamp 내림차순, id 내림차순)이고 다음 페이지는 마지막 문서의
+# 두 값으로 start_after 한다. 필터 조합별 복합 색인은 firestore.indexes.json 참고.
+from dataclasses import dataclass
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+RESULTS_COLLECTION = "results"
+EQUALITY_FIELDS = ("quiz_id", "class_code", "student_name", "score_band")
+
+# 정답률(%) 구간: 저장 값 → (이상, 미만)
+SCORE_BANDS = {
+    "0-39": (0, 40),
+    "40-59": (40, 60),
+    "60-79": (60, 80),
+    "80-100": (80, 101),
+}
+
+
+def score_band(score: int, total_questions: int) -> str:
+    """점수를 정답률 구간 값으로 변환 (results 문서의 score_band 필드)"""
+    percent = score / total_questions * 100 if total_questions else 0
+    for band, (low, high) in SCORE_BANDS.items():
+        if low <= percent < high:
+            return band
+    return "80-100"
+
+
+@dataclass(frozen=True)
+class ResultFilters:
+    """대시보드 필터 (None이면 적용하지 않음, 기간은 [start, end))"""
+    quiz_id: str = None
+    class_code: str = None
+    student_name: str = None
+    score_band: str = None
+    start: datetime = None
+    end: datetime = None
+
+
+def build_query(db, filters: ResultFilters, collection: str = RESULTS_COLLECTION):
+    """필터를 Firestore where 조건으로 변환"""
+    query = db.collection(collection)
+    for field in EQUALITY_FIELDS:
+        value = getattr(filters, field)
+        if value:
+            query = query.where(filter=FieldFilter(field, "==", value))
+    if filters.start:
+        query = query.where(filter=FieldFilter("timestamp", ">=", filters.start))
+    if filters.end:
+        query = query.where(filter=FieldFilter("timestamp", "<", filters.end))
+    return query
+
+
+def fetch_page(db, filters: ResultFilters, cursor: tuple = None, page_size: int = 50,
+               collection: str = RESULTS_COLLECTION) -> tuple:
+    """한 페이지 조회 → (결과 목록, 다음 페이지 커서 또는 None)
+
+    커서는 마지막 문서의 (timestamp, id)이며, 다음 페이지 존재 여부를 알기 위해 1건 더 읽는다.
+    """
+    query = build_query(db, filters, collection).order_by(
+        "timestamp", direction=firestore.Query.DESCENDING
+    ).order_by("id", direction=firestore.Query.DESCENDING)
+    if cursor:
+        query = query.start_after({"timestamp": cursor[0], "id": cursor[1]})
+    rows = [doc.to_dict() for doc in query.limit(page_size + 1).stream()]
+    if len(rows) <= page_size:
+        return rows, None
+    last = rows[page_size - 1]
+    return rows[:page_size], (last["timestamp"], last["id"])
+
+
+def count_results(db, filters: ResultFilters, collection: str = RESULTS_COLLECTION) -> int:
+    """필터에 맞는 결과 수 (count 집계 쿼리, 문서를 내려받지 않음)"""
+    aggregation = build_query(db, filters, collection).count(alias="total").get()
+    return int(aggregation[0][0].value)
+
+
+def backfill_score_bands(db, collection: str = RESULTS_COLLECTION) -> int:
+    """score_band 필드가 없는 예전 결과 문서에 값을 채움 (채운 문서 수 반환)"""
+    batch = db.batch()
+    updated = 0
+    for doc in db.collection(collection).stream():
+        row = doc.to_dict()
+        if "score_band" in row:
+            continue
+        batch.update(doc.reference, {"score_band": score_band(row.get("score", 0), row.get("total_questions", 0))})
+        updated += 1
+        if updated % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return updated
@@ -0,0 +1,100 @@
+# ============================================================================
+# 지문 변환 결과 캐시 (content-addressed)
+# ============================================================================
+# (원본 지문, 난이도, 모델, 프롬프트 버전)의 해시를 키로 사용한다.
+# 1단계: 프로세스 내 LRU, 2단계: 로컬 SQLite 파일 (세션/재시작 간 공유).
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = os.path.join(".cache", "rewrites.sqlite3")
+
+
+def rewrite_cache_key(original_passage: str, difficulty: str, model: str, prompt_version: str) -> str:
+    """지문 변환 요청을 식별하는 SHA-256 키"""
+    h = hashlib.sha256()
+    for part in (original_passage, difficulty, model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class RewriteCache:
+    """메모리 LRU + SQLite 2단 캐시 (스레드 안전)"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, memory_size: int = 256,
+                 max_rows: int = 5000, max_age_seconds: float = 90 * 24 * 3600):
+        self._memory = OrderedDict()
+        self._memory_size = memory_size
+        self._max_rows = max_rows
+        self._max_age = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rewrites ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except sqlite3.Error:
+            # 디스크를 쓸 수 없는 환경에서는 메모리 캐시만 사용
+            self._conn = None
+
+    def get(self, key: str):
+        """캐시된 변환 결과 반환 (없으면 None)"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._conn is None:
+                return None
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT text, created_at FROM rewrites WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            text, created_at = row
+            if now - created_at > self._max_age:
+                self._conn.execute("DELETE FROM rewrites WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE rewrites SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, text)
+            return text
+
+    def put(self, key: str, text: str):
+        """변환 결과 저장 (기존 값은 덮어씀)"""
+        with self._lock:
+            self._remember(key, text)
+            if self._conn is None:
+                return
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rewrites (key, text, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _remember(self, key: str, text: str):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        # 가장 오래 사용되지 않은 행부터 max_rows 초과분 삭제
+        self._conn.execute(
+            "DELETE FROM rewrites WHERE key IN ("
+            " SELECT key FROM rewrites ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self._max_rows,),
+        )
@@ -0,0 +1,61 @@
+# ============================================================================
+# 시작 시간 측정
+# ============================================================================
+# 스크립트 실행(rerun) 구간별 소요 시간과, 프로세스의 첫 실행(콜드 스타트) 여부를 기록한다.
+# 이 모듈이 처음 import 된 시점을 프로세스 시작 시각으로 본다.
+import threading
+import time
+
+PROCESS_STARTED = time.perf_counter()
+
+_lock = threading.Lock()
+_first_run_done = False
+_process_marks = {}
+
+
+def is_first_run() -> bool:
+    """프로세스에서 처음 호출될 때만 True (콜드 스타트 판별)"""
+    global _first_run_done
+    with _lock:
+        first = not _first_run_done
+        _first_run_done = True
+        return first
+
+
+def record_process_mark(name: str, seconds: float):
+    """프로세스에서 한 번만 일어나는 초기화 시간 기록 (예: Firestore 클라이언트 생성)"""
+    with _lock:
+        _process_marks[name] = seconds
+
+
+def process_marks() -> dict:
+    with _lock:
+        return dict(_process_marks)
+
+
+class StartupTimer:
+    """스크립트 1회 실행의 구간별 시간 측정"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.marks = []
+
+    def mark(self, name: str):
+        """직전 mark 이후 경과 시간을 name 구간으로 기록"""
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report_lines(self, cold_start: bool = False) -> list:
+        lines = [f"{name}: {seconds * 1000:.1f} ms" for name, seconds in self.marks]
+        lines.append(f"합계: {self.total * 1000:.1f} ms")
+        if cold_start:
+            lines.append(f"프로세스 시작 후 첫 화면까지: {(self._last - PROCESS_STARTED) * 1000:.1f} ms")
+        for name, seconds in process_marks().items():
+            lines.append(f"[1회] {name}: {seconds * 1000:.1f} ms")
+        return lines
@@ -0,0 +1,5 @@
+# 저장소 루트의 모듈(quiz_parser, item_analysis 등)을 바로 import할 수 있도록
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
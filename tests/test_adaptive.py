@@ -0,0 +1,116 @@
+import threading
+
+from adaptive import DEFAULT_DIFFICULTY, QuizPool, next_difficulty
+
+EASY, NORMAL, HARD = "쉬움 (Easy)", "보통 (Original)", "어려움 (Hard)"
+
+
+def _result(difficulty, score, total=5):
+    return {"difficulty": difficulty, "score": score, "total_questions": total}
+
+
+def test_first_quiz_starts_at_default():
+    decision = next_difficulty([])
+    assert decision.difficulty == DEFAULT_DIFFICULTY
+    assert decision.accuracy is None
+
+
+def test_keeps_level_until_enough_attempts():
+    decision = next_difficulty([_result(NORMAL, 5)])
+    assert decision.difficulty == NORMAL
+    assert decision.attempts == 1
+
+
+def test_promotes_and_demotes_one_step():
+    assert next_difficulty([_result(NORMAL, 5), _result(NORMAL, 4)]).difficulty == HARD
+    assert next_difficulty([_result(NORMAL, 1), _result(NORMAL, 2)]).difficulty == EASY
+    assert next_difficulty([_result(NORMAL, 3), _result(NORMAL, 4)]).difficulty == NORMAL
+
+
+def test_stays_at_the_ends_of_the_ladder():
+    assert next_difficulty([_result(HARD, 5), _result(HARD, 5)]).difficulty == HARD
+    assert next_difficulty([_result(EASY, 0), _result(EASY, 0)]).difficulty == EASY
+
+
+def test_uses_only_recent_results_of_current_level():
+    # 최신순: 어려움 2번은 잘 못 풀었고, 그 전 보통 기록은 판단에서 빠짐
+    history = [_result(HARD, 1), _result(HARD, 2), _result(NORMAL, 5), _result(NORMAL, 5)]
+    decision = next_difficulty(history)
+    assert decision.current == HARD
+    assert decision.difficulty == NORMAL
+    assert decision.accuracy == 0.3
+
+
+def test_ignores_results_without_known_difficulty():
+    history = [{"score": 0, "total_questions": 5}, _result(NORMAL, 5), _result(NORMAL, 5)]
+    assert next_difficulty(history).difficulty == HARD
+
+
+def test_pool_prefers_unseen_quiz_and_reuses_oldest_without_generating():
+    generated = threading.Event()
+
+    def loader(textbook, chapter, difficulty, limit):
+        return [{"id": "q1", "created_at": "2024-02-01"}, {"id": "q2", "created_at": "2024-01-01"}]
+
+    def generator(textbook, chapter, difficulty, question_types):
+        generated.set()
+        return {"id": "new"}
+
+    pool = QuizPool(loader, generator, min_size=2)
+    try:
+        assert pool.take("T", "C", NORMAL, exclude_ids={"q1"})["id"] == "q2"
+        # 모두 푼 퀴즈면 새로 만들지 않고 가장 오래된 퀴즈를 다시 줌
+        assert pool.take("T", "C", NORMAL, exclude_ids={"q1", "q2"})["id"] == "q2"
+        assert not generated.wait(0.2)
+    finally:
+        pool.close()
+
+
+def test_pool_refills_once_per_key_up_to_target_size():
+    release = threading.Event()
+    calls = []
+
+    def generator(textbook, chapter, difficulty, question_types):
+        release.wait(5)
+        calls.append(difficulty)
+        return {"id": f"new{len(calls)}"}
+
+    pool = QuizPool(lambda *args: [], generator, min_size=2, target_size=3, workers=2)
+    try:
+        for _ in range(5):
+            pool.take("T", "C", EASY)
+        release.set()
+        pool._executor.shutdown(wait=True)
+        # 여러 번 요청해도 채우기는 한 번만, target_size까지만 생성
+        assert calls == [EASY] * 3
+        pool.add({"id": "extra", "textbook_name": "T", "chapter": "C", "difficulty": EASY})
+        assert "extra" not in {q["id"] for q in pool._pools[("T", "C", EASY)].values()}
+    finally:
+        pool.close()
+
+
+def test_pool_waits_before_retrying_failed_refill():
+    calls = []
+
+    def generator(textbook, chapter, difficulty, question_types):
+        calls.append(difficulty)
+        raise RuntimeError("budget exceeded")
+
+    pool = QuizPool(lambda *args: [], generator, min_size=1, workers=1)
+    try:
+        pool.take("T", "C", HARD)
+        pool._executor.submit(lambda: None).result(5)
+        pool.take("T", "C", HARD)
+        pool._executor.submit(lambda: None).result(5)
+        assert calls == [HARD]
+        assert pool.failures
+    finally:
+        pool.close()
+
+
+def test_pool_without_quizzes_returns_none():
+    pool = QuizPool(lambda *args: [])
+    try:
+        assert pool.take("T", "C", EASY) is None
+    finally:
+        pool.close()
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import item_analysis
+from item_analysis import UNANSWERED, analyze, analyze_responses, answer_matrix, item_totals, totals_from_matrices
+
+
+def _simulated_answers(n=300, key=(0, 1, 2, 3, 0, 1), seed=1):
+    """능력이 높을수록 정답을 고를 확률이 높은 응답 행렬"""
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(size=n)
+    difficulty = np.linspace(-1.5, 1.5, len(key))
+    p_correct = 1 / (1 + np.exp(-(ability[:, None] - difficulty[None, :]) * 1.7))
+    correct = rng.random((n, len(key))) < p_correct
+    wrong = (np.array(key)[None, :] + rng.integers(1, 4, size=(n, len(key)))) % 4
+    return np.where(correct, np.array(key)[None, :], wrong).astype(np.int16), list(key)
+
+
+def _add(total: dict, part: dict):
+    """Firestore Increment로 두 번 나누어 쌓은 것과 같은 합"""
+    for name, value in part.items():
+        if isinstance(value, dict):
+            _add(total.setdefault(name, {}), value)
+        else:
+            total[name] = total.get(name, 0) + value
+    return total
+
+
+def test_discrimination_and_kr20_match_direct_computation():
+    answers, key = _simulated_answers()
+    analysis = analyze_responses(answers, key)
+    flags = (answers == np.array(key)[None, :]).astype(float)
+    scores = flags.sum(axis=1)
+    for q, item in enumerate(analysis.items):
+        rest = scores - flags[:, q]
+        assert item.difficulty == pytest.approx(flags[:, q].mean())
+        assert item.discrimination == pytest.approx(np.corrcoef(flags[:, q], rest)[0, 1])
+    k = len(key)
+    kr20 = k / (k - 1) * (1 - (flags.mean(0) * (1 - flags.mean(0))).sum() / scores.var())
+    assert analysis.kr20 == pytest.approx(kr20)
+    assert analysis.count == len(answers)
+
+
+def test_wrong_key_is_flagged_as_negative_discrimination():
+    answers, key = _simulated_answers()
+    wrong_key = list(key)
+    wrong_key[2] = (key[2] + 1) % 4
+    item = analyze_responses(answers, wrong_key).items[2]
+    assert item.discrimination < 0
+    assert "변별도 음수 (정답 오류 의심)" in item.warnings
+
+
+def test_option_rates_and_unused_distractor_warning():
+    rows = [{"answers": [0]}] * 9 + [{"answers": [1]}] * 3
+    analysis = analyze_responses(answer_matrix(rows, 1), [0])
+    assert analysis.items[0].option_rates == pytest.approx([0.75, 0.25, 0.0, 0.0])
+    assert "오답 C를 거의 고르지 않음" in analysis.items[0].warnings
+
+
+def test_no_warnings_below_min_responses():
+    rows = [{"answers": [1]}] * (item_analysis.MIN_RESPONSES - 1)
+    assert analyze_responses(answer_matrix(rows, 1), [0]).items[0].warnings == []
+
+
+def test_totals_accumulate_like_increments():
+    answers, key = _simulated_answers(n=50)
+    flags = answers == np.array(key)[None, :]
+    scores = flags.sum(axis=1)
+    whole = totals_from_matrices(answers, flags, scores)
+    split = _add(_add({}, totals_from_matrices(answers[:20], flags[:20], scores[:20])),
+                 totals_from_matrices(answers[20:], flags[20:], scores[20:]))
+    assert split == whole
+
+
+def test_item_totals_skips_results_without_flags():
+    rows = [
+        {"score": 1, "answers": [0, 2], "correct_flags": [True, False]},
+        {"score": 2, "answers": [0, 1], "correct_flags": [True, True]},
+        {"score": 1, "answers": [0, 3]},
+    ]
+    totals = item_totals(rows)
+    assert totals["count"] == 2
+    assert totals["score_sum"] == 3 and totals["score_sq_sum"] == 5
+    assert totals["correct"] == {"0": 2, "1": 1}
+    assert totals["correct_score_sum"] == {"0": 3, "1": 2}
+    assert totals["options"] == {"0": {"0": 2}, "1": {"1": 1, "2": 1}}
+
+
+def test_answer_matrix_marks_missing_answers():
+    matrix = answer_matrix([{"answers": [1, None]}, {}], 3)
+    assert matrix.tolist() == [[1, UNANSWERED, UNANSWERED], [UNANSWERED] * 3]
+
+
+def test_analyze_returns_none_without_item_totals():
+    assert analyze({"count": 3, "question_correct": {"0": 2}}) is None
+    assert analyze(None) is None
+    # 문항별 정답 수가 items 안에 없는 옛 형식
+    assert analyze({"count": 3, "items": {"count": 3, "score_sum": 2, "score_sq_sum": 2}}) is None
+
+
+def test_stats_with_submissions_before_item_totals_use_items_only():
+    answers, key = _simulated_answers(n=40)
+    later = analyze_responses(answers, key)
+    flags = answers == np.array(key)[None, :]
+    # items 도입 전 제출 200건이 바깥 count / question_correct에만 쌓여 있는 문서
+    stats = {
+        "count": 240,
+        "total_questions": len(key),
+        "question_correct": {str(q): int(n) + 150 for q, n in enumerate(flags.sum(axis=0))},
+        "items": totals_from_matrices(answers, flags, flags.sum(axis=1)),
+    }
+    analysis = analyze(stats, key)
+    assert analysis.count == 40
+    assert analysis == later
+    assert all(0 <= item.difficulty <= 1 for item in analysis.items)
+    assert analysis.kr20 is None or analysis.kr20 <= 1
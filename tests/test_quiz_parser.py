@@ -0,0 +1,55 @@
+import json
+
+from quiz_parser import QuestionStreamParser, normalize_question, parse_questions, question_errors
+
+
+def _question(answer, text="Q1"):
+    return {"question_text": text, "options": ["a", "b", "c", "d"], "correct_answer": answer, "type": "주제 찾기"}
+
+
+def _feed_in_chunks(text: str, size: int = 7) -> list:
+    parser = QuestionStreamParser()
+    questions = []
+    for start in range(0, len(text), size):
+        questions += parser.feed(text[start:start + size])
+    return questions
+
+
+def test_stream_parser_accepts_circled_digit_answer():
+    text = '```json\n{"questions": [' + json.dumps(_question("③"), ensure_ascii=False) + "]}\n```"
+    questions = _feed_in_chunks(text)
+    assert [q["correct_answer"] for q in questions] == [2]
+
+
+def test_stream_parser_yields_each_question_as_it_completes():
+    parser = QuestionStreamParser()
+    first = json.dumps(_question(0, "Q1"), ensure_ascii=False)
+    assert parser.feed('{"questions": [' + first[:-3]) == []
+    assert [q["question_text"] for q in parser.feed(first[-3:] + ", ")] == ["Q1"]
+    assert [q["question_text"] for q in parser.feed(json.dumps(_question(1, "Q2")) + "]}")] == ["Q2"]
+    assert parser.finished
+
+
+def test_stream_parser_keeps_complete_questions_of_truncated_response():
+    text = '{"questions": [' + json.dumps(_question(1)) + ', {"question_text": "Q2", "opti'
+    assert len(_feed_in_chunks(text)) == 1
+
+
+def test_parse_questions_repairs_python_literals_and_trailing_commas():
+    text = "{'questions': [{'question_text': 'Q1', 'options': ['a','b','c','d'], 'correct_answer': 'B', 'type': None,},]}"
+    questions = parse_questions(text.replace("'", '"'))
+    assert questions[0]["correct_answer"] == 1
+    assert questions[0]["type"] is None
+
+
+def test_normalize_question_answer_forms():
+    assert normalize_question(_question("2"))["correct_answer"] == 2
+    assert normalize_question(_question("c)"))["correct_answer"] == 2
+    assert normalize_question(_question("④"))["correct_answer"] == 3
+    assert normalize_question({"options": {"A": "x", "B": "y"}})["options"] == ["x", "y"]
+
+
+def test_normalize_question_leaves_unparseable_answer_for_validation():
+    question = normalize_question(_question("⑤"))
+    assert question["correct_answer"] == "⑤"
+    assert question_errors(question) == ["correct_answer는 0-3 사이 정수여야 합니다"]
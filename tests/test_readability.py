@@ -0,0 +1,78 @@
+import pytest
+
+import readability
+from textbook_store import TextbookStore
+from textbooks import LEXILE_TARGETS
+
+EASY_TEXT = "The cat sat on the mat. It was a good day. We like to play in the sun."
+HARD_TEXT = (
+    "Notwithstanding considerable methodological heterogeneity, contemporary epidemiological investigations "
+    "consistently demonstrate that socioeconomic deprivation substantially exacerbates cardiovascular morbidity, "
+    "particularly among demographically vulnerable populations inhabiting environmentally compromised neighbourhoods."
+)
+
+# 쉬움 난이도 지시(짧은 문장, 기초 어휘)를 지킨 전형적인 재작성
+EASY_REWRITE = (
+    "Many young people have a dream. Some want to be doctors. Others want to make music or play sports. "
+    "A dream can help you work hard every day. But dreams do not come true by magic. You need a plan. "
+    "First, think about what you love to do. Then, find out what you need to learn. Ask your teachers and "
+    "family for help. Do a little every day. Sometimes you will fail. That is okay. Try again and learn from "
+    "it. Little steps can take you far. Your dream is the first step to a happy life."
+)
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("cat", 1), ("table", 2), ("make", 1), ("jumped", 1), ("wanted", 2), ("education", 4),
+])
+def test_count_syllables(word, expected):
+    assert readability.count_syllables(word) == expected
+
+
+def test_split_sentences_skips_fragments_without_words():
+    assert readability.split_sentences("Is it  new? Then he left!  ...") == ["Is it new?", "Then he left!"]
+
+
+def test_analyze_counts_and_ordering():
+    easy = readability.analyze(EASY_TEXT)
+    hard = readability.analyze(HARD_TEXT)
+    assert (easy.words, easy.sentences) == (18, 3)
+    assert easy.max_sentence_length == 7
+    assert easy.rare_word_ratio < hard.rare_word_ratio
+    assert easy.lexile < hard.lexile
+    assert easy.flesch_kincaid_grade < hard.flesch_kincaid_grade
+    assert 0 <= easy.lexile <= hard.lexile <= 2000
+
+
+def test_analyze_empty_text():
+    report = readability.analyze("  ...  ")
+    assert report.words == 0 and report.lexile == 0
+
+
+def test_level_gap_uses_target_band_with_tolerance():
+    tolerance = readability.DEFAULT_TOLERANCE
+    assert readability.level_gap(700, "쉬움 (Easy)") == 0
+    assert readability.level_gap(800 + tolerance, "쉬움 (Easy)") == 0
+    assert readability.level_gap(1000, "쉬움 (Easy)") == 200
+    assert readability.level_gap(400, "쉬움 (Easy)") == -200
+    assert readability.level_gap(2000, "어려움 (Hard)") == 0
+    assert readability.level_gap(900, "어려움 (Hard)") == -300
+    assert readability.level_gap(100, "보통 (Original)") == 0
+
+
+def test_easy_rewrite_lands_inside_easy_band():
+    low, high = LEXILE_TARGETS["쉬움 (Easy)"]
+    lexile = readability.analyze(EASY_REWRITE).lexile
+    assert low <= lexile <= high
+    assert readability.level_gap(lexile, "쉬움 (Easy)") == 0
+
+
+def test_academic_text_lands_inside_hard_band():
+    low, _ = LEXILE_TARGETS["어려움 (Hard)"]
+    assert readability.analyze(HARD_TEXT).lexile >= low
+
+
+def test_textbook_passages_sit_between_easy_and_hard_bands():
+    store = TextbookStore()
+    for entry in store.entries():
+        lexile = readability.analyze(store.passage(entry.textbook, entry.chapter)).lexile
+        assert LEXILE_TARGETS["쉬움 (Easy)"][1] < lexile < LEXILE_TARGETS["어려움 (Hard)"][0]
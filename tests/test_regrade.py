@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+import regrade
+from item_analysis import UNANSWERED, answer_matrix
+
+
+def test_regrade_matrix_compares_every_submission_at_once():
+    answers = np.array([[0, 1, 2], [0, 2, 2], [3, 1, UNANSWERED]], dtype=np.int16)
+    flags, scores = regrade.regrade_matrix(answers, [0, 1, 2])
+    assert flags.tolist() == [[True, True, True], [True, False, True], [False, True, False]]
+    assert scores.tolist() == [3, 2, 1]
+
+
+def test_regrade_matrix_never_matches_unanswered_or_missing_key():
+    answers = np.array([[UNANSWERED, 1]], dtype=np.int16)
+    flags, scores = regrade.regrade_matrix(answers, [None, None])
+    assert not flags.any()
+    assert scores.tolist() == [0]
+
+
+def test_regrade_matrix_matches_per_row_grading():
+    rng = np.random.default_rng(0)
+    key = rng.integers(0, 4, size=8).tolist()
+    rows = [{"answers": rng.integers(-1, 4, size=8).tolist()} for _ in range(200)]
+    for row in rows:
+        row["answers"] = [None if v < 0 else v for v in row["answers"]]
+    flags, scores = regrade.regrade_matrix(answer_matrix(rows, len(key)), key)
+    expected = [[a is not None and a == k for a, k in zip(row["answers"], key)] for row in rows]
+    assert flags.tolist() == expected
+    assert scores.tolist() == [sum(row) for row in expected]
+
+
+class _FakeBatch:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+        self.ops = 0
+
+    def set(self, ref, document, merge=False):
+        self.ops += 1
+
+    def update(self, ref, fields):
+        self.ops += 1
+
+    def commit(self):
+        if self.fail:
+            raise RuntimeError("deadline exceeded")
+        self.log.append(self.ops)
+
+
+class _FakeDB:
+    def __init__(self, fail_on=None):
+        self.commits = []
+        self._created = 0
+        self._fail_on = fail_on
+
+    def batch(self):
+        self._created += 1
+        return _FakeBatch(self.commits, fail=self._created == self._fail_on)
+
+
+def test_batch_writer_commits_in_chunks(monkeypatch):
+    monkeypatch.setattr(regrade, "MAX_BATCH_WRITES", 3)
+    db = _FakeDB()
+    writer = regrade._BatchWriter(db)
+    for _ in range(7):
+        writer.update(None, {})
+    writer.commit()
+    assert db.commits == [3, 3, 1]
+    assert (writer.batches, writer.writes) == (3, 7)
+
+
+def test_batch_writer_counts_only_committed_writes(monkeypatch):
+    monkeypatch.setattr(regrade, "MAX_BATCH_WRITES", 3)
+    writer = regrade._BatchWriter(_FakeDB(fail_on=2))
+    with pytest.raises(RuntimeError):
+        for _ in range(7):
+            writer.set(None, {})
+    assert (writer.batches, writer.writes) == (1, 3)
+
+
+class _Ref:
+    def __init__(self, path=()):
+        self.path = path
+
+    def collection(self, name):
+        return _Ref(self.path + (name,))
+
+    def document(self, name):
+        return _Ref(self.path + (name,))
+
+
+class _CapturingWriter:
+    def __init__(self):
+        self.documents = {}
+
+    def set(self, ref, document, merge=False):
+        self.documents[ref.path] = document
+
+
+def _stats_documents(old_scores, new_scores):
+    rows = [{"id": str(i), "score": s} for i, s in enumerate(old_scores)]
+    old = np.array(old_scores, dtype=np.int64)
+    new = np.array(new_scores, dtype=np.int64)
+    flags = np.zeros((len(rows), 1), dtype=bool)
+    writer = _CapturingWriter()
+    changed = np.flatnonzero(old != new)
+    regrade._write_stats_deltas(writer, _Ref(), "q1", rows, rows, changed, old, new, flags, flags)
+    return writer.documents[("quiz_stats", "q1")]
+
+
+def test_stats_min_max_use_transforms_when_range_widens():
+    from firebase_admin import firestore
+
+    document = _stats_documents([1, 2, 3], [0, 2, 4])
+    assert isinstance(document["score_min"], firestore.Minimum) and document["score_min"].value == 0
+    assert isinstance(document["score_max"], firestore.Maximum) and document["score_max"].value == 4
+
+
+def test_stats_min_max_are_overwritten_when_range_narrows():
+    document = _stats_documents([0, 2, 4], [1, 2, 3])
+    assert (document["score_min"], document["score_max"]) == (1, 3)
@@ -0,0 +1,199 @@
+# ============================================================================
+# 교과서 지문 저장소 (JSONL 본문 + 색인 파일)
+# ============================================================================
+# data/textbooks/passages.jsonl 에 지문 1개가 한 줄씩 들어 있고,
+# index.json 에는 본문 없이 출판사/교과서/단원, 파일 내 위치(offset, length),
+# 난이도 측정값만 담는다. 화면 구성에는 색인만 쓰고, 본문은 단원이 선택될 때
+# mmap으로 해당 줄만 읽는다. 색인이 없거나 JSONL이 바뀌었으면 자동으로 다시 만든다.
+# (크기가 다르거나, 수정 시각이 다르면서 내용 해시도 다를 때 바뀐 것으로 본다)
+#
+# 사용법:
+#     python textbook_store.py build      # 색인 다시 만들기
+#     python textbook_store.py stats      # 출판사/교과서별 지문 수
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import readability
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "textbooks")
+PASSAGES_FILE = "passages.jsonl"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 2          # 난이도 측정 방식이 바뀌면 올려서 색인을 다시 만듦
+
+
+@dataclass(frozen=True)
+class PassageEntry:
+    """색인 항목 (본문 제외)"""
+    id: str
+    publisher: str
+    textbook: str
+    chapter: str
+    offset: int
+    length: int
+    level: readability.ReadabilityReport
+
+
+def source_signature(path: str) -> dict:
+    """원본 파일의 크기 / 수정 시각 / 내용 해시 (색인에 함께 저장해서 바뀌었는지 확인)"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(path)}
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_unchanged(signature: dict, path: str) -> bool:
+    """크기와 수정 시각이 같으면 바로 통과, 수정 시각만 다르면(git checkout 등) 내용 해시로 확인"""
+    if not signature:
+        return False
+    stat = os.stat(path)
+    if signature.get("size") != stat.st_size:
+        return False
+    return signature.get("mtime_ns") == stat.st_mtime_ns or signature.get("sha256") == file_digest(path)
+
+
+def build_index(passages_path: str, index_path: str) -> dict:
+    """JSONL을 한 번 훑어 색인 파일 작성 (지문별 난이도도 이때 계산)"""
+    source = source_signature(passages_path)
+    entries = []
+    offset = 0
+    with open(passages_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                level = readability.analyze(row["original_passage"])
+                entries.append({
+                    "id": row["id"],
+                    "publisher": row.get("publisher", ""),
+                    "textbook": row["textbook"],
+                    "chapter": row["chapter"],
+                    "offset": offset,
+                    "length": len(line),
+                    "level": level.__dict__,
+                })
+            offset += len(line)
+    index = {"version": INDEX_VERSION, "source": source, "entries": entries}
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+class TextbookStore:
+    """교과서 색인 조회 + 지문 본문 지연 로딩 (스레드 안전)"""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, cache_size: int = 64):
+        self.passages_path = os.path.join(data_dir, PASSAGES_FILE)
+        self.index_path = os.path.join(data_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._file = None
+        self._books = OrderedDict()      # textbook → OrderedDict(chapter → PassageEntry)
+        self._publishers = OrderedDict() # publisher → [textbook, ...]
+        self._load_index()
+        self.passage = lru_cache(maxsize=cache_size)(self._read_passage)
+
+    def _load_index(self):
+        index = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        if (index is None or index.get("version") != INDEX_VERSION
+                or not source_unchanged(index.get("source"), self.passages_path)):
+            index = build_index(self.passages_path, self.index_path)
+        for row in index["entries"]:
+            entry = PassageEntry(**{**row, "level": readability.ReadabilityReport(**row["level"])})
+            self._books.setdefault(entry.textbook, OrderedDict())[entry.chapter] = entry
+            books = self._publishers.setdefault(entry.publisher, [])
+            if entry.textbook not in books:
+                books.append(entry.textbook)
+
+    # ------------------------------------------------------------------
+    # 색인 조회 (본문 읽지 않음)
+    # ------------------------------------------------------------------
+    def publishers(self) -> list:
+        return list(self._publishers)
+
+    def textbooks(self, publisher: str = None) -> list:
+        if publisher is None:
+            return list(self._books)
+        return list(self._publishers.get(publisher, []))
+
+    def chapters(self, textbook: str) -> list:
+        return list(self._books.get(textbook, {}))
+
+    def entry(self, textbook: str, chapter: str) -> PassageEntry:
+        return self._books[textbook][chapter]
+
+    def entries(self):
+        for chapters in self._books.values():
+            yield from chapters.values()
+
+    def level(self, textbook: str, chapter: str) -> readability.ReadabilityReport:
+        """색인에 저장된 원본 지문 난이도"""
+        return self.entry(textbook, chapter).level
+
+    def __len__(self) -> int:
+        return sum(len(chapters) for chapters in self._books.values())
+
+    # ------------------------------------------------------------------
+    # 본문 (선택된 단원만 읽음)
+    # ------------------------------------------------------------------
+    def _read_passage(self, textbook: str, chapter: str) -> str:
+        entry = self.entry(textbook, chapter)
+        with self._lock:
+            if self._mmap is None:
+                self._file = open(self.passages_path, "rb")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            line = self._mmap[entry.offset:entry.offset + entry.length]
+        return json.loads(line)["original_passage"]
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._file.close()
+                self._mmap = self._file = None
+
+
+@lru_cache(maxsize=None)
+def default_store() -> TextbookStore:
+    """기본 데이터 디렉터리의 저장소 (프로세스당 하나)"""
+    return TextbookStore()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="교과서 지문 저장소 관리")
+    parser.add_argument("command", choices=["build", "stats"])
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="passages.jsonl이 있는 디렉터리")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = build_index(os.path.join(args.data_dir, PASSAGES_FILE), os.path.join(args.data_dir, INDEX_FILE))
+        print(f"색인 생성 완료: 지문 {len(index['entries'])}개")
+        return 0
+
+    store = TextbookStore(args.data_dir)
+    for publisher in store.publishers():
+        for textbook in store.textbooks(publisher):
+            print(f"{publisher} / {textbook}: {len(store.chapters(textbook))}개 단원")
+    print(f"전체 지문 {len(store)}개")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
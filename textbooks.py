@@ -1,60 +1,7 @@
 # ============================================================================
-# 한국 교과서 데이터 (Mock Data)
+# 교과서 메타데이터 (지문 본문은 data/textbooks/, textbook_store.py 참고)
 # ============================================================================
 
-TEXTBOOKS = {
-    "YBM 고등 영어 1": {
-        "1단원: Dream Big": {
-            "original_passage": """Every young person has a dream. Some want to become doctors, teachers, or engineers. 
-Others dream of becoming athletes, artists, or musicians. Dreams are important because they give us direction and motivation. 
-They help us work hard and never give up. When we pursue our dreams, we learn new skills and meet new people. 
-Even if we face challenges, our dreams keep us going. Many successful people say their dreams changed their lives. 
-So, never stop dreaming and believing in yourself."""
-        },
-        "2단원: The Power of Words": {
-            "original_passage": """Words have the power to change the world. A single word can make someone happy or sad. 
-A kind word can brighten someone's day. On the other hand, a harsh word can hurt deeply. 
-Throughout history, powerful speeches have inspired people to take action. Martin Luther King Jr.'s 'I Have a Dream' speech changed America. 
-Mahatma Gandhi used peaceful words to fight for independence. Today, words on social media can reach millions of people instantly. 
-We must be careful about what we say because words have real impact. Choose your words wisely and use them to inspire others."""
-        },
-        "3단원: Technology and Our Lives": {
-            "original_passage": """Technology has changed how we live, work, and communicate. Smartphones allow us to stay connected with people around the world. 
-Social media platforms connect billions of people daily. Online shopping makes shopping convenient and easy. 
-However, technology also has negative effects. Too much screen time can harm our health. 
-Cyberbullying is a serious problem in the digital age. Personal information shared online can be misused. 
-Despite these challenges, technology continues to advance and improve our lives. 
-We must learn to use technology responsibly and take advantage of its benefits."""
-        }
-    },
-    "천재교육 고등 영어 2": {
-        "1단원: Cultural Diversity": {
-            "original_passage": """The world is full of different cultures, traditions, and customs. Each country has its own unique way of life. 
-In some cultures, people greet each other by bowing. In others, they shake hands or hug. 
-Food is an important part of culture. Different regions have different favorite foods and cooking methods. 
-Music and dance are also cultural expressions. Traditional music varies greatly from country to country. 
-Learning about different cultures helps us understand and respect one another. 
-Globalization has made it easier to experience different cultures. When we appreciate diversity, we create a more peaceful world."""
-        },
-        "2단원: Environmental Issues": {
-            "original_passage": """Our planet is facing serious environmental challenges. Climate change is causing rising temperatures worldwide. 
-Pollution from factories and cars damages the air, water, and soil. Deforestation destroys habitats for many animals. 
-Ocean plastic pollution affects marine life severely. These problems threaten our future and the future of next generations. 
-However, there are solutions. Renewable energy like solar and wind power can replace fossil fuels. 
-Recycling reduces waste and saves resources. Individuals, communities, and governments must work together to protect the environment. 
-Every action counts, and we all have a responsibility to make a difference."""
-        },
-        "3단원: Health and Wellness": {
-            "original_passage": """Good health is important for a happy life. Regular exercise keeps our bodies strong and healthy. 
-A balanced diet provides the nutrients our bodies need. Getting enough sleep is essential for physical and mental health. 
-Stress management is crucial in our busy modern lives. Meditation and yoga help reduce stress. 
-Mental health is as important as physical health. Many people suffer from anxiety and depression. 
-We should not be ashamed to seek help from professionals. Building healthy relationships and having supportive friends is important. 
-Taking care of ourselves means we can better help others around us."""
-        }
-    }
-}
-
 # 질문 유형 설명
 QUESTION_TYPES_INFO = {
     "주제 추론": "지문의 주제나 주요 내용을 파악하는 문제",
@@ -63,3 +10,12 @@ QUESTION_TYPES_INFO = {
     "요지 추론": "지문의 요점이나 결론을 파악하는 문제",
     "문단 요약": "특정 문단의 내용을 가장 잘 요약한 것을 선택하는 문제"
 }
+
+# 지문 난이도 선택지 (교사 화면 / 일괄 생성 공통)
+DIFFICULTY_OPTIONS = ["쉬움 (Easy)", "보통 (Original)", "어려움 (Hard)"]
+
+# 난이도별 목표 Lexile 구간 (하한, 상한) — None이면 해당 방향 제한 없음, 보통은 원본 유지
+LEXILE_TARGETS = {
+    "쉬움 (Easy)": (600, 800),
+    "어려움 (Hard)": (1200, None),
+}
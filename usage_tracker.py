@@ -0,0 +1,189 @@
+# ============================================================================
+# OpenAI 호출 사용량 기록 / 일일 예산 / 모델 라우팅
+# ============================================================================
+# 호출마다 함수 이름, 모델, 프롬프트/응답 토큰(스트림 마지막 usage 이벤트),
+# 지연 시간, 성공 여부를 로컬 SQLite에 남긴다. 오늘 사용 금액이 예산을 넘으면
+# 호출 전에 BudgetExceededError를 올리고, 예산에 가까워지면 저렴한 모델로 보낸다.
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+DEFAULT_DB_PATH = os.path.join(".cache", "openai_usage.sqlite3")
+
+# USD / 100만 토큰 (프롬프트, 응답)
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+ECONOMY_MODEL = "gpt-4o-mini"
+
+DEFAULT_DAILY_BUDGET_USD = 5.0        # 앱 전체
+DEFAULT_USER_DAILY_BUDGET_USD = 1.0   # 교사 1명
+# 오늘 사용 금액이 예산의 이 비율을 넘으면 ECONOMY_MODEL로 라우팅
+ECONOMY_THRESHOLD = 0.8
+
+
+class BudgetExceededError(Exception):
+    """오늘 OpenAI 사용 예산을 모두 쓴 경우"""
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-3.5-turbo"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def estimate_tokens(text: str) -> int:
+    """usage가 오지 않는 호환 서버용 대략적인 토큰 수 (한글은 글자당 1토큰 가까이 쓰므로 보수적으로)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+# ============================================================================
+# 모델 / max_tokens 라우팅
+# ============================================================================
+@dataclass(frozen=True)
+class ModelRoute:
+    model: str
+    max_tokens: int
+
+
+def route_rewrite(passage: str, default_model: str, spend_ratio: float = 0.0) -> ModelRoute:
+    """지문 변환: 결과 길이(200-350단어)와 원본 길이에 맞춰 max_tokens 결정"""
+    words = len(passage.split())
+    max_tokens = min(1200, max(600, int(words * 2)))
+    model = ECONOMY_MODEL if spend_ratio >= ECONOMY_THRESHOLD else default_model
+    return ModelRoute(model, max_tokens)
+
+
+def route_quiz(passage: str, question_count: int, default_model: str, spend_ratio: float = 0.0) -> ModelRoute:
+    """문제 생성: 문제 1개당 약 350토큰(한글 JSON) + 여유분"""
+    max_tokens = min(2000, 200 + 350 * max(question_count, 1))
+    model = ECONOMY_MODEL if spend_ratio >= ECONOMY_THRESHOLD else default_model
+    return ModelRoute(model, max_tokens)
+
+
+# ============================================================================
+# 사용량 기록
+# ============================================================================
+class UsageTracker:
+    """OpenAI 호출 기록과 일일 예산 (스레드 안전, 프로세스당 하나)"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, daily_budget: float = DEFAULT_DAILY_BUDGET_USD,
+                 user_daily_budget: float = DEFAULT_USER_DAILY_BUDGET_USD):
+        self.daily_budget = daily_budget
+        self.user_daily_budget = user_daily_budget
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        except sqlite3.Error:
+            # 디스크를 쓸 수 없는 환경에서는 메모리에만 기록
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            " day TEXT NOT NULL, ts REAL NOT NULL, user TEXT NOT NULL, function TEXT NOT NULL,"
+            " model TEXT NOT NULL, prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL,"
+            " cost REAL NOT NULL, latency_ms REAL NOT NULL, ok INTEGER NOT NULL, estimated INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_day_user ON calls (day, user)")
+        self._conn.commit()
+
+    def scope(self, user: str) -> "UsageScope":
+        return UsageScope(self, user or "anonymous")
+
+    def record(self, user: str, function: str, model: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, ok: bool, estimated: bool = False):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (date.today().isoformat(), time.time(), user, function, model, prompt_tokens,
+                 completion_tokens, cost, latency * 1000, int(ok), int(estimated)),
+            )
+            self._conn.commit()
+
+    def spent_today(self, user: str = None) -> float:
+        query = "SELECT COALESCE(SUM(cost), 0) FROM calls WHERE day = ?"
+        params = [date.today().isoformat()]
+        if user is not None:
+            query += " AND user = ?"
+            params.append(user)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def spend_ratio(self, user: str) -> float:
+        """오늘 예산 사용 비율 (앱 전체 / 교사 개인 중 큰 값)"""
+        ratios = [0.0]
+        if self.daily_budget:
+            ratios.append(self.spent_today() / self.daily_budget)
+        if self.user_daily_budget:
+            ratios.append(self.spent_today(user) / self.user_daily_budget)
+        return max(ratios)
+
+    def check_budget(self, user: str):
+        if self.daily_budget and self.spent_today() >= self.daily_budget:
+            raise BudgetExceededError(f"오늘 OpenAI 사용 예산(${self.daily_budget:.2f})을 모두 사용했습니다.")
+        if self.user_daily_budget and self.spent_today(user) >= self.user_daily_budget:
+            raise BudgetExceededError(f"{user}의 오늘 OpenAI 사용 예산(${self.user_daily_budget:.2f})을 모두 사용했습니다.")
+
+    def user_summary(self, days: int = 1) -> list:
+        """교사별 최근 days일 사용량"""
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user, COUNT(*), SUM(1 - ok), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost)"
+                " FROM calls WHERE day >= ? GROUP BY user ORDER BY SUM(cost) DESC", (since,)
+            ).fetchall()
+        return [
+            {"user": user, "calls": calls, "failures": failures, "prompt_tokens": prompt_tokens,
+             "completion_tokens": completion_tokens, "cost": round(cost, 4)}
+            for user, calls, failures, prompt_tokens, completion_tokens, cost in rows
+        ]
+
+    def function_summary(self, days: int = 1) -> list:
+        """함수별 최근 days일 호출 수 / 실패 수 / 토큰 / 지연 p50·p95"""
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT function, latency_ms, ok, prompt_tokens, completion_tokens, cost"
+                " FROM calls WHERE day >= ?", (since,)
+            ).fetchall()
+        grouped = {}
+        for function, latency_ms, ok, prompt_tokens, completion_tokens, cost in rows:
+            grouped.setdefault(function, []).append((latency_ms, ok, prompt_tokens, completion_tokens, cost))
+        summary = []
+        for function, calls in sorted(grouped.items()):
+            latencies = sorted(c[0] for c in calls)
+            summary.append({
+                "function": function,
+                "calls": len(calls),
+                "failures": sum(1 for c in calls if not c[1]),
+                "prompt_tokens": sum(c[2] for c in calls),
+                "completion_tokens": sum(c[3] for c in calls),
+                "cost": round(sum(c[4] for c in calls), 4),
+                "p50_ms": round(latencies[int(0.5 * (len(latencies) - 1))]),
+                "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))]),
+            })
+        return summary
+
+
+class UsageScope:
+    """한 사용자(교사 이메일, 일괄 생성 등)에 묶인 UsageTracker"""
+
+    def __init__(self, tracker: UsageTracker, user: str):
+        self.tracker = tracker
+        self.user = user
+
+    def check_budget(self):
+        self.tracker.check_budget(self.user)
+
+    def spend_ratio(self) -> float:
+        return self.tracker.spend_ratio(self.user)
+
+    def record(self, function: str, model: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, ok: bool, estimated: bool = False):
+        self.tracker.record(self.user, function, model, prompt_tokens, completion_tokens, latency, ok, estimated)